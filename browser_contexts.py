@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plusieurs contextes de navigation isolés dans un seul Chrome
+Chaque contexte (Target.createBrowserContext) a ses propres cookies et son onglet ;
+un thread unique pilote le WebDriver et fait progresser tous les onglets à tour de
+rôle : les chargements de plusieurs SCPI avancent en parallèle dans Chrome, pour la
+mémoire d'un seul navigateur au lieu d'un Chrome par worker.
+
+Sans isolation (isolated=False), les onglets d'arrière-plan partagent le contexte par
+défaut : c'est le pipeline du mode multiple (pipeline_depth), où les SCPI suivantes
+se chargent pendant l'analyse du DOM de la précédente, faite dans un thread à part.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from config_scraper import scraper_config
+from extraction_schema import EXTRACTION_PLAN
+from scpi_dataclasses import SCPIData, SCPIGeneralInfo, normalize_sections
+from scpi_logging import get_logger
+from scpi_scraper import ScrapeDeadlineExceeded, info_page_url, is_scpi_title, is_throttled_title
+
+logger = get_logger("contextes")
+
+# Le marqueur disparaît avec l'ancien document : la page suivante est chargée quand il est absent
+NAVIGATE_JS = "document.documentElement.dataset.scpiPending = '1'; window.location.href = arguments[0];"
+POLL_JS = ("return document.readyState === 'complete' && !document.documentElement.dataset.scpiPending"
+           " ? document.title : null;")
+STOP_JS = "window.stop();"
+
+
+@dataclass
+class _Job:
+    """Extraction d'une SCPI en cours dans un contexte"""
+    produit_id: int
+    sections: Tuple[str, ...]
+    future: Future
+    url: str  # Page à charger ou en cours de chargement
+    deadline: float = 0.0
+    started: Optional[float] = None  # Prise en charge par un onglet (time.monotonic)
+    section_deadline: Optional[float] = None  # Budget de la section dont la page est en cours (section_budgets)
+    pages: Dict[str, str] = field(default_factory=dict)
+    timed_out: List[str] = field(default_factory=list)  # Pages de section abandonnées (délai ou budget)
+    network: Optional[Dict[str, dict]] = None  # Champs des réponses JSON de la page principale ({} : rien de lisible)
+
+
+@dataclass
+class _Context:
+    """Onglet et son contexte isolé (None : contexte par défaut)"""
+    context_id: Optional[str]
+    target_id: str
+    handle: str
+    job: Optional[_Job] = None
+    started: Optional[float] = None  # Début du chargement en cours (None = aucun)
+
+
+class BrowserContextPool:
+    """Extrait plusieurs SCPI à la fois dans des onglets (contextes isolés ou non) d'un même Chrome"""
+
+    def __init__(self, contexts: int = None, scraper=None, rate_controller=None, poll_interval: float = 0.05,
+                 isolated: bool = True):
+        """
+        Args:
+            contexts: Nombre d'onglets, donc de SCPI en cours (par défaut browser_contexts)
+            scraper: Scraper dont le Chrome est partagé (par défaut préchauffé ou nouveau)
+            rate_controller: Contrôleur de débit (par défaut celui du scraper)
+            poll_interval: Attente entre deux tours des onglets (secondes)
+            isolated: Un contexte isolé par onglet (cookies séparés) ou onglets du contexte par défaut
+        """
+        if scraper is None:
+            from driver_startup import warm_standby
+            from scpi_scraper import SCPIScraperConfigurable
+            scraper = warm_standby.take() or SCPIScraperConfigurable()
+        self.scraper = scraper
+        self.driver = scraper.driver
+        self.rate_controller = rate_controller or scraper.rate_controller
+        self.network_capture = getattr(scraper, "network_capture", None)
+        self.poll_interval = poll_interval
+        self.page_load_timeout = scraper_config.get("page_load_timeout", 30)
+        self.site = scraper_config.get("base_url", "https://www.scpi-lab.com").rstrip("/")
+        self.isolated = isolated
+        self.contexts: List[_Context] = []
+        for _ in range(contexts or scraper_config.get("browser_contexts", 1)):
+            self.contexts.append(self._open_context())
+        logger.info("🧭 %s %s dans un seul Chrome", len(self.contexts),
+                    "contextes isolés ouverts" if isolated else "onglets d'arrière-plan ouverts")
+
+        # L'analyse des pages ne retient pas la boucle : les autres onglets continuent de charger
+        self._parser = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analyse")
+        self._jobs: "queue.Queue[_Job]" = queue.Queue()
+        self._durations: Dict[Future, float] = {}  # Durée propre des SCPI terminées, lue par duration()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="chrome-contextes", daemon=True)
+        self._thread.start()
+
+    def _open_context(self) -> _Context:
+        params = {"url": "about:blank"}
+        context_id = None
+        if self.isolated:
+            context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            params["browserContextId"] = context_id
+        before = set(self.driver.window_handles)
+        target_id = self.driver.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+        handle = (set(self.driver.window_handles) - before).pop()
+        return _Context(context_id, target_id, handle)
+
+    def submit(self, produit_id: int, sections=None) -> Future:
+        """Met une SCPI en attente d'un contexte libre, le résultat arrive dans le Future"""
+        if self._stopped.is_set():
+            raise RuntimeError("contextes fermés")
+        job = _Job(produit_id, normalize_sections(sections), Future(),
+                   url=f"{self.site}/scpi.php?vue=&produit_id={produit_id}")
+        self._jobs.put(job)
+        return job.future
+
+    def scrape(self, produit_id: int, sections=None) -> SCPIData:
+        """Extraction d'une SCPI (bloque jusqu'au résultat ; à appeler depuis plusieurs threads)"""
+        future = self.submit(produit_id, sections)
+        try:
+            return future.result()
+        finally:
+            self._durations.pop(future, None)
+
+    def duration(self, future: Future) -> Optional[float]:
+        """
+        Durée propre d'une SCPI terminée : de sa prise en charge par un onglet à son résultat
+        (chargements et analyse), sans l'attente d'un onglet libre ni celle de l'appelant
+
+        Lue une seule fois ; None si la SCPI n'a jamais été prise en charge.
+        """
+        return self._durations.pop(future, None)
+
+    def _loop(self):
+        """
+        Boucle du thread pilote ; quoi qu'il arrive, aucun Future n'est laissé sans résultat
+
+        Une erreur hors d'une SCPI (libération du débit, onglet fermé...) arrête la boucle :
+        les SCPI en cours et en attente reçoivent cette erreur plutôt que de bloquer leur appelant.
+        """
+        error = RuntimeError("contextes fermés")
+        try:
+            while not self._stopped.is_set():
+                busy = False
+                for context in self.contexts:
+                    if context.job is None:
+                        try:
+                            context.job = self._jobs.get(timeout=0 if busy else self.poll_interval)
+                        except queue.Empty:
+                            continue
+                        context.job.started = time.monotonic()
+                        context.job.deadline = context.job.started + scraper_config.get("scpi_deadline", 90)
+                    busy = True
+                    try:
+                        self._step(context)
+                    except Exception as e:
+                        self._finish(context, e)
+                if busy:
+                    time.sleep(self.poll_interval)
+        except Exception as e:
+            error = e
+            logger.error("❌ Pilotage des onglets arrêté: %s", e)
+        finally:
+            self._stopped.set()
+            self._fail_pending(error)
+
+    def _step(self, context: _Context):
+        """Fait avancer l'extraction du contexte sans attendre : lance ou vérifie un chargement"""
+        job = context.job
+        now = time.monotonic()
+        deadline = min(d for d in (job.deadline, job.section_deadline) if d is not None)
+        if context.started is None:
+            if now > deadline:
+                self._abandon(context, f"délai dépassé avant le chargement de {job.url}")
+                return
+            if not self.rate_controller.try_acquire():
+                return
+            context.started = now
+            self.driver.switch_to.window(context.handle)
+            if self.network_capture is not None and not job.pages:
+                self.network_capture.block_direct(self.driver)
+            self.driver.execute_script(NAVIGATE_JS, job.url)
+            return
+
+        self.driver.switch_to.window(context.handle)
+        title = self.driver.execute_script(POLL_JS)
+        if title is None:
+            if now - context.started > self.page_load_timeout or now > deadline:
+                self.driver.execute_script(STOP_JS)
+                self._release(context, ok=False, status="timeout")
+                self._abandon(context, f"chargement de {job.url} interrompu")
+            return
+
+        throttled = is_throttled_title(title)
+        loaded = is_scpi_title(title) and not throttled
+        self._release(context, ok=loaded, status=429 if throttled else None)
+        if loaded:
+            if not job.pages:
+                self._capture_network(job)
+            job.pages[job.url] = self.driver.page_source
+        elif not job.pages:
+            # Sans la page principale aucune section n'est exploitable (SCPI remise en file)
+            raise ScrapeDeadlineExceeded(f"page principale non chargée ({title})")
+
+        job.url = self._next_url(job) if loaded else None
+        if job.url is None:
+            self._finish(context)
+        else:
+            budget = scraper_config.get("section_budgets", {}).get("actualites")
+            job.section_deadline = now + budget if budget else None
+
+    def _abandon(self, context: _Context, reason: str):
+        """
+        Abandonne la page en cours : sans page principale la SCPI échoue, sinon seule la
+        section de la page (actualites) est notée timeout, comme en extraction séquentielle
+
+        Raises:
+            ScrapeDeadlineExceeded: Page principale non chargée
+        """
+        job = context.job
+        if not job.pages:
+            raise ScrapeDeadlineExceeded(reason)
+        logger.warning("⏳ SCPI %s: %s", job.produit_id, reason, extra={"produit_id": job.produit_id})
+        job.timed_out.append(job.url)
+        self._finish(context)
+
+    def _capture_network(self, job: _Job):
+        """
+        Relève les réponses JSON de la page principale pendant que son onglet est courant
+
+        Le journal "performance" est commun aux onglets : seules les réponses dont l'URL
+        porte le produit_id de la SCPI sont gardées (les autres restent aux URL retenues).
+        Journal illisible : {} (relevé fait, rien trouvé), l'analyse ne relit jamais le journal.
+        """
+        if self.network_capture is None:
+            return
+        try:
+            job.network = self.network_capture.captured(self.driver, job.produit_id, own_only=True)
+        except Exception as e:
+            logger.debug("Journal réseau illisible pour la SCPI %s: %s", job.produit_id, e)
+            job.network = {}
+
+    def _next_url(self, job: _Job) -> Optional[str]:
+        """Page informations après la page principale, si les actualités sont demandées"""
+        if len(job.pages) != 1 or "actualites" not in job.sections:
+            return None
+        snapshot = EXTRACTION_PLAN.read(next(iter(job.pages.values())))
+        nom = EXTRACTION_PLAN.build(SCPIGeneralInfo, snapshot).nom
+        return info_page_url(self.site, nom, job.produit_id) if nom else None
+
+    def _release(self, context: _Context, ok: bool, status=None):
+        self.rate_controller.release(time.monotonic() - context.started, ok, status)
+        context.started = None
+
+    def _finish(self, context: _Context, error: Exception = None):
+        """Libère le contexte ; les sections sont extraites des pages chargées dans le thread d'analyse"""
+        job, context.job = context.job, None
+        try:
+            if context.started is not None:
+                self._release(context, ok=False, status="exception")
+        finally:
+            if error is None:
+                self._parser.submit(self._parse, job)
+            else:
+                logger.warning("⚠️ SCPI %s: %s", job.produit_id, error, extra={"produit_id": job.produit_id})
+                self._complete(job, error=error)
+
+    def _complete(self, job: _Job, result: SCPIData = None, error: Exception = None):
+        """Donne son résultat au Future après avoir noté la durée propre de la SCPI"""
+        if job.started is not None:
+            self._durations[job.future] = time.monotonic() - job.started
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
+
+    def _fail_pending(self, error: Exception):
+        """Termine en erreur les SCPI en cours dans un onglet et celles en attente"""
+        jobs = [context.job for context in self.contexts if context.job is not None]
+        for context in self.contexts:
+            context.job = None
+        while True:
+            try:
+                jobs.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        for job in jobs:
+            if not job.future.done():
+                self._complete(job, error=error)
+
+    def _parse(self, job: _Job):
+        from page_archive import _make_replay_scraper
+        try:
+            scraper = _make_replay_scraper(job.pages, timed_out=job.timed_out)
+            scraper.network_capture = self.network_capture
+            # Le driver de rejeu n'a pas de journal réseau : seuls les champs relevés au chargement comptent
+            scraper._captured_json = job.network or {}
+            result = scraper.scrape_scpi(job.produit_id, job.sections)
+        except Exception as e:
+            self._complete(job, error=e)
+        else:
+            self._complete(job, result)
+
+    def close(self):
+        """Arrête la boucle, ferme les contextes (ou les onglets) puis Chrome"""
+        self._stopped.set()
+        self._thread.join()
+        self._parser.shutdown(wait=True)
+        self._fail_pending(RuntimeError("contextes fermés"))  # SCPI soumises pendant l'arrêt
+        for context in self.contexts:
+            try:
+                if context.context_id is not None:
+                    self.driver.execute_cdp_cmd("Target.disposeBrowserContext",
+                                                {"browserContextId": context.context_id})
+                else:
+                    self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": context.target_id})
+            except Exception as e:
+                logger.debug("Onglet %s non fermé: %s", context.target_id, e)
+        self.scraper.close()
+
+
+def pipeline(depth: int = None, scraper=None) -> BrowserContextPool:
+    """Onglets d'arrière-plan du mode multiple : `depth` SCPI en cours de chargement ou d'analyse"""
+    return BrowserContextPool(depth or scraper_config.get("pipeline_depth", 1), scraper=scraper, isolated=False)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profils Chrome persistants
+Chaque worker réserve un profil (user-data-dir) verrouillé pour lui seul, ce qui
+conserve le cache disque (CSS, JS, polices) d'une exécution à l'autre
+"""
+
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+
+from config_scraper import scraper_config
+from file_lock import try_lock, unlock
+
+LAST_USED_FILE = ".last_used"
+
+
+class ProfileLease:
+    """Profil Chrome réservé par un worker"""
+
+    def __init__(self, path: str, lock_handle):
+        self.path = path
+        self._lock_handle = lock_handle
+
+    def release(self):
+        """Libère le profil et note sa date de dernière utilisation"""
+        if self._lock_handle is None:
+            return
+        try:
+            with open(os.path.join(self.path, LAST_USED_FILE), "w") as f:
+                f.write(str(time.time()))
+        except OSError:
+            pass
+        unlock(self._lock_handle)
+        self._lock_handle.close()
+        self._lock_handle = None
+
+
+def acquire_profile(base_dir: str = None, max_profiles: int = None) -> Optional[ProfileLease]:
+    """
+    Réserve le premier profil libre (profile-0, profile-1, ...)
+
+    Args:
+        base_dir: Dossier des profils (par défaut la config "profile_dir")
+        max_profiles: Nombre maximal de profils (par défaut la config "max_profiles")
+
+    Returns:
+        ProfileLease, ou None si tous les profils sont occupés
+    """
+    base_dir = os.path.abspath(base_dir or scraper_config.get("profile_dir", "chrome_profiles"))
+    max_profiles = max_profiles or scraper_config.get("max_profiles", 8)
+    os.makedirs(base_dir, exist_ok=True)
+    for slot in range(max_profiles):
+        handle = open(os.path.join(base_dir, f"profile-{slot}.lock"), "a+")
+        if try_lock(handle):
+            path = os.path.join(base_dir, f"profile-{slot}")
+            os.makedirs(path, exist_ok=True)
+            return ProfileLease(path, handle)
+        handle.close()
+    return None
+
+
+def cleanup_profiles(base_dir: str = None, max_age_days: float = None) -> int:
+    """
+    Supprime les profils libres inutilisés depuis plus de max_age_days
+
+    Returns:
+        int: Nombre de profils supprimés
+    """
+    base_dir = base_dir or scraper_config.get("profile_dir", "chrome_profiles")
+    max_age_days = max_age_days if max_age_days is not None else scraper_config.get("profile_max_age_days", 30)
+    if not os.path.isdir(base_dir):
+        return 0
+    removed = 0
+    limit = time.time() - max_age_days * 86400
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if not name.startswith("profile-") or not os.path.isdir(path):
+            continue
+        marker = os.path.join(path, LAST_USED_FILE)
+        last_used = os.path.getmtime(marker) if os.path.exists(marker) else os.path.getmtime(path)
+        if last_used >= limit:
+            continue
+        with open(path + ".lock", "a+") as handle:
+            if not try_lock(handle):
+                continue  # Profil en cours d'utilisation
+            shutil.rmtree(path, ignore_errors=True)
+            unlock(handle)
+        removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--cleanup":
+        max_age = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        print(f"🧹 {cleanup_profiles(max_age_days=max_age)} profil(s) Chrome supprimé(s)")
+    else:
+        print("Usage: python browser_profile.py --cleanup [JOURS]")
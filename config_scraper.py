@@ -12,14 +12,62 @@ class ScraperConfig:
     """Configuration globale pour les scrapers"""
     
     def __init__(self):
-        self.config_file = "scraper_config.json"
+        # SCPI_SCRAPER_CONFIG permet de lancer des processus sur une autre configuration (tests de charge)
+        self.config_file = os.environ.get("SCPI_SCRAPER_CONFIG", "scraper_config.json")
         self.default_config = {
             "headless_mode": True,  # Par défaut en mode headless
             "timeout": 30,
+            "page_load_timeout": 30,  # Délai de chargement d'une page (driver.get)
+            "script_timeout": 10,
+            "scpi_deadline": 90,  # Délai total par SCPI, toutes pages comprises
+            "deadline_retries": 1,  # Remises en fin de liste après un délai dépassé (--multiple)
+            # Budget (secondes) des sections qui chargent leur propre page ; la page principale,
+            # commune aux autres sections, n'est bornée que par page_load_timeout et scpi_deadline
+            "section_budgets": {"actualites": 30, "chiffres_cles": 10},
             "debug_mode": False,
             "save_screenshots": False,
             "chrome_path": "./chrome-win64/chrome.exe",
-            "chromedriver_path": "./chromedriver-win64/chromedriver.exe"
+            "chromedriver_path": "./chromedriver-win64/chromedriver.exe",
+            "binary_cache_file": "chrome_binaries.json",  # Chemins résolus par Selenium Manager si les précédents n'existent pas
+            "queue_path": "scpi_queue.db",
+            "lease_seconds": 120,
+            "queue_backend": "sqlite",  # Backend de la file de travail (work_queue.QUEUE_BACKENDS)
+            "max_attempts": 3,  # Essais par SCPI avant échec définitif, baux expirés compris
+            "record_pages": False,
+            "archive_path": "page_archive",
+            "rate_initial_interval": 2.0,
+            "rate_min_interval": 0.0,
+            "rate_max_interval": 30.0,
+            "rate_max_concurrency": 4,
+            "rate_target_latency": 10.0,
+            "persistent_profile": True,
+            "profile_dir": "chrome_profiles",
+            "max_profiles": 8,
+            "disk_cache_size_mb": 256,
+            "profile_max_age_days": 30,
+            "diagnostics_dir": "diagnostics",
+            "diagnostics_quota_mb": 200,
+            "log_level": "INFO",
+            "log_format": "pretty",
+            "quiet_mode": False,
+            "log_file": None,
+            "base_url": "https://www.scpi-lab.com",
+            "profiling_dir": "profiling",
+            "profile_interval_ms": 5,
+            "profile_top_n": 20,
+            "bulletin_delay_days": 30,  # Publication des bulletins trimestriels après la fin du trimestre
+            "refresh_min_probability": 0.05,
+            "refresh_max_age_days": 90,
+            "refresh_budget_requests": None,  # Budget de pages par planification (None = illimité)
+            "refresh_budget_seconds": None,
+            "quarters_path": "scpi_trimestres.db",  # Historique trimestriel (--backfill)
+            "quarter_url_template": "{site}/scpi.php?vue=trimestre&produit_id={produit_id}&trimestre={trimestre}",
+            "quarter_absent_days": 30,  # Trimestre absent du site retenté après ce délai (jours)
+            "backfill_workers": 4,  # Requêtes en vol au plus pendant la reprise de l'historique
+            "capture_network": False,  # Répartitions lues dans les réponses JSON (journal réseau de Chrome)
+            "endpoint_registry_file": "json_endpoints.json",
+            "browser_contexts": 1,  # Contextes isolés par Chrome pour un worker de file (> 1 : SCPI en parallèle)
+            "pipeline_depth": 1  # SCPI chargées d'avance en onglets d'arrière-plan (--multiple, 1 = séquentiel)
         }
         self.load_config()
     
@@ -72,8 +120,13 @@ class ScraperConfig:
         self.set_headless(not current)
         return not current
     
-    def get_chrome_options(self):
-        """Retourne les options Chrome configurées"""
+    def get_chrome_options(self, profile_dir=None):
+        """
+        Retourne les options Chrome configurées
+
+        Args:
+            profile_dir: Profil persistant (user-data-dir) à utiliser, None = profil temporaire
+        """
         from selenium.webdriver.chrome.options import Options
         
         chrome_options = Options()
@@ -86,10 +139,20 @@ class ScraperConfig:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
+        # Profil persistant : le cache disque survit d'une exécution à l'autre
+        if profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+            cache_size = int(self.get("disk_cache_size_mb", 256)) * 1024 * 1024
+            chrome_options.add_argument(f"--disk-cache-size={cache_size}")
+        
         # Ajoute --headless si activé
         if self.is_headless():
             chrome_options.add_argument("--headless")
         
+        # Journal réseau (réponses JSON relues via DevTools)
+        if self.get("capture_network", False):
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
         # Mode debug
         if self.get("debug_mode", False):
             chrome_options.add_argument("--enable-logging")
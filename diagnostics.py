@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Captures de diagnostic (screenshots et DOM) écrites en arrière-plan
+Le thread de scraping se contente de déposer les octets bruts dans une file ;
+la compression, l'écriture et le respect du quota disque se font dans un thread dédié
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from config_scraper import scraper_config
+from scpi_logging import get_logger
+
+logger = get_logger("diagnostics")
+
+
+class DiagnosticsWriter:
+    """Écrivain de captures en tâche de fond avec quota disque"""
+
+    def __init__(self, directory: str = None, quota_mb: float = None, max_pending: int = 32):
+        """
+        Args:
+            directory: Dossier des captures (par défaut la config "diagnostics_dir")
+            quota_mb: Taille maximale du dossier, les plus anciennes captures sont supprimées
+            max_pending: Captures en attente au-delà desquelles les nouvelles sont ignorées
+        """
+        self.directory = directory or scraper_config.get("diagnostics_dir", "diagnostics")
+        quota_mb = quota_mb if quota_mb is not None else scraper_config.get("diagnostics_quota_mb", 200)
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = deque()
+        self._total = 0
+        self._scan_existing()
+        self._thread = threading.Thread(target=self._run, name="diagnostics-writer", daemon=True)
+        self._thread.start()
+
+    def _scan_existing(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                entries.append((os.path.getmtime(path), path, os.path.getsize(path)))
+        for _, path, size in sorted(entries):
+            self._files.append((path, size))
+            self._total += size
+
+    def submit(self, produit_id, stage: str, screenshot: bytes = None, html: str = None) -> bool:
+        """
+        Dépose une capture sans bloquer le thread appelant
+
+        Returns:
+            bool: False si la file est pleine (capture ignorée)
+        """
+        item = (datetime.now(), produit_id, stage, screenshot, html)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.warning("⚠️ Erreur lors de l'écriture d'une capture: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, timestamp, produit_id, stage, screenshot, html):
+        prefix = os.path.join(self.directory, f"{timestamp.strftime('%Y%m%d-%H%M%S-%f')}_{produit_id}_{stage}")
+        if screenshot:
+            # Le PNG est déjà compressé (deflate) : écrit tel quel
+            self._store(prefix + ".png", screenshot)
+        if html:
+            self._store(prefix + ".html.gz", gzip.compress(html.encode("utf-8"), compresslevel=6))
+
+    def _store(self, path: str, payload: bytes):
+        with open(path, "wb") as f:
+            f.write(payload)
+        self._files.append((path, len(payload)))
+        self._total += len(payload)
+        self.written += 1
+        while self._total > self.quota_bytes and len(self._files) > 1:
+            old_path, old_size = self._files.popleft()
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+            self._total -= old_size
+
+    def flush(self):
+        """Attend que toutes les captures en attente soient écrites"""
+        self._queue.join()
+
+    def close(self):
+        """Termine le thread après écriture des captures en attente"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+_writer: Optional[DiagnosticsWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_diagnostics_writer() -> DiagnosticsWriter:
+    """Écrivain partagé par tous les scrapers du processus"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DiagnosticsWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Démarrage de Chrome hors du chemin critique
+- Les chemins de Chrome et chromedriver sont résolus une fois (Selenium Manager si les
+  chemins configurés n'existent pas) puis mis en cache dans un fichier entre les exécutions
+- Un scraper peut être lancé en arrière-plan dès qu'une extraction est certaine ; en
+  mode multiple ce Chrome sert ensuite à toute la liste
+- Le délai jusqu'à la première navigation est mesuré
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from config_scraper import scraper_config
+from scpi_logging import get_logger
+
+logger = get_logger("demarrage")
+
+# Référence pour le délai de première navigation (import du scraper, au lancement du programme)
+PROCESS_START = time.perf_counter()
+
+_binaries: Optional[Tuple[str, Optional[str]]] = None
+_binaries_lock = threading.Lock()
+
+
+def _selenium_manager_paths(options) -> Tuple[str, Optional[str]]:
+    """Recherche (lente) de chromedriver et Chrome par Selenium Manager"""
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.driver_finder import DriverFinder
+
+    finder = DriverFinder(Service(), options)
+    return finder.get_driver_path(), finder.get_browser_path() or None
+
+
+def resolve_binaries(options, resolver: Callable = None) -> Tuple[str, Optional[str]]:
+    """
+    Chemins (chromedriver, Chrome) à utiliser
+
+    Les chemins configurés sont pris tels quels s'ils existent ; sinon le résultat de
+    Selenium Manager est lu dans le fichier binary_cache_file, ou calculé puis enregistré.
+    Sans Chrome résolu, options.binary_location est vidé, que le résultat vienne du cache
+    ou non : un chrome_path configuré mais absent n'est jamais transmis à chromedriver.
+
+    Args:
+        options: Options Chrome (navigateur et version recherchés par Selenium Manager)
+        resolver: Recherche à utiliser sans cache (par défaut Selenium Manager)
+    """
+    global _binaries
+    with _binaries_lock:
+        if _binaries is None:
+            _binaries = _resolve_binaries(options, resolver)
+        if not _binaries[1]:
+            options.binary_location = ""
+        return _binaries
+
+
+def _resolve_binaries(options, resolver: Callable = None) -> Tuple[str, Optional[str]]:
+    """Chemins configurés, sinon fichier de cache, sinon Selenium Manager"""
+    driver_path = scraper_config.get("chromedriver_path")
+    browser_path = scraper_config.get("chrome_path")
+    if driver_path and os.path.isfile(driver_path) and (not browser_path or os.path.isfile(browser_path)):
+        return driver_path, browser_path
+
+    key = {"chromedriver_path": driver_path, "chrome_path": browser_path}
+    cache_file = scraper_config.get("binary_cache_file", "chrome_binaries.json")
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if (cached.get("config") == key and os.path.isfile(cached["driver_path"])
+                and (not cached.get("browser_path") or os.path.isfile(cached["browser_path"]))):
+            return cached["driver_path"], cached.get("browser_path")
+    except (OSError, ValueError, KeyError):
+        pass
+
+    start = time.perf_counter()
+    if browser_path and not os.path.isfile(browser_path):
+        options.binary_location = ""  # Laisse Selenium Manager trouver (ou télécharger) Chrome
+    resolved_driver, resolved_browser = (resolver or _selenium_manager_paths)(options)
+    logger.info("🔎 Chrome et chromedriver résolus en %.2fs: %s", time.perf_counter() - start,
+                resolved_driver)
+    try:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"config": key, "driver_path": resolved_driver, "browser_path": resolved_browser},
+                      f, indent=2)
+    except OSError as e:
+        logger.warning("⚠️ Cache des binaires Chrome non écrit: %s", e)
+    return resolved_driver, resolved_browser
+
+
+def forget_binaries():
+    """Oublie les chemins résolus dans ce processus (le fichier de cache est conservé)"""
+    global _binaries
+    with _binaries_lock:
+        _binaries = None
+
+
+class StartupStats:
+    """Durées de lancement de Chrome et délai jusqu'à la première navigation"""
+
+    def __init__(self):
+        self.launches: List[float] = []  # Durée de chaque lancement de Chrome
+        self.hidden = 0.0  # Temps de lancement masqué par le démarrage anticipé
+        self.first_navigation: Optional[float] = None  # Secondes depuis PROCESS_START
+        self._lock = threading.Lock()
+
+    def record_launch(self, seconds: float):
+        with self._lock:
+            self.launches.append(seconds)
+
+    def record_standby(self, launch: float, wait: float):
+        """Scraper lancé en arrière-plan : durée de son lancement et attente effective"""
+        with self._lock:
+            self.hidden += max(0.0, launch - wait)
+
+    def navigation_started(self):
+        if self.first_navigation is None:
+            self.first_navigation = time.perf_counter() - PROCESS_START
+
+    def report(self) -> Optional[str]:
+        """Ligne de résumé, None si aucune page n'a été chargée"""
+        if self.first_navigation is None:
+            return None
+        line = f"🚀 Première navigation à {self.first_navigation:.2f}s du lancement"
+        if self.launches:
+            line += (f" | Chrome: {len(self.launches)} lancement(s), {sum(self.launches) / len(self.launches):.2f}s "
+                     f"en moyenne, {self.hidden:.2f}s masqués par le démarrage anticipé")
+        return line
+
+
+startup_stats = StartupStats()
+
+
+class _Launch(threading.Thread):
+    """Lancement d'un scraper en arrière-plan pour un mode d'affichage"""
+
+    def __init__(self, create: Callable, headless):
+        super().__init__(name="chrome-standby", daemon=True)
+        self.create = create
+        self.headless = headless
+        self.scraper = None
+        self.error: Optional[BaseException] = None
+        self.seconds = 0.0
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.scraper = self.create(self.headless)
+        except BaseException as e:
+            self.error = e
+        self.seconds = time.perf_counter() - start
+
+    def close(self):
+        """Attend la fin du lancement et ferme le scraper obtenu"""
+        self.join()
+        if self.scraper is not None:
+            self.scraper.close()
+            self.scraper = None
+
+
+class WarmStandby:
+    """Un scraper lancé en arrière-plan, prêt pour la prochaine extraction"""
+
+    def __init__(self, factory: Callable = None):
+        """
+        Args:
+            factory: Crée le scraper à partir de headless (par défaut SCPIScraperConfigurable)
+        """
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._launch: Optional[_Launch] = None
+        self._closing: List[threading.Thread] = []  # Scrapers d'un autre mode, fermés en arrière-plan
+
+    def _create(self, headless):
+        if self.factory is not None:
+            return self.factory(headless)
+        from scpi_scraper import SCPIScraperConfigurable
+        return SCPIScraperConfigurable(headless=headless)
+
+    def prewarm(self, headless=None) -> bool:
+        """
+        Lance un scraper en arrière-plan s'il n'y en a pas déjà un
+
+        Returns:
+            bool: True si un lancement a été démarré
+        """
+        with self._lock:
+            if self._launch is not None:
+                return False
+            self._launch = _Launch(self._create, headless)
+            self._launch.start()
+            return True
+
+    def take(self, headless=None):
+        """
+        Retourne le scraper lancé en arrière-plan (en attendant la fin de son lancement)
+
+        Returns:
+            Le scraper, ou None s'il n'y en a pas pour ce mode d'affichage (un scraper
+            lancé dans l'autre mode est alors fermé en arrière-plan)
+        """
+        with self._lock:
+            launch, self._launch = self._launch, None
+            if launch is None:
+                return None
+            if launch.headless != headless:
+                closer = threading.Thread(target=launch.close, name="chrome-standby-close", daemon=True)
+                closer.start()
+                self._closing.append(closer)
+                return None
+        start = time.perf_counter()
+        launch.join()
+        startup_stats.record_standby(launch.seconds, time.perf_counter() - start)
+        if launch.error is not None:
+            raise launch.error
+        return launch.scraper
+
+    def discard(self):
+        """Ferme le scraper inutilisé et ceux en cours de fermeture (fin du programme)"""
+        with self._lock:
+            launch, self._launch = self._launch, None
+            closing, self._closing = self._closing, []
+        if launch is not None:
+            launch.close()
+        for closer in closing:
+            closer.join()
+
+
+warm_standby = WarmStandby()
+atexit.register(warm_standby.discard)
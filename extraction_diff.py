@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rapport des changements entre deux extractions
+Chaque SCPI reçoit une empreinte par champ et une empreinte globale : une SCPI
+inchangée est écartée en comparant une seule valeur, et seuls les champs dont
+l'empreinte diffère sont détaillés (prix, dividendes, TOF, actualités...).
+Les sections non extraites d'un côté ne sont pas comparées ; les métadonnées
+(date, durées, URL) sont ignorées.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scpi_dataclasses import ALL_SECTIONS, SCPIData
+
+# Catégorie de changement de chaque champ (les autres champs sont classés "autre")
+FIELD_CATEGORIES = {
+    "chiffres_cles.prix_part_actuel": "prix",
+    "chiffres_cles.prix_part_vente": "prix",
+    "chiffres_cles.valeur_reconstitution": "prix",
+    "chiffres_cles.dividende_brut_annuel": "dividende",
+    "chiffres_cles.dividende_net_annuel": "dividende",
+    "chiffres_cles.taux_distribution_brut": "dividende",
+    "chiffres_cles.taux_distribution_net": "dividende",
+    "trimestre_info.acompte_brut": "dividende",
+    "chiffres_cles.tof_aspim": "tof",
+    "chiffres_cles.tof_exploitation": "tof",
+    "trimestre_info.tof_aspim_trimestre": "tof",
+    "trimestre_info.tof_exploitation_trimestre": "tof",
+    "actualites": "actualites",
+    "evenements_cles": "evenements",
+}
+
+
+def _hash(value) -> bytes:
+    """Empreinte d'une valeur : repr pour les scalaires, JSON canonique (clés triées) sinon"""
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return repr(value).encode("utf-8")
+
+
+@dataclass
+class Fingerprint:
+    """Empreintes d'une extraction : globale et par champ (sections extraites uniquement)"""
+    digest: bytes
+    fields: Dict[str, bytes]  # "chiffres_cles.prix_part_actuel" -> empreinte
+    values: Dict[str, object]  # Valeurs des champs, pour détailler les changements
+
+
+def fingerprint(data: SCPIData) -> Fingerprint:
+    """Empreinte par champ des sections extraites ; les listes (actualités...) forment un seul champ"""
+    values = {}
+    for section in ALL_SECTIONS:
+        if not data.has_section(section):
+            continue
+        content = getattr(data, section)
+        if isinstance(content, list):
+            values[section] = [vars(item) for item in content]
+        else:
+            # Attributs lus sans copie (asdict recopierait chaque répartition imbriquée)
+            values.update({f"{section}.{name}": value for name, value in vars(content).items()})
+    fields = {name: _hash(value) for name, value in values.items()}
+    digest = blake2b(digest_size=16)
+    for name in sorted(fields):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(fields[name])
+        digest.update(b"\0")
+    return Fingerprint(digest.digest(), fields, values)
+
+
+def _item_label(item: dict) -> str:
+    """Libellé court d'une actualité ou d'un événement clé"""
+    parts = [item.get("date"), item.get("titre") or item.get("type_evenement"), item.get("variation")]
+    return " ".join(str(part) for part in parts if part)
+
+
+def _dict_changes(before: dict, after: dict, prefix: str = "") -> Dict[str, list]:
+    """Clés modifiées d'un dictionnaire (imbriqué ou non) : chemin -> [avant, après]"""
+    changes = {}
+    for key in list(before) + [key for key in after if key not in before]:
+        old, new = before.get(key), after.get(key)
+        if isinstance(old, dict) and isinstance(new, dict):
+            changes.update(_dict_changes(old, new, f"{prefix}{key}/"))
+        elif old != new:
+            changes[f"{prefix}{key}"] = [old, new]
+    return changes
+
+
+@dataclass
+class FieldChange:
+    """Changement d'un champ entre deux extractions"""
+    field: str
+    category: str
+    before: object = None
+    after: object = None
+    variation: Optional[float] = None  # En pourcentage, pour les valeurs numériques
+    details: Dict[str, list] = field(default_factory=dict)  # Dictionnaires : clé -> [avant, après]
+    added: List[str] = field(default_factory=list)  # Listes : éléments apparus
+    removed: List[str] = field(default_factory=list)  # Listes : éléments disparus
+
+    @classmethod
+    def between(cls, name: str, before, after) -> "FieldChange":
+        change = cls(name, FIELD_CATEGORIES.get(name, "autre"))
+        if isinstance(before, list) and isinstance(after, list):
+            old = {_hash(item): item for item in before}
+            new = {_hash(item): item for item in after}
+            change.added = [_item_label(item) for key, item in new.items() if key not in old]
+            change.removed = [_item_label(item) for key, item in old.items() if key not in new]
+        elif isinstance(before, dict) and isinstance(after, dict):
+            change.details = _dict_changes(before, after)
+        else:
+            change.before, change.after = before, after
+            numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (before, after))
+            if numeric and before:
+                change.variation = round((after / before - 1) * 100, 2)
+        return change
+
+    def describe(self) -> str:
+        """Ligne du rapport ("prix_part_actuel: 835.0 → 670.0 (-19,76 %)")"""
+        name = self.field.split(".")[-1]
+        if self.added or self.removed:
+            items = [f"+{label}" for label in self.added] + [f"-{label}" for label in self.removed]
+            shown = ", ".join(items[:3]) + (f" (+{len(items) - 3})" if len(items) > 3 else "")
+            return f"{name}: {shown}"
+        if self.details:
+            return f"{name}: " + ", ".join(f"{key} {_format(old)} → {_format(new)}"
+                                           for key, (old, new) in self.details.items())
+        variation = f" ({self.variation:+.2f} %)".replace(".", ",") if self.variation is not None else ""
+        return f"{name}: {_format(self.before)} → {_format(self.after)}{variation}"
+
+
+def _format(value) -> str:
+    return "-" if value is None else str(value)
+
+
+@dataclass
+class SCPIChange:
+    """Changements d'une SCPI"""
+    produit_id: int
+    nom: Optional[str]
+    changes: List[FieldChange]
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted({change.category for change in self.changes})
+
+
+@dataclass
+class DiffReport:
+    """Rapport des changements entre deux extractions"""
+    changed: List[SCPIChange]
+    unchanged: int  # Empreinte globale identique, ou seuls des champs non comparables ont changé
+    added: List[int]  # SCPI absentes de l'extraction précédente
+    removed: List[int]  # SCPI absentes de la nouvelle extraction
+
+    def filter(self, categories: Iterable[str]) -> "DiffReport":
+        """Ne garde que les changements des catégories demandées ("prix", "dividende", "tof"...)"""
+        categories = set(categories)
+        changed = []
+        for scpi in self.changed:
+            changes = [change for change in scpi.changes if change.category in categories]
+            if changes:
+                changed.append(SCPIChange(scpi.produit_id, scpi.nom, changes))
+        return DiffReport(changed, self.unchanged + len(self.changed) - len(changed), self.added, self.removed)
+
+    def to_dict(self) -> dict:
+        """Rapport sérialisable (JSON)"""
+        return {
+            "modifiees": [
+                {"produit_id": scpi.produit_id, "nom": scpi.nom, "categories": scpi.categories,
+                 "changements": [{k: v for k, v in asdict(change).items() if v not in (None, [], {})}
+                                  for change in scpi.changes]}
+                for scpi in self.changed
+            ],
+            "inchangees": self.unchanged,
+            "nouvelles": self.added,
+            "disparues": self.removed,
+        }
+
+    def format(self) -> str:
+        """Rapport compact pour la console"""
+        lines = [f"🔎 {len(self.changed)} SCPI modifiée(s), {self.unchanged} inchangée(s), "
+                 f"{len(self.added)} nouvelle(s), {len(self.removed)} disparue(s)"]
+        for scpi in self.changed:
+            lines.append(f"\n📝 {scpi.nom or 'SCPI'} (ID: {scpi.produit_id}) [{', '.join(scpi.categories)}]")
+            lines.extend(f"   {change.describe()}" for change in scpi.changes)
+        if self.added:
+            lines.append(f"\n🆕 Nouvelles: {', '.join(map(str, self.added))}")
+        if self.removed:
+            lines.append(f"\n🗑️ Disparues: {', '.join(map(str, self.removed))}")
+        return "\n".join(lines)
+
+
+def compare_fingerprints(before: Fingerprint, after: Fingerprint) -> List[FieldChange]:
+    """Champs modifiés ; les champs extraits d'un seul côté ne sont pas comparés"""
+    if before.digest == after.digest:
+        return []
+    return [FieldChange.between(name, before.values[name], after.values[name])
+            for name, digest in after.fields.items()
+            if name in before.fields and before.fields[name] != digest]
+
+
+def compare_runs(before: Iterable[SCPIData], after: Iterable[SCPIData],
+                 previous: Dict[int, Fingerprint] = None) -> DiffReport:
+    """
+    Compare deux extractions (une SCPIData par produit_id de chaque côté)
+
+    Args:
+        before: Extraction précédente
+        after: Nouvelle extraction
+        previous: Empreintes déjà calculées de l'extraction précédente (produit_id -> Fingerprint)
+    """
+    previous = dict(previous or {})
+    for data in before:
+        if data.produit_id not in previous:
+            previous[data.produit_id] = fingerprint(data)
+
+    changed, unchanged, seen = [], 0, set()
+    for data in after:
+        seen.add(data.produit_id)
+        old = previous.get(data.produit_id)
+        if old is None:
+            continue
+        changes = compare_fingerprints(old, fingerprint(data))
+        if changes:
+            nom = data.general_info.nom if data.has_section("general_info") else None
+            changed.append(SCPIChange(data.produit_id, nom, changes))
+        else:
+            unchanged += 1
+    return DiffReport(changed, unchanged, sorted(seen - set(previous)), sorted(set(previous) - seen))
+
+
+def latest_run(queue, since: datetime = None) -> Tuple[List[SCPIData], List[SCPIData]]:
+    """
+    Extractions à comparer pour la dernière exécution de la file : (précédentes, nouvelles)
+
+    La file numérote les extractions de chaque SCPI (générations) sans identifiant
+    d'exécution : seules les SCPI extraites depuis `since` (par défaut le jour de la
+    dernière extraction) sont retenues, chacune face à sa génération précédente. Une SCPI
+    non ré-extraite est écartée : ses deux dernières générations viennent d'exécutions
+    antérieures.
+    """
+    after = queue.results()
+    if not after:
+        return [], []
+    if since is None:
+        since = datetime.combine(max(data.date_extraction for data in after).date(), datetime.min.time())
+    after = [data for data in after if data.date_extraction >= since]
+    ids = {data.produit_id for data in after}
+    before = [data for data in queue.results(previous=1) if data.produit_id in ids]
+    return before, after
+
+
+def benchmark(n_scpi: int = 5000, changed: float = 0.05, seed: int = 0) -> float:
+    """Mesure la comparaison de deux extractions de n_scpi SCPI dont une part `changed` a changé"""
+    import random
+    from dataclasses import replace
+    from datetime import datetime
+    from extraction_schema import EXTRACTION_PLAN
+    from mock_scpi_server import main_page
+    from scpi_dataclasses import SCPIChiffresClés, SCPIGeneralInfo, SCPITrimestreInfo
+
+    # Sections lues une fois sur une page du serveur synthétique, puis déclinées par SCPI
+    snapshot = EXTRACTION_PLAN.read(main_page(0))
+    template = SCPIData(
+        general_info=EXTRACTION_PLAN.build(SCPIGeneralInfo, snapshot),
+        chiffres_cles=EXTRACTION_PLAN.build(SCPIChiffresClés, snapshot),
+        trimestre_info=EXTRACTION_PLAN.build(SCPITrimestreInfo, snapshot),
+        evenements_cles=[], actualites=[], date_extraction=datetime(2025, 4, 1), url_source=""
+    )
+
+    rng = random.Random(seed)
+    before, after = [], []
+    for produit_id in range(n_scpi):
+        regions = {f"Région {i}": {f"Ville {j}": rng.uniform(0, 5) for j in range(10)} for i in range(10)}
+        data = replace(template, produit_id=produit_id,
+                       chiffres_cles=replace(template.chiffres_cles, repartition_geographique=regions))
+        before.append(data)
+        if rng.random() < changed:
+            data = replace(data, chiffres_cles=replace(data.chiffres_cles, prix_part_actuel=190.0))
+        after.append(data)
+
+    start = time.perf_counter()
+    previous = {data.produit_id: fingerprint(data) for data in before}
+    fingerprinted = time.perf_counter()
+    report = compare_runs([], after, previous)
+    duration = time.perf_counter() - start
+    print(f"⏱️ {n_scpi} SCPI: empreintes {(fingerprinted - start) * 1000:.0f} ms, "
+          f"comparaison {(duration - (fingerprinted - start)) * 1000:.0f} ms ({len(report.changed)} modifiées)")
+    return duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Changements des SCPI extraites lors de la dernière exécution")
+    parser.add_argument("queue", nargs="?", help="file de travail (par défaut queue_path)")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="début de l'exécution (AAAA-MM-JJ[THH:MM], par défaut le jour de la dernière extraction)")
+    parser.add_argument("--categories", help="catégories retenues (ex: prix,dividende,tof,actualites)")
+    parser.add_argument("--json", help="écrit le rapport dans ce fichier")
+    parser.add_argument("--benchmark", action="store_true", help="mesure 5 000 SCPI")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        from work_queue import open_queue
+        queue = open_queue(args.queue)
+        report = compare_runs(*latest_run(queue, args.since))
+        if args.categories:
+            report = report.filter(name.strip() for name in args.categories.split(","))
+        print(report.format())
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+            print(f"💾 Rapport écrit dans {args.json}")
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Schéma d'extraction déclaratif
+Chaque champ des dataclasses est associé à des libellés du site et à un parseur
+typé. Le schéma est compilé une seule fois en un plan qui lit tous les couples
+libellé/valeur de la page en une seule traversée.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, fields
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scpi_dataclasses import (
+    SCPIGeneralInfo, SCPIChiffresClés, SCPITrimestreInfo, SCPIEvenementClé, SCPIActualité
+)
+
+
+# --- Parseurs typés ---
+
+def parse_text(text: str) -> Optional[str]:
+    """Texte brut nettoyé, None si vide"""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    return text or None
+
+def parse_number(text: str) -> Optional[float]:
+    """Extrait un nombre d'un texte ("670,00 €" -> 670.0)"""
+    if not text or text == "-":
+        return None
+    cleaned = re.sub(r'[^\d.,\-]', '', text.replace(' ', ''))
+    if not cleaned:
+        return None
+    try:
+        cleaned = cleaned.replace(',', '.')
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def parse_percentage(text: str) -> Optional[float]:
+    """Extrait un pourcentage d'un texte ("4,52 %" -> 4.52)"""
+    if not text or text == "-":
+        return None
+    match = re.search(r'(-?\d[\d\s]*(?:[,.]\d+)?)\s*%', text)
+    if match:
+        try:
+            return float(re.sub(r'\s', '', match.group(1)).replace(',', '.'))
+        except ValueError:
+            return None
+    return None
+
+def parse_euros(text: str) -> Optional[float]:
+    """Extrait le premier montant en euros ("19,78 € (2,37 %)" -> 19.78)"""
+    if not text:
+        return None
+    match = re.search(r'(-?\d[\d\s]*(?:[,.]\d+)?)\s*€', text)
+    if match:
+        return parse_number(match.group(1))
+    return parse_number(text) if "%" not in text else None
+
+def parse_int(text: str) -> Optional[int]:
+    """Extrait un entier ("57 895" -> 57895)"""
+    value = parse_number(text)
+    return int(round(value)) if value is not None else None
+
+def parse_count(text: str) -> Optional[int]:
+    """Extrait le premier entier d'un texte ("7 (37,60 M€)" -> 7)"""
+    match = re.search(r'\d+', text or "")
+    return int(match.group(0)) if match else None
+
+def parse_amount_text(text: str) -> Optional[str]:
+    """Extrait le montant tel qu'affiché ("7 (37,60 M€)" -> "37,60 M€")"""
+    match = re.search(r'-?\d[\d\s]*(?:[,.]\d+)?\s*(?:k€|K€|M€|Md€|Mds€|€)', text or "")
+    return parse_text(match.group(0)) if match else parse_text(text)
+
+def parse_year(text: str) -> Optional[int]:
+    """Extrait une année ("Créée en 1968" -> 1968)"""
+    match = re.search(r'\b(1[89]\d{2}|20\d{2})\b', text or "")
+    return int(match.group(1)) if match else None
+
+def parse_trimestre(text: str) -> Optional[str]:
+    """Normalise un trimestre ("T1 2025" -> "T1-2025")"""
+    match = re.search(r'\bT([1-4])[\s\-]?(20\d{2})\b', text or "")
+    return f"T{match.group(1)}-{match.group(2)}" if match else None
+
+def parse_repartition(text: str) -> Optional[dict]:
+    """Répartition en pourcentages ("Bureaux 71 % Commerces 20 %" -> {"Bureaux": 71.0, ...})"""
+    repartition = {}
+    for label, value in re.findall(r"([^\d%;,:]+?)\s*:?\s*(\d+(?:[,.]\d+)?)\s*%", text or ""):
+        label = label.strip(" -/")
+        if label:
+            repartition[label] = float(value.replace(",", "."))
+    return repartition or None
+
+def parse_nom(text: str) -> Optional[str]:
+    """Nom de la SCPI depuis le titre principal ("SCPI EPARGNE FONCIERE")"""
+    text = parse_text(text)
+    if not text:
+        return None
+    return re.sub(r'^SCPI\s+', '', text).strip() or None
+
+
+def normalize_label(text: str) -> str:
+    """Normalise un libellé : minuscules, sans accents ni ponctuation"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[^a-z0-9%]+", " ", text)
+    return text.strip()
+
+
+# --- Schéma ---
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Localisation et parseur d'un champ de dataclass"""
+    name: str
+    labels: Tuple[str, ...] = ()
+    parser: Callable[[str], object] = parse_text
+    source: str = "pairs"  # "pairs" (libellé/valeur), "heading" (h1) ou "text" (motif sur la page)
+    pattern: Optional[str] = None
+    default: object = None
+
+
+EXTRACTION_SCHEMA: Dict[type, List[FieldSpec]] = {
+    SCPIGeneralInfo: [
+        FieldSpec("nom", source="heading", parser=parse_nom),
+        FieldSpec("societe_gestion", ("société de gestion", "gestionnaire")),
+        FieldSpec("statut", ("statut",)),
+        FieldSpec("type_capital", ("type de capital", "capital")),
+        FieldSpec("type_actifs", ("typologie", "type d'actifs", "catégorie")),
+        FieldSpec("localisation_principale", ("localisation", "zone géographique")),
+        FieldSpec("annee_creation", ("année de création", "date de création", "création"), parse_year),
+        FieldSpec("agrement_amf", ("agrément amf", "visa amf")),
+        FieldSpec("telephone_contact", ("téléphone",)),
+        FieldSpec("email_contact", ("email", "e-mail")),
+    ],
+    SCPIChiffresClés: [
+        FieldSpec("capitalisation", ("capitalisation",), parse_amount_text),
+        FieldSpec("nb_associes", ("nombre d'associés", "associés"), parse_int),
+        FieldSpec("prix_part_actuel", ("prix de part", "prix de souscription", "prix d'achat"), parse_euros),
+        FieldSpec("prix_part_vente", ("retrait au", "prix de retrait", "valeur de retrait", "prix de vente"), parse_euros),
+        FieldSpec("date_prix_part", ("date du prix de part", "prix de part au", "date prix")),
+        FieldSpec("dividende_brut_annuel", ("dividende brut", "distribution brute"), parse_euros),
+        FieldSpec("taux_distribution_brut", ("taux de distribution brut", "taux de distribution", "td brut"), parse_percentage),
+        FieldSpec("dividende_net_annuel", ("dividende net", "distribution nette"), parse_euros),
+        FieldSpec("taux_distribution_net", ("taux de distribution net", "td net"), parse_percentage),
+        FieldSpec("report_nouveau", ("report à nouveau", "ran"), parse_percentage),
+        FieldSpec("report_nouveau_euros", ("report à nouveau", "ran"), parse_euros),
+        FieldSpec("valeur_reconstitution", ("valeur de reconstitution",), parse_euros),
+        FieldSpec("ratio_reconstitution", ("prix / reconstitution", "décote", "surcote", "ratio de reconstitution"), parse_percentage),
+        FieldSpec("nb_immeubles", ("nombre d'immeubles", "immeubles", "nombre d'actifs"), parse_int),
+        FieldSpec("surface_totale", ("surface totale", "surface"), parse_int),
+        FieldSpec("repartition_sectorielle", ("répartition sectorielle", "secteurs"), parse_repartition, default={}),
+        FieldSpec("repartition_geographique", ("répartition géographique", "géographie"), parse_repartition, default={}),
+        FieldSpec("ratio_engagement", ("ratio d'engagement", "ratio d'endettement", "endettement"), parse_percentage),
+        FieldSpec("tof_aspim", ("tof aspim", "taux d'occupation financier"), parse_percentage),
+        FieldSpec("tof_exploitation", ("tof exploitation", "tof d'exploitation"), parse_percentage),
+    ],
+    SCPITrimestreInfo: [
+        FieldSpec("trimestre", source="text", pattern=r"\bT[1-4][\s\-]?20\d{2}\b", parser=parse_trimestre),
+        FieldSpec("collecte_brute", ("collecte brute",), parse_amount_text),
+        FieldSpec("collecte_nette", ("collecte nette",), parse_text),
+        FieldSpec("nb_acquisitions", ("acquisitions",), parse_count),
+        FieldSpec("montant_acquisitions", ("acquisitions",), parse_amount_text),
+        FieldSpec("nb_cessions", ("cessions",), parse_count),
+        FieldSpec("montant_cessions", ("cessions",), parse_amount_text),
+        FieldSpec("acompte_brut", ("acompte brut", "acompte", "dividende trimestriel"), parse_euros),
+        FieldSpec("delai_cession", ("délai de cession", "délai de retrait", "liquidité")),
+        FieldSpec("liste_attente", ("liste d'attente", "parts en attente")),
+        FieldSpec("tof_aspim_trimestre", ("tof aspim", "taux d'occupation financier"), parse_percentage),
+        FieldSpec("tof_exploitation_trimestre", ("tof exploitation", "tof d'exploitation"), parse_percentage),
+    ],
+}
+
+
+# --- Traversée de la page ---
+
+class PageSnapshot:
+    """Contenu utile d'une page, collecté en une seule traversée du HTML"""
+
+    def __init__(self):
+        self.title = ""
+        self.headings: List[str] = []  # Titres h1
+        self.pairs: List[Tuple[str, str]] = []  # (libellé normalisé, valeur brute)
+        self.rows: List[List[str]] = []  # Cellules de chaque ligne de tableau
+        self.options: Dict[str, List[str]] = {}  # Nom du <select> -> options (valeur ou texte)
+        self.text = ""  # Texte affiché, hors options des sélecteurs
+        self.values: Dict[type, dict] = {}  # Rempli par ExtractionPlan.resolve()
+
+
+class _SnapshotBuilder(HTMLParser):
+    """Collecte titres, lignes de tableaux, couples dt/dd et "libellé : valeur" """
+
+    BLOCK_TAGS = {"p", "li", "div", "span", "td", "th", "dt", "dd", "h1", "h2", "h3", "h4", "label"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.snapshot = PageSnapshot()
+        self._texts: List[str] = []
+        self._skip = 0
+        self._in_title = False
+        self._heading = None
+        self._row = None
+        self._cell = None
+        self._term = None
+        self._block: List[List[str]] = []
+        self._select = None
+        self._option = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag == "select":
+            self._select = self.snapshot.options.setdefault(dict(attrs).get("name") or "", [])
+        elif tag == "option" and self._select is not None:
+            self._option = (dict(attrs).get("value"), [])
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "h1":
+            self._heading = []
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th", "dt", "dd"):
+            self._cell = []
+        if tag in self.BLOCK_TAGS:
+            self._block.append([])
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag == "select":
+            self._select = None
+        elif tag == "option" and self._option is not None:
+            value, texts = self._option
+            self._select.append(parse_text(value or "".join(texts)) or "")
+            self._option = None
+        elif tag == "title":
+            self._in_title = False
+        elif tag == "h1" and self._heading is not None:
+            self.snapshot.headings.append(parse_text("".join(self._heading)) or "")
+            self._heading = None
+        elif tag in ("td", "th") and self._cell is not None:
+            if self._row is not None:
+                self._row.append(parse_text("".join(self._cell)) or "")
+            self._cell = None
+        elif tag == "dt" and self._cell is not None:
+            self._term = parse_text("".join(self._cell))
+            self._cell = None
+        elif tag == "dd" and self._cell is not None:
+            if self._term:
+                self.snapshot.pairs.append((normalize_label(self._term), parse_text("".join(self._cell)) or ""))
+            self._term = None
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            cells = [c for c in self._row if c]
+            if cells:
+                self.snapshot.rows.append(cells)
+                if len(cells) >= 2:
+                    self.snapshot.pairs.append((normalize_label(cells[0]), " ".join(cells[1:])))
+            self._row = None
+        if tag in self.BLOCK_TAGS and self._block:
+            text = parse_text("".join(self._block.pop()))
+            # Élément feuille de la forme "Libellé : valeur"
+            if text and ":" in text and len(text) < 120 and tag not in ("td", "th", "dt", "dd"):
+                label, value = text.split(":", 1)
+                if label.strip() and value.strip():
+                    self.snapshot.pairs.append((normalize_label(label), value.strip()))
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_title:
+            self.snapshot.title += data
+            return
+        if self._option is not None:
+            self._option[1].append(data)
+            return
+        self._texts.append(data)
+        for target in (self._heading, self._cell):
+            if target is not None:
+                target.append(data)
+        if self._block:
+            self._block[-1].append(data)
+
+    def close(self):
+        super().close()
+        self.snapshot.title = parse_text(self.snapshot.title) or ""
+        self.snapshot.text = parse_text(" ".join(self._texts)) or ""
+        return self.snapshot
+
+
+class ExtractionPlan:
+    """Schéma compilé : index des libellés et motifs précompilés"""
+
+    def __init__(self, schema: Dict[type, List[FieldSpec]] = None):
+        self.schema = schema or EXTRACTION_SCHEMA
+        self._by_label: Dict[str, List[Tuple[type, FieldSpec]]] = {}
+        self._heading_specs: List[Tuple[type, FieldSpec]] = []
+        self._text_specs: List[Tuple[type, FieldSpec, re.Pattern]] = []
+        for cls, specs in self.schema.items():
+            for spec in specs:
+                if spec.source == "heading":
+                    self._heading_specs.append((cls, spec))
+                elif spec.source == "text":
+                    self._text_specs.append((cls, spec, re.compile(spec.pattern)))
+                for label in spec.labels:
+                    self._by_label.setdefault(normalize_label(label), []).append((cls, spec))
+        # Préfixes testés du plus long au plus court ("taux de distribution net" avant "taux de distribution")
+        aliases = sorted(self._by_label, key=len, reverse=True)
+        self._prefix = re.compile(r"^(" + "|".join(re.escape(a) for a in aliases) + r")(?:\b|$)")
+
+    def read(self, html: str) -> PageSnapshot:
+        """Traverse le HTML une seule fois et résout tous les champs"""
+        builder = _SnapshotBuilder()
+        builder.feed(html or "")
+        snapshot = builder.close()
+        self.resolve(snapshot)
+        return snapshot
+
+    def _specs_for(self, label: str) -> List[Tuple[type, FieldSpec]]:
+        specs = self._by_label.get(label)
+        if specs is None:
+            match = self._prefix.match(label)
+            specs = self._by_label[match.group(1)] if match else []
+        return specs
+
+    def resolve(self, snapshot: PageSnapshot) -> Dict[type, dict]:
+        """Associe chaque couple libellé/valeur aux champs du schéma"""
+        values = {cls: {} for cls in self.schema}
+        for label, raw in snapshot.pairs:
+            for cls, spec in self._specs_for(label):
+                if spec.name not in values[cls]:
+                    parsed = spec.parser(raw)
+                    if parsed is not None:
+                        values[cls][spec.name] = parsed
+
+        for cls, spec in self._heading_specs:
+            for heading in snapshot.headings[:1] or [snapshot.title]:
+                parsed = spec.parser(heading)
+                if parsed is not None:
+                    values[cls].setdefault(spec.name, parsed)
+
+        for cls, spec, pattern in self._text_specs:
+            match = pattern.search(snapshot.text)
+            if match:
+                parsed = spec.parser(match.group(0))
+                if parsed is not None:
+                    values[cls].setdefault(spec.name, parsed)
+
+        snapshot.values = values
+        return values
+
+    def build(self, cls: type, snapshot: PageSnapshot):
+        """Instancie la dataclass demandée, les champs absents prennent leur valeur par défaut"""
+        found = snapshot.values.get(cls, {})
+        defaults = {spec.name: spec.default for spec in self.schema[cls]}
+        kwargs = {}
+        for f in fields(cls):
+            if f.name in found:
+                kwargs[f.name] = found[f.name]
+            else:
+                default = defaults.get(f.name)
+                kwargs[f.name] = dict(default) if isinstance(default, dict) else default
+        return cls(**kwargs)
+
+    def missing_fields(self, cls: type, snapshot: PageSnapshot) -> List[str]:
+        """Liste les champs du schéma non trouvés sur la page"""
+        found = snapshot.values.get(cls, {})
+        return [spec.name for spec in self.schema[cls] if spec.name not in found]
+
+
+# Plan compilé une fois pour toutes
+EXTRACTION_PLAN = ExtractionPlan()
+
+
+# --- Sections en tableau (une ligne par élément) ---
+
+DATE_CELL = re.compile(r"^\d{2}[-/.]\d{2}[-/.]\d{2,4}$")
+
+
+def parse_evenements(snapshot: PageSnapshot) -> List[SCPIEvenementClé]:
+    """Lignes "date | type | description | avant | après | variation [| document]" de la page principale"""
+    evenements = []
+    for cells in snapshot.rows:
+        if len(cells) >= 6 and DATE_CELL.match(cells[0]) and parse_percentage(cells[5]) is not None:
+            evenements.append(SCPIEvenementClé(
+                date=cells[0], type_evenement=cells[1], description=cells[2],
+                valeur_avant=cells[3], valeur_apres=cells[4], variation=cells[5],
+                document_lie=cells[6] if len(cells) > 6 else None
+            ))
+    return evenements
+
+
+def parse_actualites(snapshot: PageSnapshot) -> List[SCPIActualité]:
+    """Lignes "date | type | titre | résumé" de la page informations"""
+    actualites = []
+    for cells in snapshot.rows:
+        if len(cells) >= 3 and DATE_CELL.match(cells[0]):
+            actualites.append(SCPIActualité(
+                date=cells[0], type_info=cells[1], titre=cells[2], resume=" ".join(cells[3:])
+            ))
+    return actualites
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verrous de fichiers entre processus
+Partagés par les profils Chrome, l'archive de pages et le registre des endpoints JSON :
+plusieurs workers (processus) écrivent dans les mêmes dossiers
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def try_lock(handle) -> bool:
+    """Verrou exclusif non bloquant, libéré automatiquement si le processus meurt"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def unlock(handle):
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+@contextmanager
+def locked(path: str, poll_interval: float = 0.01, shared: bool = False):
+    """
+    Verrou bloquant sur le fichier `path` (créé au besoin)
+
+    Non réentrant : un même thread ne doit pas le reprendre avant de l'avoir rendu.
+
+    Args:
+        shared: Verrou partagé entre lecteurs, exclusif vis-à-vis des écrivains
+            (exclusif sous Windows, msvcrt n'a pas de verrou partagé)
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt n'attend qu'une dizaine de secondes : on réessaie jusqu'à obtenir le verrou
+            while not try_lock(handle):
+                time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            unlock(handle)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversion par lots des valeurs au format français
+Montants ("4 174 M€", "[255,50M€]", "-12,21 M€"), nombres, pourcentages et dates
+("29-04-25") sont convertis d'un coup en tableaux NumPy typés. Chaque valeur
+distincte n'est analysée qu'une fois (les historiques répètent les mêmes libellés),
+avec des motifs compilés une seule fois.
+"""
+
+import re
+import sys
+import time
+from typing import Callable, Iterable, List, Tuple
+
+import numpy as np
+
+# Multiplicateurs des unités de montant (en minuscules, espaces retirés)
+UNITS = {"€": 1.0, "k€": 1e3, "m€": 1e6, "md€": 1e9, "mds€": 1e9, "mrd€": 1e9, "mrds€": 1e9}
+
+# Milliers séparés par une espace (ordinaire, insécable ou fine) ou un point, suivi d'exactement
+# trois chiffres qui terminent le groupe ("4 174 M€", "1 234,56 €", "1.234,5"). Un nombre collé
+# par une espace à d'autres chiffres sans former de groupe ("2024 12,5", "1 2345") est ambigu :
+# aucune correspondance (NaN), jamais une valeur tronquée
+_NUMBER = (r"(?<![\d.,])(?<!\d\s)"
+           r"(?:\d{1,3}(?:\s\d{3})+(?:,\d+)?|\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?)"
+           r"(?![\d.,]\d|\d|\s\d)")
+_SIGN = r"(?P<sign>[-\u2212+])?\s*"
+AMOUNT_RE = re.compile(_SIGN + rf"(?P<number>{_NUMBER})\s*(?P<unit>(?:k|m|mds?|mrds?)?\s*€)?",
+                       re.IGNORECASE)
+PERCENT_RE = re.compile(_SIGN + rf"(?P<number>{_NUMBER})\s*%")
+DATE_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b")
+_SPACES = re.compile(r"\s")
+
+
+def _to_float(number: str, sign: str = None) -> float:
+    """ "4 174" -> 4174.0, "1,33" -> 1.33, "1.234,5" -> 1234.5 """
+    number = _SPACES.sub("", number)
+    if "," in number:
+        number = number.replace(".", "").replace(",", ".")
+    elif number.count(".") > 1:
+        number = number.replace(".", "")
+    value = float(number)
+    return -value if sign in ("-", "\u2212") else value
+
+
+def parse_amount(text: str) -> float:
+    """Montant en euros ("4 174 M€" -> 4.174e9), le premier montant suivi de € prioritaire, NaN sinon"""
+    if not text:
+        return np.nan
+    first = None
+    for match in AMOUNT_RE.finditer(text):
+        if match.group("unit"):
+            unit = _SPACES.sub("", match.group("unit")).lower()
+            return _to_float(match.group("number"), match.group("sign")) * UNITS[unit]
+        if first is None:
+            first = match
+    return _to_float(first.group("number"), first.group("sign")) if first else np.nan
+
+
+def parse_number(text: str) -> float:
+    """Premier nombre du texte ("57 895" -> 57895.0), NaN sinon"""
+    match = AMOUNT_RE.search(text or "")
+    return _to_float(match.group("number"), match.group("sign")) if match else np.nan
+
+
+def parse_percent(text: str) -> float:
+    """Pourcentage ("-2,37 %" -> -2.37), NaN sans signe %"""
+    match = PERCENT_RE.search(text or "")
+    return _to_float(match.group("number"), match.group("sign")) if match else np.nan
+
+
+def parse_date(text: str) -> np.datetime64:
+    """Date jour-mois-année ("29-04-25", "01/12/2024"), NaT si absente ou invalide"""
+    match = DATE_RE.search(text or "")
+    if not match:
+        return np.datetime64("NaT", "D")
+    day, month, year = (int(part) for part in match.groups())
+    if len(match.group(3)) == 2:
+        year += 2000 if year < 70 else 1900
+    try:
+        return np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+def _factorize(values) -> Tuple[List, np.ndarray]:
+    """Valeurs distinctes et index de chaque élément dans cette liste"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in "US":
+        uniques, codes = np.unique(values, return_inverse=True)
+        return uniques.tolist(), codes.reshape(values.shape)
+    values = values if isinstance(values, (list, tuple, np.ndarray)) else list(values)
+    codes = {}
+    index = np.fromiter((codes.setdefault(value, len(codes)) for value in values),
+                        dtype=np.intp, count=len(values))
+    return list(codes), index
+
+
+def _batch(values: Iterable, parse: Callable, dtype) -> np.ndarray:
+    uniques, codes = _factorize(values)
+    parsed = np.array([parse(value) if isinstance(value, str) else parse(None) for value in uniques],
+                      dtype=dtype)
+    return parsed[codes] if len(parsed) else np.empty(codes.shape, dtype=dtype)
+
+
+def parse_amounts(values: Iterable) -> np.ndarray:
+    """Montants en euros (float64, NaN si absent), unités k€, M€ et Md€ appliquées"""
+    return _batch(values, parse_amount, np.float64)
+
+
+def parse_numbers(values: Iterable) -> np.ndarray:
+    """Nombres au format français (float64, NaN si absent)"""
+    return _batch(values, parse_number, np.float64)
+
+
+def parse_percents(values: Iterable) -> np.ndarray:
+    """Pourcentages (float64, NaN sans signe %)"""
+    return _batch(values, parse_percent, np.float64)
+
+
+def parse_dates(values: Iterable) -> np.ndarray:
+    """Dates (datetime64[D], NaT si absente) ; .astype(np.int64) donne les jours depuis 1970"""
+    return _batch(values, parse_date, "datetime64[D]")
+
+
+def benchmark(n: int = 2_000_000, distinct: int = 5000, seed: int = 0) -> dict:
+    """Débit (valeurs par seconde) sur n valeurs tirées parmi `distinct` libellés"""
+    rng = np.random.default_rng(seed)
+    labels = {
+        "montants": [f"{rng.uniform(-50, 5000):,.2f} M€".replace(",", " ").replace(".", ",")
+                     for _ in range(distinct)] + ["-", "[255,50M€]", "4 174 M€"],
+        "pourcentages": [f"{rng.uniform(-10, 100):.2f} %".replace(".", ",") for _ in range(distinct)],
+        "dates": [f"{rng.integers(1, 29):02d}-{rng.integers(1, 13):02d}-{rng.integers(15, 26)}"
+                  for _ in range(distinct)],
+    }
+    parsers = {"montants": parse_amounts, "pourcentages": parse_percents, "dates": parse_dates}
+    rates = {}
+    for name, pool in labels.items():
+        values = [pool[i] for i in rng.integers(0, len(pool), n)]
+        start = time.perf_counter()
+        parsers[name](values)
+        duration = time.perf_counter() - start
+        rates[name] = n / duration
+        print(f"⏱️ {name:<13} {n:,} valeurs en {duration * 1000:.0f} ms : {rates[name] / 1e6:.1f} M valeurs/s")
+    return rates
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark()
+    else:
+        print("Usage: python french_parsing.py --benchmark")
@@ -6,10 +6,27 @@ Utilise les scrapers améliorés avec sélecteurs dynamiques
 Supporte l'extraction de plusieurs SCPI en une seule exécution
 """
 
-from scpi_scraper import scrape_scpi_data
+from scpi_scraper import SCPIScraperConfigurable, scrape_scpi_data, ScrapeDeadlineExceeded
 from config_scraper import scraper_config
+from rate_controller import rate_controller
+from work_queue import QueueWorker, open_queue
+from page_archive import replay_archive
+from scpi_analytics import SnapshotTable, compute_metrics, derive_events, latest_summary
+from scpi_logging import get_logger, setup_logging, flush_logging, pretty_output_enabled
+from scpi_dataclasses import normalize_sections
+from sampling_profiler import SamplingProfiler
+from refresh_scheduler import RefreshScheduler, print_plan
+from driver_startup import startup_stats, warm_standby
+from quarter_backfill import QuarterBackfill, QuarterStore, print_history
+from browser_contexts import pipeline
+from extraction_diff import compare_runs, latest_run
 import sys
 import time
+from collections import deque
+
+import numpy as np
+
+logger = get_logger("main")
 
 # Liste des SCPI à traiter avec leurs identifiants
 SCPI_LIST = [
@@ -19,106 +36,229 @@ SCPI_LIST = [
     {"nom": "LF OPPORTUNITE IMMO", "id": 66}
 ]
 
+def parse_scpi_ids(text: str) -> list:
+    """Liste de SCPI depuis "85,39" ou "1-200" (noms de SCPI_LIST si connus)"""
+    noms = {scpi['id']: scpi['nom'] for scpi in SCPI_LIST}
+    ids = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    if not ids:
+        raise ValueError("aucun identifiant indiqué")
+    return [{"nom": noms.get(produit_id, f"SCPI {produit_id}"), "id": produit_id} for produit_id in ids]
+
+def format_scpi_header(scpi_info, index, total) -> str:
+    """En-tête d'une SCPI (texte multi-lignes)"""
+    return "\n".join([
+        "\n" + "=" * 80,
+        f"� SCPI {index}/{total}: {scpi_info['nom']} (ID: {scpi_info['id']})",
+        "=" * 80,
+    ])
+
 def print_scpi_header(scpi_info, index, total):
     """Affiche l'en-tête pour une SCPI"""
-    print("\n" + "=" * 80)
-    print(f"� SCPI {index}/{total}: {scpi_info['nom']} (ID: {scpi_info['id']})")
-    print("=" * 80)
-
-def print_scpi_results(data):
-    """Affiche les résultats détaillés pour une SCPI"""
-    if not data:
-        return
-
-    # Afficher les informations clés
-    print("\n💰 INFORMATIONS FINANCIÈRES:")
-    print(f"   Prix d'achat: {data.chiffres_cles.prix_part_actuel}€")
-    print(f"   Prix de vente: {data.chiffres_cles.prix_part_vente}€")
-    print(f"   Distribution brute: {data.chiffres_cles.taux_distribution_brut}% ({data.chiffres_cles.dividende_brut_annuel}€/part)")
-    print(f"   Distribution nette: {data.chiffres_cles.taux_distribution_net}% ({data.chiffres_cles.dividende_net_annuel}€/part)")
-    print(f"   Capitalisation: {data.chiffres_cles.capitalisation}")
-
-    print("\n🏢 INFORMATIONS GÉNÉRALES:")
-    print(f"   Nom: {data.general_info.nom}")
-    print(f"   Société de gestion: {data.general_info.societe_gestion}")
-    print(f"   Statut: {data.general_info.statut}")
-    print(f"   Type de capital: {data.general_info.type_capital}")
-    print(f"   Année de création: {data.general_info.annee_creation}")
-
-    print(f"\n📅 DERNIER TRIMESTRE ({data.trimestre_info.trimestre}):")
-    print(f"   Collecte brute: {data.trimestre_info.collecte_brute}")
-    print(f"   Acompte distribué: {data.trimestre_info.acompte_brut}€/part")
-    print(f"   Nombre de cessions: {data.trimestre_info.nb_cessions}")
+    print(format_scpi_header(scpi_info, index, total))
+
+def format_scpi_results(data) -> str:
+    """Rapport détaillé d'une SCPI (texte multi-lignes), sections non extraites omises"""
+    lines = []
+    if data.has_section("chiffres_cles"):
+        lines += [
+            "\n💰 INFORMATIONS FINANCIÈRES:",
+            f"   Prix d'achat: {data.chiffres_cles.prix_part_actuel}€",
+            f"   Prix de vente: {data.chiffres_cles.prix_part_vente}€",
+            f"   Distribution brute: {data.chiffres_cles.taux_distribution_brut}% ({data.chiffres_cles.dividende_brut_annuel}€/part)",
+            f"   Distribution nette: {data.chiffres_cles.taux_distribution_net}% ({data.chiffres_cles.dividende_net_annuel}€/part)",
+            f"   Capitalisation: {data.chiffres_cles.capitalisation}",
+        ]
+
+    if data.has_section("general_info"):
+        lines += [
+            "\n🏢 INFORMATIONS GÉNÉRALES:",
+            f"   Nom: {data.general_info.nom}",
+            f"   Société de gestion: {data.general_info.societe_gestion}",
+            f"   Statut: {data.general_info.statut}",
+            f"   Type de capital: {data.general_info.type_capital}",
+            f"   Année de création: {data.general_info.annee_creation}",
+        ]
+
+    if data.has_section("trimestre_info"):
+        lines += [
+            f"\n📅 DERNIER TRIMESTRE ({data.trimestre_info.trimestre}):",
+            f"   Collecte brute: {data.trimestre_info.collecte_brute}",
+            f"   Acompte distribué: {data.trimestre_info.acompte_brut}€/part",
+            f"   Nombre de cessions: {data.trimestre_info.nb_cessions}",
+        ]
 
     if data.evenements_cles:
-        print("\n🔔 DERNIERS ÉVÉNEMENTS:")
+        lines.append("\n🔔 DERNIERS ÉVÉNEMENTS:")
         for i, event in enumerate(data.evenements_cles[:3], 1):
-            print(f"   {i}. {event.date} - {event.type_evenement}: {event.variation}")
+            lines.append(f"   {i}. {event.date} - {event.type_evenement}: {event.variation}")
 
     if data.actualites:
-        print("\n📰 DERNIÈRES ACTUALITÉS:")
+        lines.append("\n📰 DERNIÈRES ACTUALITÉS:")
         for i, actu in enumerate(data.actualites[:3], 1):
-            print(f"   {i}. {actu.date} - {actu.type_info}")
-            print(f"      {actu.titre[:80]}...")
+            lines.append(f"   {i}. {actu.date} - {actu.type_info}")
+            lines.append(f"      {actu.titre[:80]}...")
+
+    incomplete = [(name, state) for name, state in data.section_status.items() if state != "ok"]
+    if incomplete:
+        lines.append("\n⚠️ SECTIONS INCOMPLÈTES:")
+        for name, state in incomplete:
+            lines.append(f"   {name}: {state} ({data.section_timings.get(name, 0):.2f}s)")
+    return "\n".join(lines)
+
+def print_scpi_results(data):
+    """Affiche les résultats détaillés pour une SCPI (en une seule écriture)"""
+    if not data:
+        return
+    print(format_scpi_results(data))
 
-def extract_multiple_scpi():
-    """Extrait les données de plusieurs SCPI"""
+def log_scpi_results(data):
+    """Rapport détaillé si l'affichage console est actif, sinon une ligne structurée"""
+    if not data:
+        return
+    if pretty_output_enabled():
+        logger.info(format_scpi_results(data))
+    else:
+        logger.info("📊 %s extraite", data.general_info.nom, extra={
+            "produit_id": data.produit_id,
+            "prix_part_actuel": data.chiffres_cles.prix_part_actuel,
+            "prix_part_vente": data.chiffres_cles.prix_part_vente,
+            "taux_distribution_brut": data.chiffres_cles.taux_distribution_brut,
+            "trimestre": data.trimestre_info.trimestre,
+            "sections": data.section_status,
+        })
+
+def print_latency_report(durations):
+    """Affiche la distribution des durées par SCPI (p50/p95/p99/max)"""
+    if not durations:
+        return
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+    print(f"⏱️  Latence par SCPI ({len(durations)} essais): p50 {p50:.2f}s | p95 {p95:.2f}s | "
+          f"p99 {p99:.2f}s | max {max(durations):.2f}s")
+
+def print_startup_report():
+    """Affiche le délai jusqu'à la première navigation et le coût des lancements de Chrome"""
+    report = startup_stats.report()
+    if report:
+        print(report)
+
+def extract_multiple_scpi(sections=None, scpi_list=None):
+    """
+    Extrait les données de plusieurs SCPI
+
+    Args:
+        sections: Sections à extraire (None = toutes)
+        scpi_list: SCPI à traiter (par défaut SCPI_LIST)
+    """
+    scpi_list = scpi_list or SCPI_LIST
     start_time = time.time()
+    # Chrome démarre pendant l'affichage des bannières
+    warm_standby.prewarm()
 
-    print("🚀 EXTRACTION DES DONNÉES SCPI - MODE MULTIPLE")
-    print("=" * 80)
+    logger.info("🚀 EXTRACTION DES DONNÉES SCPI - MODE MULTIPLE\n%s", "=" * 80)
 
     # Affichage du mode d'affichage
     mode_display = "🚫 Mode headless (fenêtre cachée)" if scraper_config.is_headless() else "👁️ Mode visible (fenêtre affichée)"
-    print(f"🖥️ {mode_display}")
-    print("   💡 Pour changer: python config_scraper.py --visible ou --headless")
+    logger.info("🖥️ %s\n   💡 Pour changer: python config_scraper.py --visible ou --headless", mode_display)
 
-    print(f"\n📋 {len(SCPI_LIST)} SCPI à traiter:")
-    for scpi in SCPI_LIST:
-        print(f"   • {scpi['nom']} (ID: {scpi['id']})")
+    logger.info("\n📋 %s SCPI à traiter:\n%s", len(scpi_list),
+                "\n".join(f"   • {scpi['nom']} (ID: {scpi['id']})" for scpi in scpi_list))
 
     results = {}
     successful_extractions = 0
     failed_extractions = 0
+    durations = []
+    deadline_retries = scraper_config.get("deadline_retries", 1)
 
-    for index, scpi_info in enumerate(SCPI_LIST, 1):
-        print_scpi_header(scpi_info, index, len(SCPI_LIST))
-
-        try:
-            print(f"🔍 Extraction en cours...")
+    # Pipeline : un seul Chrome charge les SCPI suivantes en arrière-plan pendant l'analyse et l'affichage
+    pipeline_depth = scraper_config.get("pipeline_depth", 1)
+    pool = pipeline(pipeline_depth) if pipeline_depth > 1 else None
+    futures = {scpi['id']: pool.submit(scpi['id'], sections) for scpi in scpi_list} if pool else {}
+    if pool:
+        logger.info("🔀 Pipeline de %s SCPI dans un seul Chrome", pipeline_depth)
+    scraper = None  # Sans pipeline : un seul Chrome (le préchauffé) pour toute la liste
 
-            # Extraire les données pour cette SCPI
-            data = scrape_scpi_data(scpi_info['id'])
-
-            if data:
-                print_scpi_results(data)
-                results[scpi_info['nom']] = data
-                successful_extractions += 1
-                print(f"\n✅ Extraction réussie pour {scpi_info['nom']}")
-            else:
-                print(f"\n❌ Aucune donnée extraite pour {scpi_info['nom']}")
+    try:
+        # Une SCPI dont le délai est dépassé repasse en fin de liste
+        pending = deque((index, scpi_info, 0) for index, scpi_info in enumerate(scpi_list, 1))
+        while pending:
+            index, scpi_info, retries = pending.popleft()
+            if pretty_output_enabled():
+                logger.info(format_scpi_header(scpi_info, index, len(scpi_list)))
+            log_fields = {"produit_id": scpi_info['id']}
+
+            scpi_start = time.time()
+            future = None
+            try:
+                logger.info("🔍 Extraction en cours...", extra=log_fields)
+
+                # Extraire les données pour cette SCPI
+                try:
+                    if pool:
+                        future = futures.pop(scpi_info['id'])
+                        data = future.result()
+                    else:
+                        if scraper is None:
+                            scraper = warm_standby.take() or SCPIScraperConfigurable()
+                        data = scraper.scrape_scpi(scpi_info['id'], sections=sections)
+                finally:
+                    # Pipeline : l'attente de .result() ne mesure pas la SCPI (chargée pendant
+                    # l'affichage des précédentes), sa durée propre est notée par le pool
+                    duration = pool.duration(future) if future is not None else None
+                    durations.append(duration if duration is not None else time.time() - scpi_start)
+                    log_fields["duree"] = round(durations[-1], 3)
+
+                if data:
+                    log_scpi_results(data)
+                    results[scpi_info['nom']] = data
+                    successful_extractions += 1
+                    logger.info("\n✅ Extraction réussie pour %s", scpi_info['nom'], extra=log_fields)
+                else:
+                    logger.error("\n❌ Aucune donnée extraite pour %s", scpi_info['nom'], extra=log_fields)
+                    failed_extractions += 1
+
+            except ScrapeDeadlineExceeded as e:
+                if retries < deadline_retries:
+                    logger.warning("\n⏳ Délai dépassé pour %s (%s), SCPI remise en fin de liste",
+                                   scpi_info['nom'], e, extra=log_fields)
+                    pending.append((index, scpi_info, retries + 1))
+                    if pool:
+                        futures[scpi_info['id']] = pool.submit(scpi_info['id'], sections)
+                else:
+                    logger.error("\n❌ Délai dépassé pour %s:\n   %s", scpi_info['nom'], e, extra=log_fields)
+                    failed_extractions += 1
+            except Exception as e:
+                logger.error("\n❌ ERREUR lors de l'extraction de %s:\n   %s", scpi_info['nom'], e, extra=log_fields)
                 failed_extractions += 1
-
-        except Exception as e:
-            print(f"\n❌ ERREUR lors de l'extraction de {scpi_info['nom']}:")
-            print(f"   {str(e)}")
-            failed_extractions += 1
-
-        # Pause entre les extractions pour éviter la surcharge
-        if index < len(SCPI_LIST):
-            print("\n⏳ Pause de 2 secondes avant la prochaine extraction...")
-            time.sleep(2)
+                if scraper is not None:
+                    # Chrome peut être dans un état inconnu : un nouveau démarre en arrière-plan
+                    # pendant l'affichage de l'erreur, pour la SCPI suivante
+                    scraper.close()
+                    scraper = None
+                    if pending:
+                        warm_standby.prewarm()
+    finally:
+        if pool:
+            pool.close()
+        if scraper is not None:
+            scraper.close()
 
     # Résumé final
     end_time = time.time()
     duration = end_time - start_time
 
+    flush_logging()
     print("\n" + "=" * 80)
     print("📈 RÉSUMÉ DE L'EXTRACTION MULTIPLE")
     print("=" * 80)
-    print(f"✅ Extractions réussies: {successful_extractions}/{len(SCPI_LIST)}")
-    print(f"❌ Extractions échouées: {failed_extractions}/{len(SCPI_LIST)}")
+    print(f"✅ Extractions réussies: {successful_extractions}/{len(scpi_list)}")
+    print(f"❌ Extractions échouées: {failed_extractions}/{len(scpi_list)}")
     print(f"⏱️  Temps total d'exécution: {duration:.2f} secondes")
+    print_latency_report(durations)
+    print_startup_report()
+    rate_controller.print_summary()
 
     if results:
         print("\n💼 COMPARAISON RAPIDE:")
@@ -133,17 +273,17 @@ def extract_multiple_scpi():
 
     return results
 
-def main():
-    """Fonction principale d'extraction - SCPI unique"""
+def main(sections=None):
+    """Fonction principale d'extraction - SCPI unique (sections: sections à extraire, None = toutes)"""
     start_time = time.time()
+    # L'extraction est certaine : Chrome démarre pendant l'analyse des arguments et les bannières
+    warm_standby.prewarm()
 
-    print("🚀 EXTRACTION DES DONNÉES SCPI - MODE UNIQUE")
-    print("=" * 50)
+    logger.info("🚀 EXTRACTION DES DONNÉES SCPI - MODE UNIQUE\n%s", "=" * 50)
 
     # Affichage du mode d'affichage
     mode_display = "🚫 Mode headless (fenêtre cachée)" if scraper_config.is_headless() else "👁️ Mode visible (fenêtre affichée)"
-    print(f"🖥️ {mode_display}")
-    print("   💡 Pour changer: python config_scraper.py --visible ou --headless")
+    logger.info("🖥️ %s\n   💡 Pour changer: python config_scraper.py --visible ou --headless", mode_display)
 
     # ID de la SCPI à extraire (par défaut PFO2)
     scpi_id = 85
@@ -152,78 +292,279 @@ def main():
     if len(sys.argv) > 1:
         try:
             scpi_id = int(sys.argv[1])
-            print(f"📋 SCPI ID spécifié: {scpi_id}")
+            logger.info("📋 SCPI ID spécifié: %s", scpi_id)
         except ValueError:
-            print("⚠️ ID invalide, utilisation de l'ID par défaut (85)")
+            logger.warning("⚠️ ID invalide, utilisation de l'ID par défaut (85)")
 
     try:
-        print(f"\n🔍 Extraction des données pour la SCPI ID {scpi_id}...")
+        logger.info("\n🔍 Extraction des données pour la SCPI ID %s...", scpi_id)
 
         # Utiliser le scraper optimisé
-        data = scrape_scpi_data(scpi_id)
+        data = scrape_scpi_data(scpi_id, sections=sections)
 
         # Afficher les résultats
-        print("\n" + "=" * 50)
-        print("📊 RÉSULTATS DE L'EXTRACTION")
-        print("=" * 50)
-
-        data.print_summary()
-        print_scpi_results(data)
+        if pretty_output_enabled():
+            flush_logging()
+            print("\n" + "=" * 50)
+            print("📊 RÉSULTATS DE L'EXTRACTION")
+            print("=" * 50)
+            data.print_summary()
+        log_scpi_results(data)
 
-        print("\n✅ Extraction terminée avec succès!")
+        logger.info("\n✅ Extraction terminée avec succès!")
 
         return data
 
     except Exception as e:
-        print("\n❌ ERREUR lors de l'extraction:")
-        print(f"   {str(e)}")
+        logger.error("\n❌ ERREUR lors de l'extraction:\n   %s", e, extra={"produit_id": scpi_id})
         return None
     finally:
         end_time = time.time()
         duration = end_time - start_time
+        flush_logging()
         print(f"\n⏱️  Temps d'exécution: {duration:.2f} secondes.")
+        print_startup_report()
 
 def extraction_rapide():
-    """Extraction rapide avec affichage minimal"""
+    """Extraction rapide avec affichage minimal : une seule page, chiffres clés uniquement"""
     start_time = time.time()
+    warm_standby.prewarm()
     try:
-        data = scrape_scpi_data(39)
+        data = scrape_scpi_data(39, sections=["chiffres_cles"])
+        flush_logging()
         print(f"EPARGNE FONCIERE - Prix: {data.chiffres_cles.prix_part_actuel}€ - Distribution: {data.chiffres_cles.taux_distribution_brut}%")
         return data
     except Exception as e:
-        print(f"Erreur: {e}")
+        logger.error("Erreur: %s", e)
         return None
     finally:
         end_time = time.time()
         duration = end_time - start_time
+        flush_logging()
         print(f"⏱️  Temps d'exécution (rapide): {duration:.2f} secondes.")
+        print_startup_report()
+
+def enqueue_scpi_list(queue_path=None, sections=None):
+    """Ajoute les SCPI configurées à la file de travail distribuée (sections: extraites par les workers)"""
+    queue = open_queue(queue_path)
+    queued = queue.enqueue((scpi['id'] for scpi in SCPI_LIST), sections)
+    print(f"📥 {queued} SCPI mises en file dans {queue.path}")
+    print(f"📊 État de la file: {queue.stats()}")
+    return queued
+
+def schedule_refresh(queue_path=None, sections=None):
+    """Met en file les SCPI configurées les plus probablement modifiées, dans le budget configuré"""
+    queue = open_queue(queue_path)
+    scheduler = RefreshScheduler.from_config().fit(queue.results(latest_only=False))
+    plan = scheduler.plan((scpi['id'] for scpi in SCPI_LIST),
+                          max_requests=scraper_config.get("refresh_budget_requests"),
+                          max_seconds=scraper_config.get("refresh_budget_seconds"),
+                          sections=sections, durations=queue.durations())
+    print("📅 PLANIFICATION DES RAFRAÎCHISSEMENTS")
+    print("=" * 80)
+    print_plan(plan)
+    # Les sections voyagent avec les tâches : les workers chargent exactement les pages planifiées
+    queued = queue.enqueue(plan.produit_ids, sections)
+    print(f"📥 {queued} SCPI mises en file dans {queue.path}")
+    return plan
+
+def backfill_history(store_path=None):
+    """Complète l'historique trimestriel des SCPI configurées (trimestres déjà stockés ignorés)"""
+    print("📚 REPRISE DE L'HISTORIQUE TRIMESTRIEL")
+    print("=" * 80)
+    store = QuarterStore(store_path)
+    report = QuarterBackfill(store).run(scpi['id'] for scpi in SCPI_LIST)
+    flush_logging()
+    for scpi in SCPI_LIST:
+        print_history(scpi['id'], store.history(scpi['id']))
+    print(f"\n{report.summary()}")
+    for produit_id, trimestre, error in report.failures:
+        print(f"   ❌ SCPI {produit_id} {trimestre or 'historique'}: {error}")
+    rate_controller.print_summary()
+    store.close()
+    return report
+
+def run_worker(queue_path=None):
+    """Mode worker : traite la file partagée jusqu'à ce qu'elle soit vide"""
+    start_time = time.time()
+    queue = open_queue(queue_path)
+    if queue.stats()["pending"]:
+        warm_standby.prewarm()
+
+    logger.info("🚀 EXTRACTION DES DONNÉES SCPI - MODE WORKER\n%s", "=" * 50)
+    logger.info("🗄️ File de travail: %s", queue.path)
+
+    worker = QueueWorker(queue)
+    processed = worker.run()
+
+    duration = time.time() - start_time
+    flush_logging()
+    print(f"\n✅ {processed} SCPI extraites par {worker.worker_id}")
+    print(f"📊 État de la file: {queue.stats()}")
+    print(f"⏱️  Temps d'exécution: {duration:.2f} secondes.")
+    print_latency_report(worker.durations)
+    print_startup_report()
+    return processed
+
+def _format(value) -> str:
+    """Cellule d'un tableau ("-" si la valeur manque)"""
+    return "-" if value is None else str(value)
+
+def replay_history(archive_path=None):
+    """Rejoue les extracteurs sur l'archive de pages (sans navigateur ni réseau)"""
+    start_time = time.time()
+
+    print("🚀 EXTRACTION DES DONNÉES SCPI - MODE REJEU")
+    print("=" * 80)
+
+    results = replay_archive(archive_path)
+    flush_logging()
+
+    print(f"{'ID':<6} {'Date':<18} {'SCPI':<25} {'Prix Achat':<12} {'Distrib. Brute':<15}")
+    print("-" * 80)
+    for data in results:
+        # Une page incomplète laisse des champs à None (ou la section non extraite) : "-" au lieu d'une erreur
+        taux = data.chiffres_cles.taux_distribution_brut
+        print(f"{_format(data.produit_id):<6} {data.date_extraction.strftime('%d/%m/%Y %H:%M'):<18} "
+              f"{(data.general_info.nom or '-')[:24]:<25} {_format(data.chiffres_cles.prix_part_actuel):<12} "
+              f"{_format(taux)}{'%' if taux is not None else ''}")
+
+    duration = time.time() - start_time
+    print(f"\n✅ {len(results)} extractions rejouées en {duration:.2f} secondes")
+    return results
+
+def analyse_history(queue_path=None):
+    """Indicateurs et événements clés calculés sur l'historique des extractions"""
+    queue = open_queue(queue_path)
+    history = queue.results(latest_only=False)
+    if not history:
+        print("❌ Aucun historique dans la file de travail")
+        return None
+
+    grid = SnapshotTable.from_scpi_data(history).to_grid()
+    metrics = compute_metrics(grid)
+    events = derive_events(grid, metrics)
+
+    print("📊 ANALYSE DE L'HISTORIQUE SCPI")
+    print("=" * 80)
+    print(f"{'ID':<6} {'Rdt 4T':<10} {'Var. prix':<12} {'Décote':<10} {'Tendance acompte':<18}")
+    print("-" * 80)
+    for summary in latest_summary(grid, metrics):
+        print(f"{summary['produit_id']:<6} {summary['rendement_4t']:<10.2f} {summary['variation_prix']:<12.2f} "
+              f"{summary['decote_reconstitution']:<10.2f} {summary['tendance_acompte']:<18.3f}")
+
+    for produit_id, items in events.items():
+        if items:
+            print(f"\n🔔 ÉVÉNEMENTS SCPI {produit_id}:")
+            for i, event in enumerate(items[:3], 1):
+                print(f"   {i}. {event.date} - {event.type_evenement}: {event.variation}")
+    return metrics
+
+def diff_runs(queue_path=None):
+    """Changements des SCPI extraites lors de la dernière exécution (jour de la dernière extraction)"""
+    queue = open_queue(queue_path)
+    report = compare_runs(*latest_run(queue))
+    print("🔎 CHANGEMENTS DEPUIS L'EXTRACTION PRÉCÉDENTE")
+    print("=" * 80)
+    print(report.format())
+    return report
 
 if __name__ == "__main__":
-    # Vérifier les arguments de ligne de commande
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--quick":
-            extraction_rapide()
-        elif sys.argv[1] == "--multiple" or sys.argv[1] == "--multi":
-            extract_multiple_scpi()
-        elif sys.argv[1] == "--help" or sys.argv[1] == "-h":
-            print("🚀 SCPI SCRAPER - MODES D'UTILISATION")
-            print("=" * 50)
-            print("python main.py                    # Mode unique (SCPI par défaut ou ID spécifié)")
-            print("python main.py [ID]               # Mode unique avec ID spécifique")
-            print("python main.py --multiple         # Mode multiple (toutes les SCPI configurées)")
-            print("python main.py --multi            # Alias pour --multiple")
-            print("python main.py --quick            # Mode rapide (EPARGNE FONCIERE uniquement)")
-            print("python main.py --help             # Affiche cette aide")
-            print("\n📋 SCPI configurées pour le mode multiple:")
-            for scpi in SCPI_LIST:
-                print(f"   • {scpi['nom']} (ID: {scpi['id']})")
+    # Mode silencieux (lots et démons) : avertissements, erreurs et résumé final seulement
+    quiet = "--quiet" in sys.argv
+    if quiet:
+        sys.argv.remove("--quiet")
+    setup_logging(quiet=True if quiet else None)
+
+    # Sections à extraire (ex: --sections chiffres_cles,trimestre_info)
+    sections = None
+    if "--sections" in sys.argv:
+        index = sys.argv.index("--sections")
+        try:
+            sections = normalize_sections(sys.argv[index + 1] if index + 1 < len(sys.argv) else "")
+            if not sections:
+                raise ValueError("aucune section indiquée")
+        except ValueError as e:
+            print(f"❌ Option --sections invalide: {e}")
+            sys.exit(1)
+        del sys.argv[index:index + 2]
+
+    # SCPI du mode multiple (ex: --ids 85,39 ou --ids 1-200), SCPI_LIST par défaut
+    scpi_list = None
+    if "--ids" in sys.argv:
+        index = sys.argv.index("--ids")
+        try:
+            scpi_list = parse_scpi_ids(sys.argv[index + 1] if index + 1 < len(sys.argv) else "")
+        except ValueError as e:
+            print(f"❌ Option --ids invalide: {e}")
+            sys.exit(1)
+        del sys.argv[index:index + 2]
+
+    # Profil par échantillonnage de toute l'exécution (piles repliées + résumé)
+    profiler = None
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+        profiler = SamplingProfiler.from_config().start()
+
+    try:
+        # Vérifier les arguments de ligne de commande
+        if len(sys.argv) > 1:
+            if sys.argv[1] == "--quick":
+                extraction_rapide()
+            elif sys.argv[1] == "--multiple" or sys.argv[1] == "--multi":
+                extract_multiple_scpi(sections, scpi_list)
+            elif sys.argv[1] == "--enqueue":
+                enqueue_scpi_list(sys.argv[2] if len(sys.argv) > 2 else None, sections)
+            elif sys.argv[1] == "--schedule":
+                schedule_refresh(sys.argv[2] if len(sys.argv) > 2 else None, sections)
+            elif sys.argv[1] == "--backfill":
+                backfill_history(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif sys.argv[1] == "--worker":
+                run_worker(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif sys.argv[1] == "--replay":
+                replay_history(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif sys.argv[1] == "--analytics":
+                analyse_history(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif sys.argv[1] == "--diff":
+                diff_runs(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif sys.argv[1] == "--help" or sys.argv[1] == "-h":
+                print("🚀 SCPI SCRAPER - MODES D'UTILISATION")
+                print("=" * 50)
+                print("python main.py                    # Mode unique (SCPI par défaut ou ID spécifié)")
+                print("python main.py [ID]               # Mode unique avec ID spécifique")
+                print("python main.py --multiple         # Mode multiple (toutes les SCPI configurées)")
+                print("python main.py --multi            # Alias pour --multiple")
+                print("python main.py --quick            # Mode rapide (EPARGNE FONCIERE uniquement)")
+                print("python main.py --enqueue [DB]     # Ajoute les SCPI configurées à la file distribuée")
+                print("python main.py --schedule [DB]    # Met en file les SCPI probablement modifiées (budget)")
+                print("python main.py --backfill [DB]    # Historique trimestriel complet (trimestres manquants)")
+                print("python main.py --worker [DB]      # Mode worker (plusieurs machines sur la même file)")
+                print("python main.py --replay [ARCHIVE] # Rejoue les extracteurs sur les pages archivées")
+                print("python main.py --analytics [DB]   # Indicateurs et événements sur l'historique de la file")
+                print("python main.py --diff [DB]        # Changements depuis l'extraction précédente de chaque SCPI")
+                print("python main.py ... --sections S   # Sections à extraire (ex: chiffres_cles,trimestre_info)")
+                print("python main.py --multiple --ids I # SCPI à traiter (ex: 85,39 ou 1-200)")
+                print("python main.py ... --profile      # Profil par échantillonnage (flamegraph + résumé)")
+                print("python main.py ... --quiet        # Mode silencieux (avertissements, erreurs et résumé)")
+                print("python main.py --help             # Affiche cette aide")
+                print("\n📋 SCPI configurées pour le mode multiple:")
+                for scpi in SCPI_LIST:
+                    print(f"   • {scpi['nom']} (ID: {scpi['id']})")
+            else:
+                # Essayer de parser comme un ID de SCPI
+                try:
+                    scpi_id = int(sys.argv[1])
+                    main(sections)
+                except ValueError:
+                    print("❌ Argument invalide. Utilisez --help pour voir les options disponibles.")
         else:
-            # Essayer de parser comme un ID de SCPI
-            try:
-                scpi_id = int(sys.argv[1])
-                main()
-            except ValueError:
-                print("❌ Argument invalide. Utilisez --help pour voir les options disponibles.")
-    else:
-        # Mode par défaut : extraction unique
-        main()
\ No newline at end of file
+            # Mode par défaut : extraction unique
+            main(sections)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            folded_path, summary_path = profiler.write()
+            flush_logging()
+            print("\n" + profiler.summary())
+            print(f"\n🔥 Piles repliées (flamegraph): {folded_path}")
+            print(f"📄 Résumé: {summary_path}")
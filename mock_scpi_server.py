@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur scpi-lab synthétique pour les tests de charge
+Génère à la volée la page principale, la page informations, les vues trimestrielles
+et l'API JSON des graphiques de milliers de SCPI fictives (données déterministes par
+produit_id), avec latence, taux d'erreur et taille de page configurables
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SOCIETES = ["AMUNDI IMMOBILIER", "LA FRANCAISE REIM", "PRIMONIAL REIM", "PERIAL AM", "SOFIDY", "CORUM AM"]
+SECTEURS = ["Bureaux", "Commerces", "Santé", "Logistique", "Hôtellerie", "Résidentiel"]
+REGIONS = ["Ile-de-France", "Régions", "Europe"]
+TYPES_INFO = ["DISTRIBUTION", "VALORISATION", "SOUSCRIPTION", "BILAN"]
+TYPES_EVENEMENT = ["Dividende", "Prix de part", "Reconstitution"]
+
+INFO_PATH = re.compile(r"^/scpi/scpi-[\w\-]+-(\d+)/information/?$")
+CHARTS_PATH = re.compile(r"^/api/scpi/(\d+)/repartitions$")
+
+
+def _fr(value: float, decimals: int = 2) -> str:
+    """Format français : espace pour les milliers, virgule décimale"""
+    return f"{value:,.{decimals}f}".replace(",", " ").replace(".", ",")
+
+
+def repartitions(produit_id: int) -> dict:
+    """Répartitions sectorielle et géographique (en %), servies en JSON aux graphiques de la page"""
+    rng = random.Random(f"repartitions-{produit_id}")
+
+    def weights(labels):
+        drawn = [rng.random() for _ in labels]
+        return {label: round(100 * w / sum(drawn), 1) for label, w in zip(labels, drawn)}
+
+    return {"sectorielle": weights(rng.sample(SECTEURS, 3)), "geographique": weights(REGIONS)}
+
+
+def repartitions_json(produit_id: int) -> str:
+    """Réponse de l'API des graphiques (format Highcharts)"""
+    charts = [
+        {"id": f"repartition-{kind}", "title": f"Répartition {kind}",
+         "series": [{"type": "pie", "data": [{"name": label, "y": value} for label, value in values.items()]}]}
+        for kind, values in repartitions(produit_id).items()
+    ]
+    return json.dumps({"produit_id": produit_id, "charts": charts}, ensure_ascii=False)
+
+
+def _repartition(values: dict) -> str:
+    """Légende du graphique telle qu'affichée ("Bureaux 71,0 % Commerces 20,5 %")"""
+    return " ".join(f"{label} {_fr(value, 1)} %" for label, value in values.items())
+
+
+def scpi_nom(produit_id: int) -> str:
+    """Nom de la SCPI fictive (détermine l'URL de la page informations)"""
+    return f"SYNTHETIQUE {produit_id}"
+
+
+def _padding(size: int) -> str:
+    """Scripts et menus de remplissage, comme le gabarit du vrai site"""
+    block = ('<li class="menu-item"><a href="/scpi/comparateur">Comparateur de SCPI</a></li>\n'
+             '<script>window.dataLayer = window.dataLayer || []; dataLayer.push({"event": "page"});</script>\n')
+    return block * max(0, size // len(block))
+
+
+def _profil(rng: random.Random):
+    """Prix de part, taux de distribution et dernier trimestre publié"""
+    prix = rng.choice([200, 250, 500, 670, 1000, 1050]) * rng.uniform(0.9, 1.1)
+    taux = rng.uniform(3.0, 7.5)
+    trimestre = f"T{rng.randint(1, 4)} {rng.randint(2022, 2025)}"
+    return prix, taux, trimestre
+
+
+def quarter_history(produit_id: int) -> list:
+    """Trimestres publiés de la SCPI fictive, du plus ancien au dernier ("T3-2021", ...)"""
+    _, _, last = _profil(random.Random(produit_id))
+    last_key = int(last[3:]) * 4 + int(last[1]) - 1
+    count = random.Random(f"trimestres-{produit_id}").randint(4, 24)
+    return [f"T{key % 4 + 1}-{key // 4}" for key in range(last_key - count + 1, last_key + 1)]
+
+
+def _trimestre_items(rng: random.Random, prix: float, taux: float) -> str:
+    """Collecte, transactions, acompte et liquidité d'un trimestre"""
+    return f"""    <li>Collecte brute : {_fr(rng.uniform(0, 200))} M€</li>
+    <li>Collecte nette : {_fr(rng.uniform(-20, 150))} M€</li>
+    <li>Acquisitions : {rng.randint(0, 10)} ({_fr(rng.uniform(0, 300))} M€)</li>
+    <li>Cessions : {rng.randint(0, 10)} ({_fr(rng.uniform(0, 100))} M€)</li>
+    <li>Acompte brut : {_fr(prix * taux / 400)} €/part</li>
+    <li>Délai de cession : {rng.choice(["-", "1 mois", "3 mois"])}</li>
+    <li>Liste d'attente : {rng.choice(["-", f"[{_fr(rng.uniform(0, 300))}M€]"])}</li>"""
+
+
+def main_page(produit_id: int, page_size: int = 0) -> str:
+    """Page principale (chiffres clés, informations générales, dernier trimestre)"""
+    rng = random.Random(produit_id)
+    prix, taux, trimestre = _profil(rng)
+    rows = [
+        ("Société de gestion", rng.choice(SOCIETES)),
+        ("Statut", rng.choice(["Ouverte", "Fermée"])),
+        ("Type de capital", rng.choice(["CAPITAL VARIABLE", "CAPITAL FIXE"])),
+        ("Typologie", rng.choice(SECTEURS)),
+        ("Localisation", f"{rng.choice(REGIONS)} - {_fr(rng.uniform(20, 90))} %"),
+        ("Capitalisation", f"{_fr(rng.uniform(50, 5000), 0)} M€"),
+        ("Nombre d'associés", _fr(rng.randint(500, 100000), 0)),
+        ("Prix de part", f"{_fr(prix)} €"),
+        ("Retrait au", f"{_fr(prix * 0.9)} €"),
+        ("Date du prix de part", f"01-{rng.randint(1, 12):02d}-{rng.randint(2020, 2025)}"),
+        ("Dividende brut", f"{_fr(prix * taux / 100)} €"),
+        ("Taux de distribution", f"{_fr(taux)} %"),
+        ("Dividende net", f"{_fr(prix * taux * 0.95 / 100)} €"),
+        ("Taux de distribution net", f"{_fr(taux * 0.95)} %"),
+        ("Report à nouveau", f"{_fr(rng.uniform(0, 30))} € ({_fr(rng.uniform(0, 5))} %)"),
+        ("Valeur de reconstitution", f"{_fr(prix * rng.uniform(0.85, 1.15))} €"),
+        ("Prix / Reconstitution", f"{_fr(rng.uniform(-15, 10))} %"),
+        ("Nombre d'immeubles", str(rng.randint(5, 500))),
+        ("Surface totale", f"{_fr(rng.randint(5000, 2000000), 0)} m²"),
+        ("Répartition sectorielle", _repartition(repartitions(produit_id)["sectorielle"])),
+        ("Répartition géographique", _repartition(repartitions(produit_id)["geographique"])),
+        ("Ratio d'engagement", f"{_fr(rng.uniform(0, 40))} %"),
+        ("TOF ASPIM", f"{_fr(rng.uniform(80, 100))} %"),
+        ("TOF exploitation", f"{_fr(rng.uniform(80, 100))} %"),
+        ("Agrément AMF", f"SCPI {rng.randint(0, 99):02d}-{rng.randint(1, 40):02d}"),
+        ("Téléphone", f"01 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}"),
+        ("Email", f"contact-{produit_id}@scpi-synthetique.test"),
+    ]
+    table = "\n".join(f"<tr><td>{label}</td><td>{value}</td></tr>" for label, value in rows)
+    evenements = []
+    for _ in range(rng.randint(1, 4)):
+        avant = prix * rng.uniform(0.01, 1.2)
+        apres = avant * rng.uniform(0.8, 1.1)
+        variation = _fr((apres / avant - 1) * 100) + "%"
+        evenements.append(
+            f"<tr><td>{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(22, 25)}</td>"
+            f"<td>{rng.choice(TYPES_EVENEMENT)}</td><td>{'Hausse' if apres > avant else 'Baisse'} : {variation}</td>"
+            f"<td>{_fr(avant)} €/part</td><td>{_fr(apres)} €/part</td><td>{variation}</td></tr>")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>SCPI {scpi_nom(produit_id)} - scpi-lab</title></head>
+<body>
+  <nav><ul>{_padding(page_size)}</ul></nav>
+  <h1>SCPI {scpi_nom(produit_id)}</h1>
+  <script>fetch("/api/scpi/{produit_id}/repartitions").then(r => r.json()).then(drawCharts);</script>
+  <table class="chiffres-cles">
+{table}
+  </table>
+  <dl><dt>Année de création</dt><dd>Créée en {rng.randint(1970, 2022)}</dd></dl>
+  <h2>Dernier trimestre : {trimestre}</h2>
+  <ul>
+{_trimestre_items(rng, prix, taux)}
+  </ul>
+  <form class="historique"><select name="trimestre">
+{chr(10).join(f'<option>{q.replace("-", " ")}</option>' for q in reversed(quarter_history(produit_id)))}
+  </select></form>
+  <h2>Événements clés</h2>
+  <table class="evenements">
+{chr(10).join(evenements)}
+  </table>
+</body></html>
+"""
+
+
+def information_page(produit_id: int, page_size: int = 0) -> str:
+    """Page informations (actualités et bulletins trimestriels)"""
+    rng = random.Random(-produit_id)
+    nom = scpi_nom(produit_id)
+    rows = []
+    for _ in range(rng.randint(3, 12)):
+        date = f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(22, 25)}"
+        type_info = rng.choice(TYPES_INFO)
+        titre = f"{nom} - Bulletin d'information trimestriel du T{rng.randint(1, 4)} 20{rng.randint(22, 25)}"
+        rows.append(f"<tr><td>{date}</td><td>{type_info}</td><td>{titre}</td>"
+                    f"<td>Acompte de {_fr(rng.uniform(1, 15))} €/part</td></tr>")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>SCPI {nom} - Informations - scpi-lab</title></head>
+<body>
+  <nav><ul>{_padding(page_size)}</ul></nav>
+  <h1>SCPI {nom}</h1>
+  <table class="actualites">
+{chr(10).join(rows)}
+  </table>
+</body></html>
+"""
+
+
+def quarter_page(produit_id: int, trimestre: str, page_size: int = 0) -> str:
+    """Vue d'un trimestre passé ("T2-2023"), données déterministes par SCPI et trimestre"""
+    prix, taux, _ = _profil(random.Random(produit_id))
+    rng = random.Random(f"{produit_id}-{trimestre}")
+    taux *= rng.uniform(0.8, 1.2)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>SCPI {scpi_nom(produit_id)} - {trimestre} - scpi-lab</title></head>
+<body>
+  <nav><ul>{_padding(page_size)}</ul></nav>
+  <h1>SCPI {scpi_nom(produit_id)}</h1>
+  <h2>Trimestre : {trimestre.replace("-", " ")}</h2>
+  <ul>
+{_trimestre_items(rng, prix, taux)}
+    <li>TOF ASPIM : {_fr(rng.uniform(80, 100))} %</li>
+  </ul>
+</body></html>
+"""
+
+
+class MockSCPIServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread avec compteurs de requêtes"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, page_size: int = 0, count: int = 10000):
+        """
+        Args:
+            address: (hôte, port), port 0 = port libre
+            latency: Latence moyenne de réponse (secondes)
+            jitter: Écart type de la latence (loi log-normale, queue de distribution réaliste)
+            error_rate: Proportion de réponses en erreur (moitié 500, moitié 429)
+            page_size: Octets de remplissage ajoutés à chaque page
+            count: Nombre de SCPI existantes (produit_id de 1 à count)
+        """
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.count = count
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self):
+        """Tire la latence et l'éventuelle erreur d'une requête"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency
+            if self.jitter > 0 and self.latency > 0:
+                # mu = -sigma²/2 : la moyenne reste égale à latency
+                delay = self._rng.lognormvariate(-self.jitter ** 2 / 2, self.jitter) * self.latency
+            error = None
+            if self._rng.random() < self.error_rate:
+                error = self._rng.choice([500, 429])
+                self.errors += 1
+        return delay, error
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockSCPIServer
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        content_type = "text/html; charset=utf-8"
+        delay, error = self.server.draw()
+        if delay:
+            time.sleep(delay)
+
+        if url.path == "/scpi.php":
+            query = parse_qs(url.query)
+            produit_id = query.get("produit_id", ["0"])[0]
+            page = main_page
+            if query.get("vue") == ["trimestre"]:
+                trimestre = query.get("trimestre", [""])[0]
+                page = None
+                if produit_id.isdigit() and trimestre in quarter_history(int(produit_id)):
+                    page = lambda produit_id, page_size: quarter_page(produit_id, trimestre, page_size)
+        elif CHARTS_PATH.match(url.path):
+            produit_id = CHARTS_PATH.match(url.path).group(1)
+            page = lambda produit_id, page_size: repartitions_json(produit_id)
+            content_type = "application/json; charset=utf-8"
+        else:
+            match = INFO_PATH.match(url.path)
+            produit_id = match.group(1) if match else "0"
+            page = information_page if match else None
+
+        produit_id = int(produit_id) if produit_id.isdigit() else 0
+        if error == 429:
+            self._send(429, "<html><head><title>429 Too Many Requests</title></head><body></body></html>")
+        elif error:
+            self._send(500, "<html><head><title>Erreur serveur</title></head><body></body></html>")
+        elif page is None or not 1 <= produit_id <= self.server.count:
+            self._send(404, "<html><head><title>Page introuvable</title></head><body></body></html>")
+        else:
+            self._send(200, page(produit_id, self.server.page_size), content_type)
+
+    def _send(self, status: int, html: str, content_type: str = "text/html; charset=utf-8"):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Pas de ligne par requête : le serveur sert des milliers de pages
+
+
+def start_server(port: int = 0, **options) -> MockSCPIServer:
+    """Démarre le serveur dans un thread et le retourne (server.shutdown() pour l'arrêter)"""
+    server = MockSCPIServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, name="mock-scpi-server", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur scpi-lab synthétique")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="latence moyenne (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="écart type log-normal de la latence")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 500/429")
+    parser.add_argument("--page-kb", type=float, default=150, help="taille de remplissage des pages (Ko)")
+    parser.add_argument("--count", type=int, default=10000, help="nombre de SCPI synthétiques")
+    args = parser.parse_args()
+
+    server = MockSCPIServer(("127.0.0.1", args.port), latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, page_size=int(args.page_kb * 1024),
+                            count=args.count)
+    print(f"🧪 Serveur synthétique sur {server.base_url} ({args.count} SCPI)")
+    print(f"   💡 Pour l'utiliser: \"base_url\": \"{server.base_url}\" dans scraper_config.json")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 {server.requests} requêtes servies, {server.errors} erreurs simulées")
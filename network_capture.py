@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Données JSON chargées par les scripts de la page (graphiques, répartitions)
+Avec capture_network, Chrome journalise son trafic réseau (journal "performance") :
+les réponses JSON de la page principale sont relues via DevTools et converties en
+champs de SCPIChiffresClés. Les URL qui ont fourni un champ sont retenues dans un
+registre ; les exécutions suivantes les bloquent dans la page (ses graphiques ne sont
+plus chargés ni dessinés) et les interrogent directement en HTTP à la place.
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config_scraper import scraper_config
+from extraction_schema import normalize_label
+from file_lock import locked
+from quarter_backfill import PageFetcher
+from scpi_logging import get_logger
+
+logger = get_logger("reseau")
+
+# Champ de SCPIChiffresClés -> indices cherchés dans les clés et titres entourant les données
+JSON_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "repartition_sectorielle": ("sectoriel", "secteur", "sector", "typologie"),
+    "repartition_geographique": ("geographi", "geo", "region", "zone", "pays", "country"),
+}
+
+LABEL_KEYS = ("name", "label", "nom", "libelle", "categorie", "category", "key")
+VALUE_KEYS = ("y", "value", "valeur", "pourcentage", "percent", "percentage", "part")
+
+
+def _as_number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace("%", "").replace(",", ".").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _points(node) -> Optional[Dict[str, float]]:
+    """Série de points d'un graphique ({"name", "y"}, [libellé, valeur] ou {libellé: valeur}) en pourcentages"""
+    points = {}
+    if isinstance(node, list) and node:
+        for item in node:
+            if isinstance(item, dict):
+                label = next((item[k] for k in LABEL_KEYS if isinstance(item.get(k), str)), None)
+                value = next((_as_number(item[k]) for k in VALUE_KEYS if k in item), None)
+            elif isinstance(item, (list, tuple)) and len(item) == 2 and isinstance(item[0], str):
+                label, value = item[0], _as_number(item[1])
+            else:
+                return None
+            if label is None or value is None:
+                return None
+            points[label.strip()] = value
+    elif isinstance(node, dict) and node:
+        for label, value in node.items():
+            value = _as_number(value)
+            if value is None:
+                return None
+            points[label.strip()] = value
+    else:
+        return None
+
+    # Une répartition totalise 100 % (ou 1 en fractions), aux arrondis près
+    total = sum(points.values())
+    if 0.95 <= total <= 1.05:
+        return {label: round(value * 100, 2) for label, value in points.items()}
+    return points if 95 <= total <= 105 else None
+
+
+def map_json_fields(payload) -> Dict[str, dict]:
+    """
+    Champs de SCPIChiffresClés trouvés dans une réponse JSON
+
+    Chaque série de points totalisant 100 % est attribuée au champ dont un indice
+    apparaît dans les clés ou les titres qui l'entourent ("repartition-sectorielle"...).
+    """
+    found = {}
+
+    def visit(node, context: str):
+        points = _points(node)
+        if points is not None:
+            for name, hints in JSON_FIELDS.items():
+                if name not in found and any(hint in context for hint in hints):
+                    found[name] = points
+                    return
+            return
+        if isinstance(node, dict):
+            titles = " ".join(normalize_label(v) for v in node.values() if isinstance(v, str) and len(v) < 80)
+            for key, child in node.items():
+                if isinstance(child, (dict, list)):
+                    visit(child, f"{context} {titles} {normalize_label(str(key))}")
+        elif isinstance(node, list):
+            for child in node:
+                visit(child, context)
+
+    visit(payload, "")
+    return found
+
+
+def json_responses(driver) -> List[Tuple[str, object]]:
+    """Réponses JSON journalisées depuis la dernière lecture du journal "performance" (url, contenu)"""
+    responses = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
+        params = message.get("params", {})
+        response = params.get("response", {})
+        if "json" not in response.get("mimeType", ""):
+            continue
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = body.get("body", "")
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8", errors="replace")
+            responses.append((response.get("url", ""), json.loads(text)))
+        except Exception as e:  # Corps déjà libéré par Chrome ou JSON invalide
+            logger.debug("Réponse JSON illisible %s: %s", response.get("url"), e)
+    return responses
+
+
+def url_template(url: str, produit_id: int) -> Optional[str]:
+    """
+    URL réutilisable pour toute SCPI ("/api/scpi/39/x" -> "/api/scpi/{produit_id}/x"), None sinon
+
+    L'identifiant n'est remplacé que s'il forme un segment de chemin entier ou la valeur
+    entière d'un paramètre ("/api/v10/..." ou "scpi-10.json" restent tels quels).
+    """
+    boundaries = rf"(?<=/){produit_id}(?=[/?#]|$)|(?<==){produit_id}(?=[&#]|$)"
+    template, count = re.subn(boundaries, "{produit_id}", url.replace("{", "{{").replace("}", "}}"))
+    return template if count else None
+
+
+class EndpointRegistry:
+    """URL des réponses JSON et champs qu'elles fournissent, conservées entre les exécutions"""
+
+    def __init__(self, path: str = None):
+        self.path = path or scraper_config.get("endpoint_registry_file", "json_endpoints.json")
+        self.endpoints: Dict[str, List[str]] = {}  # Modèle d'URL -> champs fournis
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.endpoints = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _update(self, change: Callable[[Dict[str, List[str]]], None]):
+        """
+        Applique change au registre sous verrou entre processus
+
+        Le fichier est relu avant la modification : les URL retenues entre-temps par
+        d'autres workers sont conservées ; l'écriture passe par un fichier temporaire.
+        """
+        try:
+            with locked(self.path + ".lock"):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self.endpoints = json.load(f)
+                except (OSError, ValueError):
+                    pass
+                change(self.endpoints)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.endpoints, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            change(self.endpoints)
+            logger.warning("⚠️ Registre des URL JSON non écrit: %s", e)
+
+    def record(self, template: str, fields: Iterable[str]):
+        fields = sorted(fields)
+        if self.endpoints.get(template) != fields:
+            self._update(lambda endpoints: endpoints.__setitem__(template, fields))
+            logger.info("📡 URL JSON retenue pour %s: %s", ", ".join(fields), template)
+
+    def forget(self, template: str):
+        if template in self.endpoints:
+            self._update(lambda endpoints: endpoints.pop(template, None))
+
+
+class NetworkCapture:
+    """Champs de SCPIChiffresClés lus dans les réponses JSON plutôt que dans le texte des graphiques"""
+
+    def __init__(self, registry: EndpointRegistry = None, fetcher=None):
+        """
+        Args:
+            registry: Registre des URL JSON (par défaut endpoint_registry_file)
+            fetcher: Chargement HTTP direct (par défaut sous le débit partagé)
+        """
+        self.registry = registry or EndpointRegistry()
+        self.fetcher = fetcher or PageFetcher()
+
+    def drain(self, driver):
+        """Vide le journal avant un chargement : seules les réponses de la page suivante sont lues"""
+        try:
+            driver.get_log("performance")
+        except Exception:
+            pass
+
+    def block_direct(self, driver):
+        """
+        Bloque dans l'onglet courant les URL retenues, avant le chargement de la page
+
+        Leurs champs viennent des requêtes directes : la page ne les demande pas une seconde
+        fois et ses graphiques ne sont pas dessinés. La liste est remplacée à chaque appel
+        (une URL oubliée est débloquée et réapprise au chargement suivant). Le domaine
+        Network est déjà actif : le journal "performance" de capture_network l'active.
+        """
+        patterns = sorted(template.replace("{produit_id}", "*").replace("{{", "{").replace("}}", "}")
+                          for template in self.registry.endpoints)
+        try:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            logger.debug("URL JSON non bloquées dans la page: %s", e)
+
+    def direct(self, produit_id: int, remaining: Callable[[], float] = None) -> Dict[str, dict]:
+        """
+        Interroge les URL retenues ; une URL qui ne fournit plus ses champs est oubliée
+
+        Args:
+            remaining: Temps restant du budget de la section (chaque requête y est bornée,
+                les URL suivantes sont abandonnées une fois le budget épuisé)
+        """
+        values = {}
+        for template, fields in list(self.registry.endpoints.items()):
+            url = template.format(produit_id=produit_id)
+            left = remaining() if remaining is not None else float("inf")
+            if left <= 0:
+                logger.warning("⏳ Budget épuisé, URL JSON non interrogée: %s", url, extra={"produit_id": produit_id})
+                break
+            try:
+                text = self.fetcher.fetch(url, timeout=min(self.fetcher.timeout, left))
+                mapped = map_json_fields(json.loads(text)) if text else {}
+            except Exception as e:
+                logger.warning("⚠️ URL JSON %s indisponible: %s", url, e, extra={"produit_id": produit_id})
+                continue
+            if not set(fields) <= set(mapped):
+                logger.info("📡 URL JSON oubliée (champs absents): %s", template)
+                self.registry.forget(template)
+            values.update({name: value for name, value in mapped.items() if name not in values})
+        return values
+
+    def captured(self, driver, produit_id: int, own_only: bool = False) -> Dict[str, dict]:
+        """
+        Champs trouvés dans les réponses JSON de la page chargée ; les URL utiles sont retenues
+
+        Args:
+            own_only: Ne garde que les réponses dont l'URL porte produit_id (journal partagé
+                par plusieurs onglets, browser_contexts)
+        """
+        values = {}
+        for url, payload in json_responses(driver):
+            template = url_template(url, produit_id)
+            if own_only and template is None:
+                continue
+            mapped = map_json_fields(payload)
+            if not mapped:
+                continue
+            if template is not None:
+                self.registry.record(template, mapped)
+            values.update({name: value for name, value in mapped.items() if name not in values})
+        return values
+
+    def fields(self, driver, produit_id: int, remaining: Callable[[], float] = None,
+               captured: Dict[str, dict] = None) -> Dict[str, dict]:
+        """
+        URL retenues d'abord ; le journal réseau de la page complète les champs qu'elles ne couvrent pas
+
+        Args:
+            remaining: Temps restant du budget de la section (requêtes directes)
+            captured: Champs déjà relevés dans le journal (browser_contexts, {} si rien n'a
+                pu être relevé), sinon lus sur driver
+        """
+        values = self.direct(produit_id, remaining) if self.registry.endpoints else {}
+        if not set(JSON_FIELDS) <= set(values):
+            if captured is None:
+                captured = self.captured(driver, produit_id)
+            values = {**captured, **values}
+        return values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Répartitions lues directement sur les URL JSON retenues")
+    parser.add_argument("ids", type=int, nargs="+", help="produit_id des SCPI")
+    args = parser.parse_args()
+
+    capture = NetworkCapture()
+    if not capture.registry.endpoints:
+        print("❌ Aucune URL JSON retenue : lancez d'abord une extraction avec \"capture_network\": true")
+    for produit_id in args.ids if capture.registry.endpoints else []:
+        print(f"\n📡 SCPI {produit_id}")
+        for name, values in capture.direct(produit_id).items():
+            print(f"   {name}: " + ", ".join(f"{label} {value:g} %" for label, value in values.items()))
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archive des pages scpi-lab (enregistrement et rejeu hors ligne)
+Permet de relancer les extracteurs sur des pages déjà téléchargées,
+sans navigateur ni réseau
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from html import unescape
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+try:
+    import zstandard as zstd
+except ImportError:  # zlib + dictionnaire prédéfini en repli
+    zstd = None
+
+from file_lock import locked
+from scpi_dataclasses import SCPIData
+from scpi_logging import get_logger, setup_logging
+
+logger = get_logger("archive")
+
+INDEX_FILE = "index.jsonl"
+PAGES_FILE = "pages.bin"
+LOCK_FILE = ".lock"  # Verrou entre processus (workers qui enregistrent, compaction)
+ZLIB_DICT_SIZE = 32 * 1024  # Taille maximale d'un zdict zlib
+
+
+@dataclass
+class ArchivedPage:
+    """Entrée d'index d'une page archivée"""
+    url: str
+    timestamp: str
+    headers: dict
+    produit_id: Optional[int]
+    session: Optional[str]
+    codec: str
+    dict_id: Optional[int]
+    offset: int
+    length: int
+
+
+@dataclass
+class ArchivedSnapshot:
+    """Ensemble des pages enregistrées lors d'une même extraction"""
+    session: str
+    produit_id: int
+    timestamp: str
+    pages: List[ArchivedPage] = field(default_factory=list)
+
+
+class PageArchive:
+    """
+    Archive compressée (zstd + dictionnaire entraîné, ou zlib en repli)
+
+    Plusieurs processus peuvent écrire dans la même archive : l'ajout d'une page,
+    l'entraînement d'un dictionnaire et la compaction prennent un verrou de fichier,
+    les lectures un verrou partagé. Chaque page garde son codec et son dictionnaire,
+    une archive mixte se relit donc.
+    """
+
+    def __init__(self, path: str, level: int = None, codec: str = None):
+        self.path = path
+        self.codec = codec or ("zstd" if zstd is not None else "zlib")
+        self.level = level or (10 if self.codec == "zstd" else 9)
+        self._lock = threading.Lock()
+        self._dictionaries = {}
+        # Index déjà lu : (fichier, octets lus, pages, page par identité) ; seules les lignes ajoutées sont relues
+        self._index_cache: Tuple[Optional[tuple], int, List[ArchivedPage], Dict[tuple, ArchivedPage]] = (None, 0, [], {})
+        os.makedirs(path, exist_ok=True)
+        self.dict_id = self._latest_dict_id()
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        """Verrou des threads du processus puis des autres processus (non réentrant, partagé en lecture)"""
+        with self._lock, locked(os.path.join(self.path, LOCK_FILE), shared=shared):
+            yield
+
+    # --- Dictionnaires ---
+
+    def _dict_path(self, dict_id: int, codec: str) -> str:
+        return os.path.join(self.path, f"dict-{dict_id}.{codec}")
+
+    def _latest_dict_id(self) -> Optional[int]:
+        ids = []
+        for name in os.listdir(self.path):
+            match = re.match(rf"dict-(\d+)\.{self.codec}$", name)
+            if match:
+                ids.append(int(match.group(1)))
+        return max(ids) if ids else None
+
+    def _dictionary(self, dict_id: Optional[int], codec: str) -> Optional[bytes]:
+        """Dictionnaire d'une page : celui de son propre codec, pas forcément celui de l'archive"""
+        if dict_id is None:
+            return None
+        if (codec, dict_id) not in self._dictionaries:
+            with open(self._dict_path(dict_id, codec), "rb") as f:
+                self._dictionaries[codec, dict_id] = f.read()
+        return self._dictionaries[codec, dict_id]
+
+    def _compress(self, raw: bytes, dict_id: Optional[int]) -> bytes:
+        dictionary = self._dictionary(dict_id, self.codec)
+        if self.codec == "zstd":
+            dict_data = zstd.ZstdCompressionDict(dictionary) if dictionary else None
+            return zstd.ZstdCompressor(level=self.level, dict_data=dict_data).compress(raw)
+        if dictionary:
+            compressor = zlib.compressobj(self.level, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(raw) + compressor.flush()
+
+    def _decompress(self, blob: bytes, codec: str, dict_id: Optional[int]) -> bytes:
+        dictionary = self._dictionary(dict_id, codec)
+        if codec == "zstd":
+            if zstd is None:
+                raise RuntimeError("Archive zstd : installez le paquet 'zstandard' pour la relire")
+            dict_data = zstd.ZstdCompressionDict(dictionary) if dictionary else None
+            return zstd.ZstdDecompressor(dict_data=dict_data).decompress(blob)
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(blob) + decompressor.flush()
+
+    def train_dictionary(self, max_samples: int = 500, dict_size: int = 112640) -> Optional[int]:
+        """
+        Entraîne un dictionnaire sur les pages déjà archivées
+
+        Les pages scpi-lab partagent l'essentiel de leur HTML (menus, scripts,
+        tableaux) : le dictionnaire réduit fortement la taille de chaque page.
+
+        Returns:
+            int: Identifiant du nouveau dictionnaire, None si pas assez de pages
+        """
+        with self._locked():
+            samples = [self._read(page).encode("utf-8") for page in self._index()[-max_samples:]]
+            if not samples:
+                return None
+            if self.codec == "zstd":
+                try:
+                    dictionary = zstd.train_dictionary(dict_size, samples).as_bytes()
+                except zstd.ZstdError as e:
+                    logger.warning("⚠️ Entraînement du dictionnaire impossible: %s", e)
+                    return None
+            else:
+                # zlib privilégie la fin du zdict : on y place les pages les plus récentes
+                dictionary = b"".join(samples)[-ZLIB_DICT_SIZE:]
+
+            # Un autre processus a pu entraîner un dictionnaire entre-temps
+            dict_id = (self._latest_dict_id() or 0) + 1
+            with open(self._dict_path(dict_id, self.codec), "wb") as f:
+                f.write(dictionary)
+            self.dict_id = dict_id
+        logger.info("📚 Dictionnaire %s #%s entraîné sur %s pages", self.codec, dict_id, len(samples))
+        return dict_id
+
+    def compact(self):
+        """Recompresse toute l'archive avec le dernier dictionnaire (pages ajoutées entre-temps comprises)"""
+        tmp_pages = os.path.join(self.path, PAGES_FILE + ".tmp")
+        tmp_index = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with self._locked():
+            self.dict_id = self._latest_dict_id()
+            with open(tmp_pages, "wb") as blobs, open(tmp_index, "w", encoding="utf-8") as index:
+                offset = 0
+                for page in self._index():
+                    blob = self._compress(self._read(page).encode("utf-8"), self.dict_id)
+                    blobs.write(blob)
+                    page = replace(page, codec=self.codec, dict_id=self.dict_id, offset=offset, length=len(blob))
+                    index.write(json.dumps(page.__dict__, ensure_ascii=False) + "\n")
+                    offset += len(blob)
+            os.replace(tmp_pages, os.path.join(self.path, PAGES_FILE))
+            os.replace(tmp_index, os.path.join(self.path, INDEX_FILE))
+            self._index_cache = (None, 0, [], {})
+
+    def close(self, min_pages: int = 50):
+        """Entraîne le premier dictionnaire dès que l'archive est assez fournie (index relu depuis la dernière ligne lue)"""
+        if self.dict_id is None and len(self.pages()) >= min_pages:
+            if self.train_dictionary() is not None:
+                self.compact()
+
+    # --- Écriture / lecture ---
+
+    def record(self, url: str, html: str, headers: dict = None, produit_id: int = None,
+               session: str = None, timestamp: datetime = None) -> ArchivedPage:
+        """Ajoute une page à l'archive"""
+        # Compression hors verrou : la page garde son dictionnaire, même s'il n'est plus le dernier
+        dict_id = self.dict_id
+        blob = self._compress(html.encode("utf-8"), dict_id)
+        with self._locked():
+            with open(os.path.join(self.path, PAGES_FILE), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(blob)
+            page = ArchivedPage(
+                url=url,
+                timestamp=(timestamp or datetime.now()).isoformat(),
+                headers=headers or {},
+                produit_id=produit_id,
+                session=session,
+                codec=self.codec,
+                dict_id=dict_id,
+                offset=offset,
+                length=len(blob)
+            )
+            with open(os.path.join(self.path, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(page.__dict__, ensure_ascii=False) + "\n")
+            # Un autre processus a pu entraîner un dictionnaire : les pages suivantes en profitent
+            self.dict_id = self._latest_dict_id()
+        return page
+
+    def pages(self) -> List[ArchivedPage]:
+        """Retourne l'index complet de l'archive (jamais une ligne en cours d'écriture)"""
+        with self._locked(shared=True):
+            return self._index()
+
+    @staticmethod
+    def _key(page: ArchivedPage) -> tuple:
+        """Identité d'une page, stable à travers les compactions (qui changent codec et emplacement)"""
+        return page.url, page.timestamp, page.session, page.produit_id
+
+    def _index(self) -> List[ArchivedPage]:
+        """
+        Index de l'archive (sous verrou)
+
+        Les lignes déjà lues sont gardées : seules celles ajoutées depuis sont relues. Un
+        fichier remplacé (compaction, autre processus compris) est relu en entier.
+        """
+        index_path = os.path.join(self.path, INDEX_FILE)
+        try:
+            stat = os.stat(index_path)
+        except FileNotFoundError:
+            self._index_cache = (None, 0, [], {})
+            return []
+        identity, position, pages, by_key = self._index_cache
+        if identity != (stat.st_dev, stat.st_ino) or stat.st_size < position:
+            position, pages, by_key = 0, [], {}
+        if stat.st_size > position:
+            with open(index_path, "rb") as f:
+                f.seek(position)
+                tail = f.read()
+            added = [ArchivedPage(**json.loads(line)) for line in tail.decode("utf-8").splitlines() if line.strip()]
+            pages = pages + added
+            by_key = {**by_key, **{self._key(page): page for page in added}}
+            position += len(tail)
+        self._index_cache = ((stat.st_dev, stat.st_ino), position, pages, by_key)
+        return list(pages)
+
+    def read(self, page: ArchivedPage) -> str:
+        """
+        Décompresse le HTML d'une page
+
+        L'emplacement est relu dans l'index sous verrou partagé : une compaction faite
+        depuis l'obtention de `page` (pages(), snapshots()) a pu la déplacer.
+        """
+        with self._locked(shared=True):
+            self._index()
+            current = self._index_cache[3].get(self._key(page), page)
+            blob = self._blob(current)
+        return self._decompress(blob, current.codec, current.dict_id).decode("utf-8")
+
+    def _blob(self, page: ArchivedPage) -> bytes:
+        with open(os.path.join(self.path, PAGES_FILE), "rb") as f:
+            f.seek(page.offset)
+            return f.read(page.length)
+
+    def _read(self, page: ArchivedPage) -> str:
+        """Décompresse une page de l'index courant (verrou déjà pris)"""
+        return self._decompress(self._blob(page), page.codec, page.dict_id).decode("utf-8")
+
+    def snapshots(self, produit_ids: List[int] = None) -> List[ArchivedSnapshot]:
+        """Regroupe les pages par extraction (une par SCPI et par passage)"""
+        snapshots = OrderedDict()
+        for page in self.pages():
+            if page.session is None or page.produit_id is None:
+                continue
+            if produit_ids and page.produit_id not in produit_ids:
+                continue
+            if page.session not in snapshots:
+                snapshots[page.session] = ArchivedSnapshot(page.session, page.produit_id, page.timestamp)
+            snapshots[page.session].pages.append(page)
+        return list(snapshots.values())
+
+    def stats(self) -> dict:
+        """Statistiques de compression"""
+        pages = self.pages()
+        pages_path = os.path.join(self.path, PAGES_FILE)
+        compressed = os.path.getsize(pages_path) if os.path.exists(pages_path) else 0
+        return {
+            "pages": len(pages),
+            "snapshots": len(self.snapshots()),
+            "codec": self.codec,
+            "dictionnaire": self.dict_id,
+            "taille_compressee": compressed
+        }
+
+
+# --- Rejeu hors ligne ---
+
+class ReplayDriver:
+    """
+    Remplace webdriver.Chrome en servant les pages d'une archive
+
+    Les extracteurs lisent page_source (schéma déclaratif) : aucun DOM n'est construit,
+    seul le titre est relevé pour les contrôles de chargement et de refus.
+    """
+
+    TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.current_url = None
+        self.page_source = ""
+        self.title = ""
+
+    def get(self, url: str):
+        html = self.pages.get(url)
+        if html is None:
+            # Le nom de la SCPI (donc l'URL /information) peut changer après correction d'un parseur
+            suffix = url.rsplit("/", 1)[-1]
+            candidates = [u for u in self.pages if u.rsplit("/", 1)[-1] == suffix]
+            if not candidates:
+                raise WebDriverException(f"Page absente de l'archive: {url}")
+            html = self.pages[candidates[0]]
+        match = self.TITLE.search(html)
+        self.current_url = url
+        self.page_source = html
+        self.title = unescape(" ".join(match.group(1).split())) if match else ""
+
+    def execute_script(self, script, *args):
+        return None
+
+    def quit(self):
+        pass
+
+
+def _make_replay_scraper(pages: Dict[str, str], timed_out: Iterable[str] = ()):
+    """
+    Args:
+        pages: URL -> HTML des pages servies au scraper
+        timed_out: Pages dont le chargement a été abandonné (leur section est notée timeout)
+    """
+    from scpi_scraper import SCPIScraperConfigurable, ScrapeDeadlineExceeded
+
+    timed_out = set(timed_out)
+
+    class ReplayScraper(SCPIScraperConfigurable):
+        """Scraper branché sur l'archive : pas de Chrome, pas d'attente"""
+
+        def __init__(self):
+            self.driver = ReplayDriver(pages)
+            self.wait = None
+            self.recorder = None
+            self._source = None
+
+        def _navigate(self, url: str):
+            self._source = None
+            if url in timed_out:
+                raise ScrapeDeadlineExceeded(f"chargement de {url} interrompu")
+            self.driver.get(url)
+
+        def _capture(self, produit_id: int, stage: str):
+            pass
+
+    return ReplayScraper()
+
+
+_worker_archive = None
+
+
+def _replay_snapshot(archive_path: str, snapshot: ArchivedSnapshot) -> SCPIData:
+    """Rejoue une extraction (exécuté dans un processus du pool)"""
+    global _worker_archive
+    if _worker_archive is None or _worker_archive.path != archive_path:
+        _worker_archive = PageArchive(archive_path)
+    pages = {page.url: _worker_archive.read(page) for page in snapshot.pages}
+    scraper = _make_replay_scraper(pages)
+    data = scraper.scrape_scpi(snapshot.produit_id)
+    data.date_extraction = datetime.fromisoformat(snapshot.timestamp)
+    return data
+
+
+def replay_archive(archive_path: str = None, produit_ids: List[int] = None,
+                   workers: int = None) -> List[SCPIData]:
+    """
+    Rejoue les extracteurs sur toute l'archive, en parallèle
+
+    Args:
+        archive_path: Dossier de l'archive (par défaut la config "archive_path")
+        produit_ids: Restreint le rejeu à certaines SCPI
+        workers: Nombre de processus (par défaut le nombre de CPU)
+
+    Returns:
+        List[SCPIData]: Série des données ré-extraites, triée par SCPI puis date
+    """
+    from config_scraper import scraper_config
+    archive_path = archive_path or scraper_config.get("archive_path", "page_archive")
+    archive = PageArchive(archive_path)
+    snapshots = archive.snapshots(produit_ids)
+    if not snapshots:
+        return []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_logging) as pool:
+        results = list(pool.map(_replay_snapshot, [archive_path] * len(snapshots), snapshots,
+                                chunksize=max(1, len(snapshots) // ((workers or os.cpu_count() or 1) * 4))))
+    results.sort(key=lambda data: (data.produit_id, data.date_extraction))
+    return results
+
+
+if __name__ == "__main__":
+    setup_logging()
+    if len(sys.argv) > 2 and sys.argv[1] == "--train":
+        archive = PageArchive(sys.argv[2])
+        if archive.train_dictionary() is not None:
+            archive.compact()
+        print(f"📊 {archive.stats()}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "--stats":
+        print(f"📊 {PageArchive(sys.argv[2]).stats()}")
+    else:
+        print("Usage: python page_archive.py [--train|--stats] ARCHIVE")
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulation vectorisée des résultats d'un investisseur en SCPI
+Chaque scénario fixe une durée de détention, une trajectoire de dividendes
+(croissance annuelle constante, commune au marché plus un écart propre à chaque
+SCPI) et une décote à la revente. Le TRI de toutes les SCPI et de tous les
+scénarios est résolu d'un coup par la méthode de Newton sur la VAN en forme close
+(séries géométriques), sans boucle Python par SCPI ni par année.
+"""
+
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from french_parsing import parse_number
+from scpi_dataclasses import SCPIData
+
+# "3 mois", "6 semaines", "1 an", "45 jours" -> durée en années
+DELAI_RE = re.compile(r"(\d+(?:[,.]\d+)?)\s*(jours?|semaines?|mois|ans?|années?)", re.IGNORECASE)
+DELAI_UNITS = {"jour": 1 / 365, "semaine": 7 / 365, "mois": 1 / 12, "an": 1.0, "annee": 1.0}
+
+
+def delai_years(text: str) -> float:
+    """Délai de cession en années ("3 mois" -> 0.25), 0 si absent ("-", "Sans objet")"""
+    match = DELAI_RE.search(text or "")
+    if not match:
+        return 0.0
+    unit = match.group(2).lower().replace("é", "e").rstrip("s")
+    return parse_number(match.group(1)) * DELAI_UNITS["mois" if unit == "moi" else unit]
+
+
+@dataclass
+class SimulationInputs:
+    """Chiffres de chaque SCPI utilisés par la simulation (une ligne par SCPI)"""
+    produit_id: np.ndarray  # int64
+    noms: List[str]
+    prix_achat: np.ndarray  # prix_part_actuel (€)
+    prix_vente: np.ndarray  # prix_part_vente, sinon prix d'achat (€)
+    dividende: np.ndarray  # dividende_net_annuel, sinon taux_distribution_net x prix (€ par part)
+    delai: np.ndarray  # delai_cession (années)
+
+    @classmethod
+    def from_scpi_data(cls, batch: List[SCPIData]) -> "SimulationInputs":
+        """SCPI sans prix ou sans distribution : NaN (résultats NaN, ignorées des portefeuilles)"""
+        n = len(batch)
+        values = {name: np.full(n, np.nan) for name in ("prix_achat", "prix_vente", "dividende")}
+        delai = np.zeros(n)
+        for i, data in enumerate(batch):
+            chiffres = data.chiffres_cles
+            if chiffres is not None and chiffres.prix_part_actuel:
+                prix = chiffres.prix_part_actuel
+                values["prix_achat"][i] = prix
+                values["prix_vente"][i] = chiffres.prix_part_vente or prix
+                if chiffres.dividende_net_annuel is not None:
+                    values["dividende"][i] = chiffres.dividende_net_annuel
+                elif chiffres.taux_distribution_net is not None:
+                    values["dividende"][i] = chiffres.taux_distribution_net * prix / 100
+            if data.trimestre_info is not None:
+                delai[i] = delai_years(data.trimestre_info.delai_cession)
+        return cls(
+            produit_id=np.array([data.produit_id if data.produit_id is not None else -1 for data in batch],
+                                dtype=np.int64),
+            noms=[data.general_info.nom if data.general_info else None for data in batch],
+            delai=delai,
+            **values
+        )
+
+
+@dataclass
+class Scenarios:
+    """Scénarios d'investissement (une valeur par scénario, ou par SCPI et scénario)"""
+    duree: np.ndarray  # Années de détention (int64)
+    croissance: np.ndarray  # Croissance annuelle du dividende, commune au marché
+    ecart_croissance: np.ndarray  # Écart propre à chaque SCPI (n_scpi, n_scenarios), moyenne nulle
+    decote: np.ndarray  # Décote à la revente sur le prix de vente (0.1 = -10 %)
+
+    @classmethod
+    def draw(cls, n_scpi: int, n: int = 10_000, duree_min: int = 3, duree_max: int = 20,
+             croissance: float = 0.0, volatilite: float = 0.02, dispersion: float = 0.01,
+             decote_max: float = 0.20, seed: int = None) -> "Scenarios":
+        """
+        Tire n scénarios
+
+        Args:
+            n_scpi: Nombre de SCPI simulées (écart de croissance propre à chacune)
+            n: Nombre de scénarios
+            duree_min / duree_max: Bornes de la durée de détention (années, tirage uniforme)
+            croissance / volatilite: Moyenne et écart type de la croissance annuelle du dividende
+            dispersion: Écart type de la croissance propre à chaque SCPI
+            decote_max: Décote maximale à la revente (tirage uniforme entre 0 et decote_max)
+            seed: Graine du générateur (reproductibilité)
+        """
+        rng = np.random.default_rng(seed)
+        return cls(
+            duree=rng.integers(duree_min, duree_max + 1, n),
+            croissance=rng.normal(croissance, volatilite, n),
+            ecart_croissance=rng.normal(0.0, dispersion, (n_scpi, n)) if dispersion else np.zeros((n_scpi, n)),
+            decote=rng.uniform(0.0, decote_max, n),
+        )
+
+
+# Lignes de SCPI résolues ensemble : les tableaux intermédiaires d'un bloc restent en cache
+BLOCK_ROWS = 32
+
+
+def _geometric_sums(q: np.ndarray, duree: np.ndarray):
+    """
+    S0 = somme de q^t pour t = 0..T-1 et S1 = somme de t.q^(t-1) pour t = 1..T (dérivée de q.S0)
+    Près de q = 1, la forme close perd sa précision : développement limité en e = q - 1
+    """
+    e = q - 1.0
+    q_t = np.exp(duree * np.log(q))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s0 = (q_t - 1.0) / e
+        s1 = (1.0 - (duree + 1) * q_t + duree * q_t * q) / (e * e)
+    near_one = np.abs(e) < 1e-5
+    if near_one.any():
+        e, t = e[near_one], np.broadcast_to(duree, q.shape)[near_one]
+        s0[near_one] = t + e * t * (t - 1) / 2 + e * e * t * (t - 1) * (t - 2) / 6
+        s1[near_one] = t * (t + 1) / 2 + e * (t + 1) * t * (t - 1) / 3
+    return s0, s1
+
+
+def _npv(v: np.ndarray, prix: np.ndarray, dividende: np.ndarray, facteur: np.ndarray,
+         duree: np.ndarray, revente: np.ndarray, echeance: np.ndarray):
+    """
+    VAN par part et sa dérivée en fonction du facteur d'actualisation v = 1 / (1 + TRI)
+
+    Flux : -prix à t=0, dividende.facteur^(t-1) pour t = 1..duree, revente à t = echeance
+    """
+    s0, s1 = _geometric_sums(v * facteur, duree)
+    v_e = np.exp(echeance * np.log(v))
+    npv = dividende * v * s0 + revente * v_e - prix
+    derivative = dividende * s1 + revente * echeance * v_e / v
+    return npv, derivative
+
+
+def _rows(arrays, block: slice):
+    """Bloc de lignes des tableaux par SCPI ; les tableaux par scénario (1 dimension) sont communs"""
+    return [a[block] if np.ndim(a) == 2 else a for a in arrays]
+
+
+def _newton(npv_and_derivative, v: np.ndarray, tol: float, max_iter: int) -> np.ndarray:
+    for _ in range(max_iter):
+        npv, derivative = npv_and_derivative(v)
+        step = npv / derivative
+        v = np.clip(v - step, 1e-3, 1e3)
+        if not np.nanmax(np.abs(step), initial=0.0) > tol:
+            break
+    return 1.0 / v - 1.0
+
+
+def solve_irr(prix, dividende, facteur, duree, revente, echeance, weights: np.ndarray = None,
+              tol: float = 1e-10, max_iter: int = 50) -> np.ndarray:
+    """
+    TRI annuel (fraction) par la méthode de Newton, toutes les valeurs d'un coup
+
+    Les tableaux par SCPI ont la forme (n_scpi, 1) ou (n_scpi, n_scenarios), ceux par
+    scénario (n_scenarios,). Avec weights (n_scpi,), les flux des SCPI sont additionnés
+    (weights = nombre de parts) et le TRI est celui du portefeuille, par scénario.
+    La VAN est croissante et convexe en v (flux positifs après l'achat) : l'itération
+    partant de v = 1 converge sans osciller.
+    """
+    arrays = (prix, dividende, facteur, duree, revente, echeance)
+    n_scpi, n_scenarios = np.broadcast_shapes(*(np.shape(a) for a in arrays))
+    blocks = [slice(start, min(start + BLOCK_ROWS, n_scpi)) for start in range(0, n_scpi, BLOCK_ROWS)]
+
+    if weights is None:
+        # Blocs indépendants : chacun s'arrête dès qu'il a convergé
+        tri = np.empty((n_scpi, n_scenarios))
+        for block in blocks:
+            rows = _rows(arrays, block)
+            tri[block] = _newton(lambda v: _npv(v, *rows), np.ones((block.stop - block.start, n_scenarios)),
+                                 tol, max_iter)
+        return tri
+
+    def portfolio(v):
+        npv, derivative = np.zeros_like(v), np.zeros_like(v)
+        for block in blocks:
+            block_npv, block_derivative = _npv(v, *_rows(arrays, block))
+            npv += weights[block] @ block_npv
+            derivative += weights[block] @ block_derivative
+        return npv, derivative
+
+    return _newton(portfolio, np.ones(n_scenarios), tol, max_iter)
+
+
+@dataclass
+class SimulationResult:
+    """Distributions du TRI et du rendement net (en %) par SCPI et par portefeuille"""
+    produit_id: np.ndarray
+    noms: List[str]
+    tri: np.ndarray  # (n_scpi, n_scenarios)
+    rendement_net: np.ndarray  # (n_scpi, n_scenarios), dividendes moyens / prix d'achat
+    portefeuilles: Dict[str, Dict[str, np.ndarray]]  # nom -> {"tri", "rendement_net"} (n_scenarios,)
+
+    def summary(self, percentiles=(5, 50, 95)) -> List[dict]:
+        """Percentiles du TRI et du rendement net de chaque SCPI, puis de chaque portefeuille"""
+        rows = []
+        series = [(str(pid), nom, self.tri[i], self.rendement_net[i])
+                  for i, (pid, nom) in enumerate(zip(self.produit_id, self.noms))]
+        series += [("portefeuille", nom, values["tri"], values["rendement_net"])
+                   for nom, values in self.portefeuilles.items()]
+        for key, nom, tri, rendement in series:
+            if np.isnan(tri).all():
+                continue
+            row = {"produit_id": key, "nom": nom}
+            row.update({f"tri_p{p}": float(v) for p, v in zip(percentiles, np.nanpercentile(tri, percentiles))})
+            row.update({f"rendement_p{p}": float(v)
+                        for p, v in zip(percentiles, np.nanpercentile(rendement, percentiles))})
+            rows.append(row)
+        return rows
+
+
+def simulate(inputs: SimulationInputs, scenarios: Scenarios,
+             portfolios: Dict[str, Dict[int, float]] = None) -> SimulationResult:
+    """
+    Simule toutes les SCPI sur tous les scénarios
+
+    Args:
+        inputs: Chiffres des SCPI (SimulationInputs.from_scpi_data)
+        scenarios: Scénarios (Scenarios.draw)
+        portfolios: nom -> {produit_id: poids} ; par défaut un portefeuille équipondéré
+    """
+    col = (slice(None), None)
+    prix, dividende = inputs.prix_achat[col], inputs.dividende[col]
+    facteur = 1.0 + scenarios.croissance + scenarios.ecart_croissance
+    duree = scenarios.duree.astype(np.float64)
+    revente = inputs.prix_vente[col] * (1.0 - scenarios.decote)
+    echeance = duree + inputs.delai[col]  # Le prix de revente arrive après le délai de cession
+
+    tri = solve_irr(prix, dividende, facteur, duree, revente, echeance)
+    total_dividendes, _ = _geometric_sums(facteur, duree)
+    rendement_net = dividende * total_dividendes / duree / prix * 100
+
+    valid = ~(np.isnan(inputs.prix_achat) | np.isnan(inputs.dividende))
+    if portfolios is None:
+        portfolios = {"equipondere": {int(pid): 1.0 for pid in inputs.produit_id[valid]}}
+    results = {}
+    for nom, poids in portfolios.items():
+        weights = np.array([poids.get(int(pid), 0.0) for pid in inputs.produit_id])
+        weights = np.where(valid, weights, 0.0)
+        if weights.sum() <= 0:
+            continue
+        parts = weights / weights.sum() / np.where(valid, inputs.prix_achat, 1.0)  # Parts pour 1 € investi
+        idx = np.flatnonzero(parts)
+        results[nom] = {
+            "tri": solve_irr(prix[idx], dividende[idx], facteur[idx], duree, revente[idx], echeance[idx],
+                             weights=parts[idx]) * 100,
+            "rendement_net": parts[idx] @ (dividende[idx] * total_dividendes[idx]) / duree * 100,
+        }
+    return SimulationResult(inputs.produit_id, inputs.noms, tri * 100, rendement_net, results)
+
+
+def print_summary(result: SimulationResult, n_scenarios: int):
+    print(f"\n📈 TRI et rendement net annuel sur {n_scenarios:,} scénarios (p5 / médiane / p95)")
+    print("-" * 80)
+    for row in result.summary():
+        label = row["nom"] or row["produit_id"]
+        print(f"{label[:30]:<30} TRI {row['tri_p5']:6.2f} / {row['tri_p50']:6.2f} / {row['tri_p95']:6.2f} %"
+              f" | rendement {row['rendement_p5']:5.2f} / {row['rendement_p50']:5.2f} / {row['rendement_p95']:5.2f} %")
+
+
+def benchmark(n_scpi: int = 500, n_scenarios: int = 10_000, seed: int = 0) -> float:
+    """Mesure le temps de simulation de n_scpi SCPI sur n_scenarios scénarios (un seul cœur)"""
+    rng = np.random.default_rng(seed)
+    prix = rng.uniform(150, 1100, n_scpi)
+    inputs = SimulationInputs(
+        produit_id=np.arange(n_scpi, dtype=np.int64),
+        noms=[f"SCPI {i}" for i in range(n_scpi)],
+        prix_achat=prix,
+        prix_vente=prix * rng.uniform(0.88, 0.92, n_scpi),
+        dividende=prix * rng.uniform(0.035, 0.065, n_scpi),
+        delai=rng.choice([0.0, 0.25, 0.5, 1.0], n_scpi),
+    )
+    scenarios = Scenarios.draw(n_scpi, n_scenarios, seed=seed)
+    start = time.perf_counter()
+    result = simulate(inputs, scenarios)
+    duration = time.perf_counter() - start
+    median = np.median(result.portefeuilles["equipondere"]["tri"])
+    print(f"⏱️ {n_scpi} SCPI x {n_scenarios:,} scénarios: {duration:.2f} s "
+          f"(TRI médian du portefeuille équipondéré {median:.2f} %)")
+    return duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation des TRI et rendements nets des SCPI extraites")
+    parser.add_argument("queue", nargs="?", help="file de travail (par défaut queue_path)")
+    parser.add_argument("--scenarios", type=int, default=10_000, help="nombre de scénarios")
+    parser.add_argument("--duree", default="3,20", help="durée de détention min,max (années)")
+    parser.add_argument("--croissance", type=float, default=0.0, help="croissance annuelle moyenne du dividende")
+    parser.add_argument("--decote-max", type=float, default=0.20, help="décote maximale à la revente")
+    parser.add_argument("--poids", action="append", default=[], metavar="ID=POIDS",
+                        help="portefeuille pondéré (ex: --poids 39=2 --poids 85=1)")
+    parser.add_argument("--seed", type=int, help="graine des scénarios")
+    parser.add_argument("--benchmark", action="store_true", help="mesure 500 SCPI x 10 000 scénarios")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        from work_queue import open_queue
+        batch = open_queue(args.queue).results()
+        if not batch:
+            print("❌ Aucun résultat dans la file : lancez d'abord une extraction (--worker)")
+        else:
+            inputs = SimulationInputs.from_scpi_data(batch)
+            duree_min, duree_max = (int(n) for n in args.duree.split(","))
+            scenarios = Scenarios.draw(len(batch), args.scenarios, duree_min, duree_max,
+                                       croissance=args.croissance, decote_max=args.decote_max, seed=args.seed)
+            portfolios = None
+            if args.poids:
+                poids = {int(k): float(v) for k, _, v in (item.partition("=") for item in args.poids)}
+                portfolios = {"equipondere": {int(pid): 1.0 for pid in inputs.produit_id}, "pondere": poids}
+            print_summary(simulate(inputs, scenarios, portfolios), args.scenarios)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reprise de l'historique trimestriel des SCPI
+Les trimestres publiés sont lus dans le sélecteur d'historique de la page principale,
+puis les vues trimestrielles manquantes sont chargées en parallèle, en HTTP simple,
+sous le contrôle du débit partagé. Chaque trimestre est stocké dans une base SQLite :
+une reprise interrompue ou relancée ne recharge que les trimestres manquants (ceux
+absents du site sont retentés après quarter_absent_days jours).
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config_scraper import scraper_config
+from extraction_schema import EXTRACTION_PLAN, PageSnapshot, parse_trimestre
+from rate_controller import rate_controller as shared_rate_controller
+from scpi_dataclasses import SCPITrimestreInfo
+from scpi_logging import get_logger
+
+logger = get_logger("historique")
+
+QUARTER_OPTION = re.compile(r"^T[1-4][\s\-]?20\d{2}$")
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+
+def quarter_key(trimestre: str) -> int:
+    """Rang chronologique d'un trimestre ("T2-2023" -> 2023 * 4 + 1)"""
+    return int(trimestre[3:]) * 4 + int(trimestre[1]) - 1
+
+
+def discover_quarters(snapshot: PageSnapshot) -> List[str]:
+    """
+    Trimestres proposés par le sélecteur d'historique, du plus ancien au plus récent
+
+    Seules les options des sélecteurs comptent : un trimestre cité dans le texte (actualité,
+    bulletin) n'est pas une vue disponible, et aucun trimestre n'est déduit entre deux autres.
+    """
+    quarters = {parse_trimestre(option) for options in snapshot.options.values()
+                for option in options if QUARTER_OPTION.match(option)}
+    return sorted(quarters, key=quarter_key)
+
+
+class FetchError(Exception):
+    """Page non obtenue (erreur serveur, refus ou délai dépassé), à retenter plus tard"""
+
+
+class PageFetcher:
+    """Chargement HTTP simple (sans navigateur) sous le contrôle du débit partagé"""
+
+    def __init__(self, rate_controller=None, timeout: float = None):
+        """
+        Args:
+            rate_controller: Contrôleur de débit (None = contrôleur partagé du processus)
+            timeout: Délai d'une requête en secondes (par défaut page_load_timeout)
+        """
+        self.rate_controller = rate_controller or shared_rate_controller
+        self.timeout = timeout or scraper_config.get("page_load_timeout", 30)
+
+    def fetch(self, url: str, timeout: float = None) -> Optional[str]:
+        """
+        Retourne le HTML de la page, None si elle n'existe pas (404)
+
+        Args:
+            timeout: Délai de cette requête (par défaut celui du chargeur)
+
+        Raises:
+            FetchError: Erreur serveur, refus (429) ou délai dépassé
+        """
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        # L'erreur est levée hors du bloc : le contrôleur garde le statut signalé (429, 500...)
+        with self.rate_controller.request() as handle:
+            try:
+                with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                    charset = response.headers.get_content_charset() or "utf-8"
+                    return response.read().decode(charset, errors="replace")
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return None
+                handle.fail(e.code)
+                error = FetchError(f"HTTP {e.code} pour {url}")
+            except OSError as e:  # URLError, délai dépassé, connexion refusée
+                handle.fail("timeout")
+                error = FetchError(f"{url}: {e}")
+        raise error
+
+
+class QuarterStore:
+    """Historique trimestriel (SQLite) : une ligne par SCPI et par trimestre"""
+
+    def __init__(self, path: str = None):
+        self.path = path or scraper_config.get("quarters_path", "scpi_trimestres.db")
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quarters (
+                produit_id INTEGER NOT NULL,
+                quarter INTEGER NOT NULL,
+                trimestre TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (produit_id, quarter)
+            )
+        """)
+
+    def known(self, produit_id: int, absent_days: float = None) -> Set[str]:
+        """
+        Trimestres déjà traités : stockés, ou absents du site depuis moins de absent_days jours
+
+        Args:
+            absent_days: Durée de validité d'un trimestre absent (par défaut quarter_absent_days)
+        """
+        if absent_days is None:
+            absent_days = scraper_config.get("quarter_absent_days", 30)
+        # Un trimestre absent peut être publié plus tard (bulletin en retard) : il est retenté
+        since = (datetime.now() - timedelta(days=absent_days)).isoformat()
+        rows = self._conn.execute(
+            "SELECT trimestre FROM quarters WHERE produit_id = ? AND (status = 'ok' OR fetched_at >= ?)",
+            (produit_id, since)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def save(self, produit_id: int, trimestre: str, info: Optional[SCPITrimestreInfo]):
+        """Enregistre un trimestre, info=None s'il n'existe pas sur le site"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quarters VALUES (?, ?, ?, ?, ?, ?)",
+                (produit_id, quarter_key(trimestre), trimestre, "ok" if info else "absent",
+                 json.dumps(asdict(info), ensure_ascii=False) if info else None,
+                 datetime.now().isoformat())
+            )
+
+    def history(self, produit_id: int) -> List[SCPITrimestreInfo]:
+        """Série trimestrielle de la SCPI, du plus ancien au plus récent"""
+        rows = self._conn.execute(
+            "SELECT payload FROM quarters WHERE produit_id = ? AND status = 'ok' ORDER BY quarter",
+            (produit_id,)
+        ).fetchall()
+        return [SCPITrimestreInfo(**json.loads(row[0])) for row in rows]
+
+    def histories(self) -> Dict[int, List[SCPITrimestreInfo]]:
+        """Séries trimestrielles de toutes les SCPI stockées"""
+        rows = self._conn.execute("SELECT DISTINCT produit_id FROM quarters ORDER BY produit_id").fetchall()
+        return {row[0]: self.history(row[0]) for row in rows}
+
+    def close(self):
+        self._conn.close()
+
+
+@dataclass
+class BackfillReport:
+    """Bilan d'une reprise de l'historique"""
+    scpi: int = 0
+    discovered: int = 0  # Trimestres repérés
+    skipped: int = 0  # Déjà stockés
+    fetched: int = 0  # Nouveaux trimestres stockés
+    absent: int = 0  # Trimestres repérés mais absents du site
+    failures: List[Tuple[int, Optional[str], str]] = field(default_factory=list)  # (produit_id, trimestre, erreur)
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        return (f"📚 {self.scpi} SCPI, {self.discovered} trimestres repérés : {self.fetched} chargés, "
+                f"{self.skipped} déjà stockés, {self.absent} absents, {len(self.failures)} échecs "
+                f"en {self.duration:.1f}s")
+
+
+class QuarterBackfill:
+    """Repère et charge en parallèle les trimestres manquants de chaque SCPI"""
+
+    def __init__(self, store: QuarterStore, fetcher: PageFetcher = None, workers: int = None):
+        """
+        Args:
+            store: Base de l'historique trimestriel
+            fetcher: Chargement des pages (par défaut HTTP sous le débit partagé)
+            workers: Requêtes en vol au plus (le débit partagé peut en autoriser moins)
+        """
+        self.store = store
+        self.fetcher = fetcher or PageFetcher()
+        self.workers = workers or scraper_config.get("backfill_workers", 4)
+        self.site = scraper_config.get("base_url", "https://www.scpi-lab.com").rstrip("/")
+        self.url_template = scraper_config.get(
+            "quarter_url_template", "{site}/scpi.php?vue=trimestre&produit_id={produit_id}&trimestre={trimestre}")
+
+    def _discover(self, produit_id: int) -> List[str]:
+        html = self.fetcher.fetch(f"{self.site}/scpi.php?vue=&produit_id={produit_id}")
+        if html is None:
+            raise FetchError(f"SCPI {produit_id} introuvable")
+        return discover_quarters(EXTRACTION_PLAN.read(html))
+
+    def _fetch_quarter(self, produit_id: int, trimestre: str) -> Optional[SCPITrimestreInfo]:
+        url = self.url_template.format(site=self.site, produit_id=produit_id, trimestre=trimestre)
+        html = self.fetcher.fetch(url)
+        if html is None:
+            return None
+        snapshot = EXTRACTION_PLAN.read(html)
+        info = EXTRACTION_PLAN.build(SCPITrimestreInfo, snapshot)
+        # Trimestre affiché : lu dans le texte de la page, les options du sélecteur n'en font pas partie
+        if info.trimestre is None:
+            raise FetchError(f"trimestre affiché introuvable sur {url}")
+        # Le site peut renvoyer le dernier trimestre pour un trimestre inconnu : rien n'est stocké sous ce nom
+        if info.trimestre != trimestre:
+            return None
+        return info
+
+    def run(self, produit_ids: Iterable[int]) -> BackfillReport:
+        """Repère puis charge les trimestres manquants ; seul ce thread écrit dans la base"""
+        start = time.monotonic()
+        report = BackfillReport()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="historique") as pool:
+            pending = {}
+            for produit_id in dict.fromkeys(produit_ids):
+                pending[pool.submit(self._discover, produit_id)] = (produit_id, None)
+                report.scpi += 1
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    produit_id, trimestre = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        report.failures.append((produit_id, trimestre, str(e)))
+                        logger.warning("⚠️ SCPI %s %s: %s", produit_id, trimestre or "historique", e,
+                                       extra={"produit_id": produit_id})
+                        continue
+
+                    if trimestre is None:
+                        known = self.store.known(produit_id)
+                        report.discovered += len(result)
+                        missing = [q for q in result if q not in known]
+                        report.skipped += len(result) - len(missing)
+                        logger.info("🔎 SCPI %s: %s trimestres, %s à charger", produit_id, len(result),
+                                    len(missing), extra={"produit_id": produit_id})
+                        # Les plus récents d'abord : une reprise interrompue garde l'essentiel
+                        for q in reversed(missing):
+                            pending[pool.submit(self._fetch_quarter, produit_id, q)] = (produit_id, q)
+                    else:
+                        self.store.save(produit_id, trimestre, result)
+                        if result is None:
+                            report.absent += 1
+                        else:
+                            report.fetched += 1
+        report.duration = time.monotonic() - start
+        return report
+
+
+def backfill_quarters(produit_ids: Iterable[int], store_path: str = None) -> Dict[int, List[SCPITrimestreInfo]]:
+    """Complète l'historique trimestriel des SCPI et retourne leurs séries"""
+    produit_ids = list(produit_ids)
+    store = QuarterStore(store_path)
+    try:
+        report = QuarterBackfill(store).run(produit_ids)
+        logger.info(report.summary())
+        return {produit_id: store.history(produit_id) for produit_id in produit_ids}
+    finally:
+        store.close()
+
+
+def print_history(produit_id: int, history: List[SCPITrimestreInfo]):
+    """Affiche la série trimestrielle d'une SCPI"""
+    print(f"\n📈 SCPI {produit_id} ({len(history)} trimestres)")
+    print(f"{'Trimestre':<10} {'Collecte brute':>15} {'Acq.':>5} {'Ces.':>5} {'Acompte':>9} {'TOF':>7}")
+    for info in history:
+        acompte = f"{info.acompte_brut:.2f}€" if info.acompte_brut is not None else "-"
+        tof = f"{info.tof_aspim_trimestre:.1f}%" if info.tof_aspim_trimestre is not None else "-"
+        print(f"{info.trimestre:<10} {info.collecte_brute or '-':>15} {info.nb_acquisitions or 0:>5} "
+              f"{info.nb_cessions or 0:>5} {acompte:>9} {tof:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reprise de l'historique trimestriel des SCPI")
+    parser.add_argument("ids", type=int, nargs="+", help="produit_id des SCPI")
+    parser.add_argument("--db", help="base de l'historique (par défaut quarters_path)")
+    parser.add_argument("--workers", type=int, help="requêtes en vol au plus")
+    args = parser.parse_args()
+
+    store = QuarterStore(args.db)
+    report = QuarterBackfill(store, workers=args.workers).run(args.ids)
+    for produit_id in args.ids:
+        print_history(produit_id, store.history(produit_id))
+    print(f"\n{report.summary()}")
+    store.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contrôleur de débit adaptatif (AIMD) partagé par tous les chemins de chargement
+Augmente additivement la concurrence et réduit l'espacement tant que le site
+répond vite, réduit multiplicativement au premier ralentissement ou refus (429)
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Optional
+
+from config_scraper import scraper_config
+from scpi_logging import get_logger
+
+logger = get_logger("debit")
+
+
+@dataclass
+class RateDecision:
+    """Décision du contrôleur, conservée pour le rapport d'exécution"""
+    timestamp: float
+    action: str  # "hausse" ou "baisse"
+    reason: str
+    concurrency: float
+    interval: float
+    latency: float
+
+
+class _RequestHandle:
+    """Permet au code appelant de signaler un échec ou un statut HTTP"""
+
+    def __init__(self):
+        self.ok = True
+        self.status = None
+
+    def fail(self, status=None):
+        self.ok = False
+        self.status = status
+
+
+class AIMDRateController:
+    """Limite la concurrence et l'espacement des requêtes vers le site"""
+
+    def __init__(self, initial_concurrency: float = 1, min_concurrency: float = 1,
+                 max_concurrency: float = 4, initial_interval: float = 2.0,
+                 min_interval: float = 0.0, max_interval: float = 30.0,
+                 interval_step: float = 0.25, decrease_factor: float = 0.5,
+                 target_latency: float = 10.0, verbose: bool = True, max_decisions: int = 1000):
+        """
+        Args:
+            initial_concurrency: Nombre de chargements simultanés au départ
+            min_concurrency / max_concurrency: Bornes de la concurrence
+            initial_interval: Espacement initial entre deux chargements (secondes)
+            min_interval / max_interval: Bornes de l'espacement
+            interval_step: Réduction additive de l'espacement après un succès rapide
+            decrease_factor: Facteur de réduction multiplicative de la concurrence
+            target_latency: Au-delà de cette latence (secondes), le site est jugé lent
+            verbose: Journalise chaque changement de régime
+            max_decisions: Décisions conservées pour le rapport (les plus récentes)
+        """
+        self.concurrency = float(initial_concurrency)
+        self.min_concurrency = float(min_concurrency)
+        self.max_concurrency = float(max_concurrency)
+        self.interval = float(initial_interval)
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.interval_step = float(interval_step)
+        self.decrease_factor = float(decrease_factor)
+        self.target_latency = float(target_latency)
+        self.verbose = verbose
+
+        self.active = 0
+        self.next_start = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.adjustments = 0
+        self.decisions: Deque[RateDecision] = deque(maxlen=max_decisions)  # Worker de longue durée : mémoire bornée
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls) -> "AIMDRateController":
+        """Crée le contrôleur à partir de scraper_config.json"""
+        return cls(
+            max_concurrency=scraper_config.get("rate_max_concurrency", 4),
+            initial_interval=scraper_config.get("rate_initial_interval", 2.0),
+            min_interval=scraper_config.get("rate_min_interval", 0.0),
+            max_interval=scraper_config.get("rate_max_interval", 30.0),
+            target_latency=scraper_config.get("rate_target_latency", 10.0)
+        )
+
+    def _try_acquire_locked(self, now: float) -> bool:
+        if self.active < int(self.concurrency) and now >= self.next_start:
+            self.active += 1
+            self.next_start = now + self.interval
+            return True
+        return False
+
+    def acquire(self):
+        """Attend un créneau libre (concurrence et espacement respectés)"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._try_acquire_locked(now):
+                    return
+                timeout = max(0.0, self.next_start - now) if self.active < int(self.concurrency) else None
+                self._cond.wait(timeout)
+
+    def try_acquire(self) -> bool:
+        """Prend un créneau s'il est libre tout de suite (boucle qui pilote plusieurs chargements)"""
+        with self._cond:
+            return self._try_acquire_locked(time.monotonic())
+
+    def release(self, latency: float, ok: bool = True, status=None):
+        """Libère le créneau et ajuste le régime selon la réponse observée"""
+        with self._cond:
+            self.active -= 1
+            self.requests += 1
+            self._update(latency, ok, status)
+            self._cond.notify_all()
+
+    @contextmanager
+    def request(self):
+        """
+        Encadre un chargement de page
+
+        Exemple:
+            with rate_controller.request() as req:
+                driver.get(url)
+                if page_refusee:
+                    req.fail(429)
+        """
+        self.acquire()
+        handle = _RequestHandle()
+        start = time.monotonic()
+        try:
+            yield handle
+        except Exception:
+            handle.fail("exception")
+            raise
+        finally:
+            self.release(time.monotonic() - start, handle.ok, handle.status)
+
+    def _update(self, latency: float, ok: bool, status):
+        now = time.monotonic()
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        slow = latency > self.target_latency
+        if not ok or slow:
+            self.errors += 0 if ok else 1
+            # Une seule réduction par temps de réponse : les requêtes en vol voient le même incident
+            if now - self.last_decrease < (self.latency_ewma or 0):
+                return
+            self.last_decrease = now
+            self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+            self.interval = min(self.max_interval, max(self.interval * 2, self.interval_step))
+            reason = f"statut {status}" if not ok else f"latence {latency:.2f}s > {self.target_latency:.2f}s"
+            self._log("baisse", reason, latency)
+        else:
+            previous = (int(self.concurrency), round(self.interval, 2))
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.interval = max(self.min_interval, self.interval - self.interval_step)
+            if (int(self.concurrency), round(self.interval, 2)) != previous:
+                self._log("hausse", f"latence {latency:.2f}s", latency)
+
+    def _log(self, action: str, reason: str, latency: float):
+        decision = RateDecision(time.time(), action, reason, self.concurrency, self.interval, latency)
+        self.decisions.append(decision)
+        self.adjustments += 1
+        if self.verbose:
+            icon = "📈" if action == "hausse" else "📉"
+            logger.info("%s Débit %s (%s): concurrence %d, espacement %.2fs", icon, action, reason,
+                        int(self.concurrency), self.interval,
+                        extra={"action": action, "concurrence": int(self.concurrency),
+                               "espacement": round(self.interval, 3), "latence": round(latency, 3)})
+
+    def print_summary(self):
+        """Affiche le régime atteint en fin d'exécution"""
+        print(f"🚦 Contrôleur de débit: {self.requests} chargements, {self.errors} erreurs, "
+              f"concurrence {int(self.concurrency)}, espacement {self.interval:.2f}s, "
+              f"latence moyenne {self.latency_ewma or 0:.2f}s, {self.adjustments} ajustements")
+
+
+# Instance partagée par tous les scrapers du processus
+rate_controller = AIMDRateController.from_config()
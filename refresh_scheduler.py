@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planification adaptative des rafraîchissements
+Apprend, sur l'historique des extractions, la fréquence de changement de chaque SCPI
+(prix de part, acompte, nombre d'actualités) en distinguant les changements continus
+de ceux liés aux bulletins trimestriels, puis choisit les SCPI à rafraîchir dans un
+budget de requêtes ou de temps, les plus probablement modifiées d'abord
+"""
+
+import argparse
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config_scraper import scraper_config
+from scpi_analytics import SnapshotTable
+from scpi_dataclasses import SCPIData, normalize_sections
+
+# Champs dont le changement justifie un rafraîchissement
+TRACKED_FIELDS = ("prix_part_actuel", "acompte_brut", "nb_actualites")
+
+# Variation relative en dessous de laquelle une valeur est considérée inchangée
+CHANGE_TOLERANCE = 1e-4
+
+
+def bulletin_dates(first_year: int, last_year: int, delay_days: int) -> np.ndarray:
+    """Dates de publication des bulletins trimestriels (fin de trimestre + delay_days)"""
+    quarter_ends = np.arange(np.datetime64(f"{first_year}-01", "M"),
+                             np.datetime64(f"{last_year + 1}-01", "M"), 3)
+    return quarter_ends.astype("datetime64[D]") + delay_days
+
+
+def bulletins_between(bulletins: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Nombre de bulletins publiés dans ]start, end] (tableaux de dates)"""
+    return np.searchsorted(bulletins, end, side="right") - np.searchsorted(bulletins, start, side="right")
+
+
+@dataclass
+class RefreshCandidate:
+    """Une SCPI évaluée par le planificateur"""
+    produit_id: int
+    probability: float  # Probabilité qu'au moins un champ suivi ait changé
+    last_fetch: Optional[date]
+    bulletins: int  # Bulletins publiés depuis la dernière extraction
+    cost_requests: int
+    cost_seconds: float
+    reason: str
+
+
+@dataclass
+class RefreshPlan:
+    """SCPI retenues (par priorité décroissante) et SCPI reportées"""
+    selected: List[RefreshCandidate]
+    skipped: List[RefreshCandidate]
+
+    @property
+    def produit_ids(self) -> List[int]:
+        return [candidate.produit_id for candidate in self.selected]
+
+    @property
+    def requests(self) -> int:
+        return sum(candidate.cost_requests for candidate in self.selected)
+
+    @property
+    def expected_changes(self) -> float:
+        return sum(candidate.probability for candidate in self.selected)
+
+
+class RefreshScheduler:
+    """Estime les taux de changement par SCPI et planifie les rafraîchissements"""
+
+    def __init__(self, bulletin_delay_days: int = 30, prior_days: float = 30.0,
+                 prior_bulletins: float = 1.0, min_probability: float = 0.05,
+                 max_age_days: float = 90.0, seconds_per_scpi: float = 20.0):
+        """
+        Args:
+            bulletin_delay_days: Délai de publication des bulletins après la fin du trimestre
+            prior_days: Exposition fictive (jours) tirant le taux d'une SCPI vers celui de l'ensemble
+            prior_bulletins: Nombre fictif de bulletins pour la probabilité de changement par bulletin
+            min_probability: En dessous, la SCPI n'est pas rafraîchie
+            max_age_days: Au-delà, la SCPI est rafraîchie quelle que soit sa probabilité
+            seconds_per_scpi: Durée estimée d'une extraction sans historique de durée
+        """
+        self.bulletin_delay_days = bulletin_delay_days
+        self.prior_days = prior_days
+        self.prior_bulletins = prior_bulletins
+        self.min_probability = min_probability
+        self.max_age_days = max_age_days
+        self.seconds_per_scpi = seconds_per_scpi
+
+        # Estimations (une ligne par SCPI, une colonne par champ suivi)
+        self.produit_ids = np.empty(0, dtype=np.int64)
+        self.last_fetch = np.empty(0, dtype="datetime64[D]")
+        self.rates = np.empty((0, len(TRACKED_FIELDS)))  # Changements par jour hors bulletin
+        self.bulletin_probability = np.empty((0, len(TRACKED_FIELDS)))  # Probabilité de changement par bulletin
+
+    @classmethod
+    def from_config(cls) -> "RefreshScheduler":
+        """Crée le planificateur à partir de scraper_config.json"""
+        return cls(
+            bulletin_delay_days=scraper_config.get("bulletin_delay_days", 30),
+            min_probability=scraper_config.get("refresh_min_probability", 0.05),
+            max_age_days=scraper_config.get("refresh_max_age_days", 90),
+            seconds_per_scpi=scraper_config.get("scpi_deadline", 90) / 4
+        )
+
+    def _bulletins(self, first: np.datetime64, last: np.datetime64) -> np.ndarray:
+        first_year = int(str(first)[:4]) - 1
+        last_year = int(str(last)[:4]) + 1
+        return bulletin_dates(first_year, last_year, self.bulletin_delay_days)
+
+    def fit(self, history: List[SCPIData]) -> "RefreshScheduler":
+        """Apprend sur une liste de SCPIData (ex: SQLiteWorkQueue.results(latest_only=False))"""
+        return self.fit_table(SnapshotTable.from_scpi_data(history))
+
+    def fit_table(self, table: SnapshotTable) -> "RefreshScheduler":
+        """Apprend sur un historique au format long"""
+        n_fields = len(TRACKED_FIELDS)
+        if len(table.produit_id) == 0:
+            self.produit_ids = np.empty(0, dtype=np.int64)
+            self.last_fetch = np.empty(0, dtype="datetime64[D]")
+            self.rates = np.empty((0, n_fields))
+            self.bulletin_probability = np.empty((0, n_fields))
+            return self
+
+        order = np.lexsort((table.date, table.produit_id))
+        pid, dates = table.produit_id[order], table.date[order]
+        produit_ids, rows = np.unique(pid, return_inverse=True)
+        n_scpi = len(produit_ids)
+
+        # Couples d'extractions successives d'une même SCPI
+        same = pid[1:] == pid[:-1]
+        start, end, row = dates[:-1][same], dates[1:][same], rows[1:][same]
+        days = (end - start).astype(np.float64)
+        crossed = bulletins_between(self._bulletins(dates.min(), dates.max()), start, end) > 0
+
+        rates = np.empty((n_scpi, n_fields))
+        bulletin_probability = np.empty((n_scpi, n_fields))
+        for j, name in enumerate(TRACKED_FIELDS):
+            values = table.values[name][order]
+            before, after = values[:-1][same], values[1:][same]
+            valid = ~(np.isnan(before) | np.isnan(after))
+            with np.errstate(invalid="ignore"):
+                changed = valid & (np.abs(after - before) > np.abs(before) * CHANGE_TOLERANCE)
+
+            # Hors bulletin : processus de Poisson (changements / jours d'observation)
+            quiet = valid & ~crossed
+            changes = np.bincount(row, weights=changed & quiet, minlength=n_scpi)
+            exposure = np.bincount(row, weights=np.where(quiet, days, 0.0), minlength=n_scpi)
+            overall_rate = (changes.sum() + 1) / (exposure.sum() + 365)
+            rates[:, j] = (changes + self.prior_days * overall_rate) / (exposure + self.prior_days)
+
+            # Intervalles contenant un bulletin : probabilité de changement par bulletin
+            around = valid & crossed
+            hits = np.bincount(row, weights=changed & around, minlength=n_scpi)
+            seen = np.bincount(row, weights=around, minlength=n_scpi)
+            overall_probability = (hits.sum() + 1) / (seen.sum() + 2)
+            bulletin_probability[:, j] = ((hits + self.prior_bulletins * overall_probability)
+                                          / (seen + self.prior_bulletins))
+
+        last = np.ones(len(pid), dtype=bool)
+        last[:-1] = ~same
+        self.produit_ids = produit_ids
+        self.last_fetch = dates[last]
+        self.rates = rates
+        self.bulletin_probability = bulletin_probability
+        return self
+
+    def bulletins_since_last_fetch(self, today: date = None) -> np.ndarray:
+        """Nombre de bulletins publiés depuis la dernière extraction de chaque SCPI connue"""
+        if len(self.produit_ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        today = np.datetime64(today or date.today(), "D")
+        return bulletins_between(self._bulletins(self.last_fetch.min(), today), self.last_fetch,
+                                 np.full_like(self.last_fetch, today))
+
+    def change_probability(self, today: date = None) -> Dict[int, float]:
+        """Probabilité, pour chaque SCPI connue, qu'un champ suivi ait changé depuis sa dernière extraction"""
+        if len(self.produit_ids) == 0:
+            return {}
+        crossed = self.bulletins_since_last_fetch(today)
+        today = np.datetime64(today or date.today(), "D")
+        age = np.maximum((today - self.last_fetch).astype(np.float64), 0.0)
+        unchanged = np.exp(-self.rates * age[:, None]) * (1 - self.bulletin_probability) ** crossed[:, None]
+        probability = 1 - unchanged.prod(axis=1)
+        return {int(pid): float(p) for pid, p in zip(self.produit_ids, probability)}
+
+    def plan(self, produit_ids: Iterable[int], max_requests: int = None, max_seconds: float = None,
+             sections=None, durations: Dict[int, float] = None, today: date = None) -> RefreshPlan:
+        """
+        Choisit les SCPI à rafraîchir
+
+        Args:
+            produit_ids: SCPI candidates
+            max_requests: Budget de pages chargées (None = illimité)
+            max_seconds: Budget de temps d'extraction (None = illimité)
+            sections: Sections extraites (la page informations coûte une requête de plus)
+            durations: Durée moyenne d'extraction par SCPI (WorkQueueBackend.durations())
+            today: Date de référence (aujourd'hui par défaut)
+
+        Returns:
+            RefreshPlan: SCPI retenues, les plus probablement modifiées par unité de coût d'abord
+        """
+        today = today or date.today()
+        durations = durations or {}
+        known = {int(pid): i for i, pid in enumerate(self.produit_ids)}
+        probabilities = self.change_probability(today)
+        requests = 2 if "actualites" in normalize_sections(sections) else 1
+        default_seconds = float(np.mean(list(durations.values()))) if durations else self.seconds_per_scpi
+        crossed = self.bulletins_since_last_fetch(today)
+
+        candidates = []
+        for produit_id in dict.fromkeys(produit_ids):
+            index = known.get(produit_id)
+            if index is None:
+                probability, last_fetch, bulletins, reason = 1.0, None, 0, "jamais extraite"
+            else:
+                last_fetch = self.last_fetch[index].astype(object)
+                bulletins = int(crossed[index])
+                probability = probabilities[produit_id]
+                if (today - last_fetch).days >= self.max_age_days:
+                    probability, reason = 1.0, f"dernière extraction il y a {(today - last_fetch).days} jours"
+                elif bulletins:
+                    reason = f"{bulletins} bulletin(s) publié(s) depuis"
+                else:
+                    reason = "changement continu"
+            candidates.append(RefreshCandidate(produit_id, probability, last_fetch, bulletins, requests,
+                                               durations.get(produit_id, default_seconds), reason))
+
+        # Glouton sur la probabilité par unité de coût (requêtes, ou temps si seul ce budget est donné)
+        by_time = max_seconds is not None and max_requests is None
+        candidates.sort(key=lambda c: c.probability / max(c.cost_seconds if by_time else c.cost_requests, 1e-9),
+                        reverse=True)
+        selected, skipped = [], []
+        used_requests, used_seconds = 0, 0.0
+        for candidate in candidates:
+            fits = ((max_requests is None or used_requests + candidate.cost_requests <= max_requests)
+                    and (max_seconds is None or used_seconds + candidate.cost_seconds <= max_seconds))
+            if candidate.probability >= self.min_probability and fits:
+                selected.append(candidate)
+                used_requests += candidate.cost_requests
+                used_seconds += candidate.cost_seconds
+            else:
+                skipped.append(candidate)
+        return RefreshPlan(selected, skipped)
+
+
+def print_plan(plan: RefreshPlan):
+    """Affiche le plan de rafraîchissement"""
+    print(f"{'ID':<6} {'Probabilité':>11} {'Dernière':>12} {'Req.':>5} {'Durée':>7}  Motif")
+    print("-" * 80)
+    for marker, candidates in (("✅", plan.selected), ("⏭️", plan.skipped)):
+        for c in candidates:
+            last = c.last_fetch.strftime("%d/%m/%Y") if c.last_fetch else "-"
+            print(f"{c.produit_id:<6} {c.probability:>10.1%} {last:>12} {c.cost_requests:>5} "
+                  f"{c.cost_seconds:>6.1f}s  {marker} {c.reason}")
+    print(f"\n📅 {len(plan.selected)} SCPI à rafraîchir ({plan.requests} requêtes, "
+          f"{plan.expected_changes:.1f} changements attendus), {len(plan.skipped)} reportées")
+
+
+if __name__ == "__main__":
+    from work_queue import open_queue
+
+    parser = argparse.ArgumentParser(description="Planifie les SCPI à rafraîchir selon leur historique")
+    parser.add_argument("--queue", help="file de travail (historique et mise en file)")
+    parser.add_argument("--requests", type=int, default=scraper_config.get("refresh_budget_requests"),
+                        help="budget de pages chargées")
+    parser.add_argument("--seconds", type=float, default=scraper_config.get("refresh_budget_seconds"),
+                        help="budget de temps d'extraction (s)")
+    parser.add_argument("--date", help="date de référence (AAAA-MM-JJ)")
+    parser.add_argument("--enqueue", action="store_true", help="met en file les SCPI retenues")
+    args = parser.parse_args()
+
+    queue = open_queue(args.queue)
+    history = queue.results(latest_only=False)
+    scheduler = RefreshScheduler.from_config().fit(history)
+    today = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+    plan = scheduler.plan(sorted({data.produit_id for data in history}), args.requests, args.seconds,
+                          durations=queue.durations(), today=today)
+    print_plan(plan)
+    if args.enqueue:
+        print(f"📥 {queue.enqueue(plan.produit_ids)} SCPI mises en file dans {queue.path}")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profileur par échantillonnage pour les exécutions de scraping (python main.py ... --profile)
+Un thread relève périodiquement la pile de chaque thread (temps réel, attentes WebDriver
+comprises) ; aucun hook n'est installé dans le code profilé. Chaque échantillon est
+attribué à la SCPI en cours (variable produit_id de scrape_scpi) et à l'étape
+(_navigate, _read_page, _extract_*...).
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config_scraper import scraper_config
+
+# Fonctions qui délimitent une étape du scraping (la plus interne l'emporte) ; les aides
+# communes aux extractions (_build_section...) n'en font pas partie : leur temps revient
+# à la méthode _extract_* appelante
+STAGE_FUNCTIONS = {"_navigate", "_read_page", "_after_page_load"}
+STAGE_PREFIX = "_extract_"
+
+# Attentes passives des threads auxiliaires (heartbeat, écriture des logs...) : ignorées
+# (Queue.get et consorts finissent dans wait ; un nom aussi courant que get masquerait
+# du vrai travail, requests.get ou dict.get compris)
+IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "_wait_for_tstate_lock", "serve_forever"}
+
+MAX_DEPTH = 128
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles à faible surcoût"""
+
+    def __init__(self, interval: float = 0.005, output_dir: str = None, top_n: int = 20):
+        """
+        Args:
+            interval: Période d'échantillonnage (secondes)
+            output_dir: Dossier des fichiers de profil
+            top_n: Nombre de fonctions du résumé
+        """
+        self.interval = interval
+        self.output_dir = output_dir or scraper_config.get("profiling_dir", "profiling")
+        self.top_n = top_n
+        self.samples = 0
+        self.stacks: Counter = Counter()  # (thread, scpi, étape, pile) -> échantillons
+        self.times: Counter = Counter()  # (thread, scpi, étape, pile) -> secondes
+        self.duration = 0.0
+        self._start = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+
+    @classmethod
+    def from_config(cls) -> "SamplingProfiler":
+        """Crée le profileur à partir de scraper_config.json"""
+        return cls(
+            interval=scraper_config.get("profile_interval_ms", 5) / 1000,
+            top_n=scraper_config.get("profile_top_n", 20)
+        )
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            self.duration = time.perf_counter() - self._start
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        main = threading.main_thread().ident
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            # Le thread n'obtient pas toujours le GIL à l'heure : chaque échantillon
+            # pèse le temps réellement écoulé depuis le précédent
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != main and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                self._sample(names.get(ident, str(ident)), frame, elapsed)
+                self.samples += 1
+
+    def _sample(self, thread_name: str, frame, elapsed: float):
+        codes = []
+        scpi = "-"
+        stage = "-"
+        depth = 0
+        while frame is not None and depth < MAX_DEPTH:
+            code = frame.f_code
+            codes.append(code)
+            name = code.co_name
+            if stage == "-" and (name in STAGE_FUNCTIONS or name.startswith(STAGE_PREFIX)):
+                stage = name
+            if scpi == "-" and name == "scrape_scpi":
+                produit_id = frame.f_locals.get("produit_id")
+                scpi = str(produit_id) if produit_id is not None else "-"
+            frame = frame.f_back
+            depth += 1
+        key = (thread_name, scpi, stage, tuple(self._label(code) for code in reversed(codes)))
+        self.stacks[key] += 1
+        self.times[key] += elapsed
+
+    # --- Rapports -------------------------------------------------------------------
+
+    def collapsed(self) -> List[str]:
+        """Piles repliées (format flamegraph.pl / speedscope / inferno), une ligne par pile"""
+        lines = []
+        for (thread, scpi, stage, stack), count in self.stacks.items():
+            frames = [f"thread {thread}", f"scpi {scpi}", f"etape {stage}"] + [f.replace(";", ",") for f in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return sorted(lines)
+
+    def top_functions(self, n: int = None) -> List[Tuple[str, float, float]]:
+        """Fonctions les plus coûteuses : (fonction, temps propre, temps cumulé) en secondes"""
+        own, total = Counter(), Counter()
+        for (_, _, _, stack), seconds in self.times.items():
+            if stack:
+                own[stack[-1]] += seconds
+            for label in set(stack):
+                total[label] += seconds
+        ranked = sorted(total, key=lambda label: (own[label], total[label]), reverse=True)
+        return [(label, own[label], total[label]) for label in ranked[:n or self.top_n]]
+
+    def by_scpi_and_stage(self) -> Dict[str, Counter]:
+        """Temps (secondes) par SCPI puis par étape"""
+        result: Dict[str, Counter] = defaultdict(Counter)
+        for (_, scpi, stage, _), seconds in self.times.items():
+            result[scpi][stage] += seconds
+        return result
+
+    def summary(self) -> str:
+        lines = [
+            "🔬 PROFIL D'EXÉCUTION (échantillonnage)",
+            "=" * 80,
+            f"{self.samples} échantillons sur {self.duration:.1f}s (période {self.interval * 1000:.0f} ms)",
+            "",
+            f"{'Propre':>8} {'Cumulé':>8}  Fonction",
+            "-" * 80,
+        ]
+        for label, own, total in self.top_functions():
+            lines.append(f"{own:>7.2f}s {total:>7.2f}s  {label}")
+
+        lines += ["", f"{'SCPI':<8} {'Étape':<34} {'Temps':>8}", "-" * 80]
+        for scpi, stages in sorted(self.by_scpi_and_stage().items()):
+            for stage, seconds in stages.most_common():
+                lines.append(f"{scpi:<8} {stage:<34} {seconds:>7.2f}s")
+        return "\n".join(lines)
+
+    def write(self, prefix: str = None) -> Tuple[str, str]:
+        """
+        Écrit les piles repliées (.folded) et le résumé (.txt)
+
+        Returns:
+            Tuple des deux chemins
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = prefix or f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        folded_path = os.path.join(self.output_dir, prefix + ".folded")
+        summary_path = os.path.join(self.output_dir, prefix + ".txt")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n")
+        return folded_path, summary_path
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banc de montée en charge du pipeline multi-SCPI
+Lance les vrais chemins batch de main.py (--worker sur une file, --multiple) contre
+le serveur synthétique et mesure débit, latence de queue, CPU et mémoire selon le
+nombre de workers et la taille de la liste ; --contexts compare un seul worker dont
+les SCPI partagent un Chrome à contextes isolés (browser_contexts)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+try:
+    import psutil
+except ImportError:  # CPU et mémoire via getrusage en repli (pic du plus gros processus)
+    psutil = None
+try:
+    import resource
+except ImportError:  # Windows sans psutil : ni CPU ni mémoire
+    resource = None
+
+import numpy as np
+
+from config_scraper import scraper_config
+from mock_scpi_server import start_server
+from work_queue import SQLiteWorkQueue
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(REPO_DIR, "main.py")
+
+
+class _TreeSampler(threading.Thread):
+    """Échantillonne CPU et mémoire des workers et de leurs Chrome (psutil)"""
+
+    def __init__(self, pids: List[int], interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.roots = [psutil.Process(pid) for pid in pids]
+        self.interval = interval
+        self.peak_rss = 0
+        self.cpu_seconds: Dict[int, float] = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = 0
+            for root in self.roots:
+                try:
+                    tree = [root] + root.children(recursive=True)
+                except psutil.NoSuchProcess:
+                    continue
+                for proc in tree:
+                    try:
+                        rss += proc.memory_info().rss
+                        times = proc.cpu_times()
+                        self.cpu_seconds[proc.pid] = times.user + times.system
+                    except psutil.NoSuchProcess:
+                        pass
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _write_config(workdir: str, base_url: str, overrides: dict) -> str:
+    """Configuration isolée : file, profils et captures dans le dossier du scénario"""
+    config = dict(scraper_config.config)
+    config.update({
+        "base_url": base_url,
+        "queue_path": os.path.join(workdir, "queue.db"),
+        "profile_dir": os.path.join(workdir, "chrome_profiles"),
+        "diagnostics_dir": os.path.join(workdir, "diagnostics"),
+        "archive_path": os.path.join(workdir, "page_archive"),
+        "record_pages": False,
+        "quiet_mode": True,
+    })
+    config.update(overrides)
+    path = os.path.join(workdir, "scraper_config.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _run_processes(commands: List[List[str]], env: dict, log_path: str) -> dict:
+    """Lance les processus en parallèle, attend leur fin et mesure CPU/mémoire"""
+    start = time.perf_counter()
+    with open(log_path, "ab") as log:
+        procs = [subprocess.Popen(cmd, cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+                 for cmd in commands]
+        sampler = None
+        if psutil is not None:
+            sampler = _TreeSampler([p.pid for p in procs])
+            sampler.start()
+        for proc in procs:
+            proc.wait()
+        wall = time.perf_counter() - start
+    if sampler is not None:
+        sampler.stop()
+        cpu = sum(sampler.cpu_seconds.values())
+        peak_mb = sampler.peak_rss / 1024 / 1024
+    elif resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = usage.ru_utime + usage.ru_stime  # Cumulé depuis le début du banc
+        peak_mb = usage.ru_maxrss / 1024  # Ko sous Linux
+    else:
+        cpu = peak_mb = float("nan")
+    return {"wall": wall, "cpu_seconds": cpu, "peak_rss_mb": peak_mb,
+            "exit_codes": [p.returncode for p in procs]}
+
+
+def _latencies(queue_path: str) -> np.ndarray:
+    conn = sqlite3.connect(queue_path)
+    try:
+        rows = conn.execute("SELECT duration FROM results WHERE duration IS NOT NULL").fetchall()
+    finally:
+        conn.close()
+    return np.array([row[0] for row in rows], dtype=float)
+
+
+def _summary(scenario: dict, measures: dict, latencies: np.ndarray, failed: int) -> dict:
+    done = int(latencies.size)
+    percentiles = np.percentile(latencies, [50, 95, 99]) if done else [float("nan")] * 3
+    return {
+        **scenario,
+        "reussies": done,
+        "echouees": failed,
+        "duree_s": round(measures["wall"], 2),
+        "debit_scpi_min": round(60 * done / measures["wall"], 2) if measures["wall"] else 0.0,
+        "p50_s": round(float(percentiles[0]), 2),
+        "p95_s": round(float(percentiles[1]), 2),
+        "p99_s": round(float(percentiles[2]), 2),
+        "cpu_s": round(measures["cpu_seconds"], 1),
+        "rss_max_mo": round(measures["peak_rss_mb"], 1),
+    }
+
+
+def run_worker_scenario(base_url: str, workers: int, size: int, overrides: dict = None,
+                        contexts: int = None) -> dict:
+    """
+    Met size SCPI synthétiques en file et les fait traiter par `workers` processus
+    `python main.py --worker DB --quiet`, chacun avec `contexts` contextes isolés si précisé
+    """
+    overrides = dict(overrides or {})
+    if contexts:
+        overrides["browser_contexts"] = contexts
+    contexts = overrides.get("browser_contexts", 1)
+    workdir = tempfile.mkdtemp(prefix=f"scpi-charge-w{workers}-c{contexts}-n{size}-")
+    env = dict(os.environ, SCPI_SCRAPER_CONFIG=_write_config(workdir, base_url, overrides))
+    queue_path = os.path.join(workdir, "queue.db")
+    SQLiteWorkQueue(queue_path).enqueue(range(1, size + 1))
+
+    command = [sys.executable, MAIN_SCRIPT, "--worker", queue_path, "--quiet"]
+    measures = _run_processes([command] * workers, env, os.path.join(workdir, "workers.log"))
+    failed = SQLiteWorkQueue(queue_path).stats().get("failed", 0)
+    mode = "contextes" if contexts > 1 else "worker"
+    return _summary({"mode": mode, "workers": workers, "contextes": contexts, "scpi": size, "dossier": workdir},
+                    measures, _latencies(queue_path), failed)
+
+
+def _multiple_latencies(log_path: str):
+    """Durée de chaque SCPI réussie et nombre d'échecs, lus dans le journal JSON de --multiple"""
+    durations, failed = [], 0
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Résumé final affiché hors journal
+            if "produit_id" not in event:
+                continue
+            if event["level"] == "ERROR":
+                failed += 1
+            elif "duree" in event and "Extraction réussie" in event["msg"]:
+                durations.append(event["duree"])
+    return np.array(durations, dtype=float), failed
+
+
+def run_multiple_scenario(base_url: str, size: int = None, overrides: dict = None) -> dict:
+    """
+    Référence séquentielle : `python main.py --multiple --ids 1-size` (SCPI_LIST si size est None)
+
+    Le journal JSON du processus donne la durée réelle de chaque SCPI.
+    """
+    workdir = tempfile.mkdtemp(prefix=f"scpi-charge-multiple-n{size or 'liste'}-")
+    log_path = os.path.join(workdir, "multiple.jsonl")
+    overrides = dict(overrides or {}, log_format="json", log_file=log_path, log_level="INFO")
+    env = dict(os.environ, SCPI_SCRAPER_CONFIG=_write_config(workdir, base_url, overrides))
+    # Sans --quiet : les événements INFO portent la durée de chaque SCPI (journal en fichier, pas de console)
+    command = [sys.executable, MAIN_SCRIPT, "--multiple"] + (["--ids", f"1-{size}"] if size else [])
+    measures = _run_processes([command], env, os.path.join(workdir, "multiple.log"))
+    latencies, failed = _multiple_latencies(log_path)
+    if size is None:
+        from main import SCPI_LIST
+        size = len(SCPI_LIST)
+    return _summary({"mode": "multiple", "workers": 1, "scpi": size, "dossier": workdir},
+                    measures, latencies, failed)
+
+
+def print_report(rows: List[dict]):
+    print(f"\n{'Mode':<9} {'Workers':>7} {'Ctx':>4} {'SCPI':>6} {'OK':>5} {'KO':>4} {'Durée':>8} "
+          f"{'SCPI/min':>9} {'p50':>6} {'p95':>6} {'p99':>6} {'CPU s':>7} {'RSS Mo':>8}")
+    print("-" * 101)
+    for row in rows:
+        print(f"{row['mode']:<9} {row['workers']:>7} {row.get('contextes', 1):>4} {row['scpi']:>6} "
+              f"{row['reussies']:>5} {row['echouees']:>4} {row['duree_s']:>7.1f}s {row['debit_scpi_min']:>9.2f} "
+              f"{row['p50_s']:>6.2f} {row['p95_s']:>6.2f} {row['p99_s']:>6.2f} {row['cpu_s']:>7.1f} "
+              f"{row['rss_max_mo']:>8.1f}")
+
+
+def _parse_overrides(items: List[str]) -> dict:
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[key] = value
+    return overrides
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de montée en charge contre le serveur synthétique")
+    parser.add_argument("--workers", default="1,2,4", help="nombres de workers (ex: 1,2,4)")
+    parser.add_argument("--contexts", help="compare un worker à N contextes isolés (ex: 1,2,4)")
+    parser.add_argument("--sizes", default="10,50", help="tailles de liste (ex: 10,50,200)")
+    parser.add_argument("--multiple", action="store_true",
+                        help="ajoute la référence main.py --multiple (même tailles de liste)")
+    parser.add_argument("--latency", type=float, default=0.2, help="latence moyenne du serveur (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="écart type log-normal de la latence")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 500/429")
+    parser.add_argument("--page-kb", type=float, default=150, help="taille de remplissage des pages (Ko)")
+    parser.add_argument("--set", action="append", default=[], metavar="CLE=VALEUR",
+                        help="surcharge de configuration (ex: --set rate_initial_interval=0)")
+    parser.add_argument("--json", help="écrit le rapport dans ce fichier")
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    sizes = [int(n) for n in args.sizes.split(",")]
+    overrides = _parse_overrides(args.set)
+    server = start_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          page_size=int(args.page_kb * 1024), count=max(sizes + [100]))
+
+    print("🧪 BANC DE MONTÉE EN CHARGE SCPI")
+    print("=" * 50)
+    print(f"🌐 Serveur synthétique: {server.base_url} (latence {args.latency}s, "
+          f"erreurs {args.error_rate:.0%}, pages {args.page_kb:.0f} Ko)")
+    if psutil is None:
+        print("   💡 psutil absent : CPU cumulé et pic mémoire du plus gros processus seulement"
+              if resource is not None else "   💡 psutil absent : ni CPU ni mémoire sous Windows")
+
+    rows = []
+    for size in sizes:
+        if args.multiple:
+            print(f"▶️  main.py --multiple, {size} SCPI")
+            rows.append(run_multiple_scenario(server.base_url, size, overrides))
+        for workers in worker_counts:
+            print(f"▶️  {workers} worker(s), {size} SCPI")
+            rows.append(run_worker_scenario(server.base_url, workers, size, overrides))
+        for contexts in [int(n) for n in args.contexts.split(",")] if args.contexts else []:
+            print(f"▶️  1 worker, {contexts} contexte(s) dans un Chrome, {size} SCPI")
+            rows.append(run_worker_scenario(server.base_url, 1, size, overrides, contexts=contexts))
+
+    print_report(rows)
+    print(f"\n📊 {server.requests} requêtes servies, {server.errors} erreurs simulées")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametres": vars(args), "scenarios": rows}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapport écrit dans {args.json}")
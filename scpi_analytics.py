@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analyses vectorisées de l'historique des SCPI
+Charge les extractions successives dans des tableaux NumPy (une ligne par
+SCPI et par extraction) et calcule les indicateurs pour toutes les SCPI à la fois
+"""
+
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from french_parsing import parse_amounts
+from scpi_dataclasses import SCPIData, SCPIEvenementClé
+
+# Colonnes numériques suivies dans l'historique
+COLUMNS = ("prix_part_actuel", "prix_part_vente", "valeur_reconstitution",
+           "dividende_brut_annuel", "acompte_brut", "nb_actualites")
+
+# Montants affichés en texte ("4 174 M€", "[255,50M€]"), convertis en euros par lot
+AMOUNT_COLUMNS = ("capitalisation", "collecte_brute", "collecte_nette", "liste_attente")
+
+TRIMESTRE_RE = re.compile(r"T([1-4])-(\d{4})")
+
+
+def _quarter_index(data: SCPIData) -> int:
+    """Index de trimestre (année * 4 + trimestre - 1), depuis le libellé ou la date"""
+    trimestre = data.trimestre_info.trimestre if data.trimestre_info else None
+    match = TRIMESTRE_RE.match(trimestre or "")
+    if match:
+        return int(match.group(2)) * 4 + int(match.group(1)) - 1
+    return data.date_extraction.year * 4 + (data.date_extraction.month - 1) // 3
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else value
+
+
+@dataclass
+class SnapshotTable:
+    """Historique au format long : une ligne par SCPI et par extraction"""
+    produit_id: np.ndarray  # int64
+    quarter: np.ndarray  # int64, année * 4 + trimestre - 1
+    date: np.ndarray  # datetime64[D]
+    values: Dict[str, np.ndarray]  # float64, NaN si absent
+
+    @classmethod
+    def from_scpi_data(cls, history: List[SCPIData]) -> "SnapshotTable":
+        """Charge une liste de SCPIData (ex: SQLiteWorkQueue.results(latest_only=False))"""
+        n = len(history)
+        produit_id = np.empty(n, dtype=np.int64)
+        quarter = np.empty(n, dtype=np.int64)
+        dates = np.empty(n, dtype="datetime64[D]")
+        columns = {name: np.empty(n, dtype=np.float64) for name in COLUMNS}
+        amounts = {name: [None] * n for name in AMOUNT_COLUMNS}
+        for i, data in enumerate(history):
+            chiffres, trimestre = data.chiffres_cles, data.trimestre_info
+            produit_id[i] = data.produit_id if data.produit_id is not None else -1
+            quarter[i] = _quarter_index(data)
+            dates[i] = np.datetime64(data.date_extraction.date(), "D")
+            columns["prix_part_actuel"][i] = _nan(chiffres.prix_part_actuel if chiffres else None)
+            columns["prix_part_vente"][i] = _nan(chiffres.prix_part_vente if chiffres else None)
+            columns["valeur_reconstitution"][i] = _nan(chiffres.valeur_reconstitution if chiffres else None)
+            columns["dividende_brut_annuel"][i] = _nan(chiffres.dividende_brut_annuel if chiffres else None)
+            columns["acompte_brut"][i] = _nan(trimestre.acompte_brut if trimestre else None)
+            columns["nb_actualites"][i] = len(data.actualites) if data.has_section("actualites") else np.nan
+            if chiffres:
+                amounts["capitalisation"][i] = chiffres.capitalisation
+            if trimestre:
+                amounts["collecte_brute"][i] = trimestre.collecte_brute
+                amounts["collecte_nette"][i] = trimestre.collecte_nette
+                amounts["liste_attente"][i] = trimestre.liste_attente
+        columns.update({name: parse_amounts(texts) for name, texts in amounts.items()})
+        return cls(produit_id, quarter, dates, columns)
+
+    def to_grid(self) -> "QuarterGrid":
+        """Pivote l'historique en tableaux (SCPI x trimestre), dernière extraction du trimestre"""
+        order = np.lexsort((self.date, self.quarter, self.produit_id))
+        pid, quarter = self.produit_id[order], self.quarter[order]
+        # Garde la dernière extraction de chaque couple (SCPI, trimestre)
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (pid[1:] != pid[:-1]) | (quarter[1:] != quarter[:-1])
+        order, pid, quarter = order[last], pid[last], quarter[last]
+
+        produit_ids, rows = np.unique(pid, return_inverse=True)
+        first_quarter = quarter.min() if len(quarter) else 0
+        n_quarters = int(quarter.max() - first_quarter + 1) if len(quarter) else 0
+        cols = quarter - first_quarter
+
+        values = {}
+        for name, column in self.values.items():
+            grid = np.full((len(produit_ids), n_quarters), np.nan)
+            grid[rows, cols] = column[order]
+            values[name] = grid
+        dates = np.full((len(produit_ids), n_quarters), np.datetime64("NaT"), dtype="datetime64[D]")
+        dates[rows, cols] = self.date[order]
+        return QuarterGrid(produit_ids, first_quarter + np.arange(n_quarters), dates, values)
+
+
+@dataclass
+class QuarterGrid:
+    """Historique pivoté : une ligne par SCPI, une colonne par trimestre"""
+    produit_ids: np.ndarray
+    quarters: np.ndarray
+    dates: np.ndarray
+    values: Dict[str, np.ndarray]
+
+    def quarter_label(self, column: int) -> str:
+        quarter = int(self.quarters[column])
+        return f"T{quarter % 4 + 1}-{quarter // 4}"
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Propage la dernière valeur connue le long des trimestres"""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = values[np.arange(values.shape[0])[:, None], index]
+    return filled
+
+
+def previous_known(values: np.ndarray) -> np.ndarray:
+    """Valeur connue précédente (NaN pour la première colonne)"""
+    shifted = np.full_like(values, np.nan)
+    shifted[:, 1:] = forward_fill(values)[:, :-1]
+    return shifted
+
+
+def pct_change(values: np.ndarray) -> np.ndarray:
+    """Variation en % par rapport à la valeur connue précédente"""
+    previous = previous_known(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (values - previous) / previous * 100
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Somme glissante (NaN tant que la fenêtre n'est pas complète)"""
+    result = np.full_like(values, np.nan)
+    if values.shape[1] >= window:
+        result[:, window - 1:] = sliding_window_view(values, window, axis=1).sum(axis=-1)
+    return result
+
+
+def rolling_slope(values: np.ndarray, window: int) -> np.ndarray:
+    """Pente des moindres carrés sur une fenêtre glissante (unité par trimestre)"""
+    x = np.arange(window) - (window - 1) / 2
+    weights = x / (x ** 2).sum()
+    result = np.full_like(values, np.nan)
+    if values.shape[1] >= window:
+        result[:, window - 1:] = sliding_window_view(values, window, axis=1) @ weights
+    return result
+
+
+def compute_metrics(grid: QuarterGrid, change_tolerance: float = 0.01) -> Dict[str, np.ndarray]:
+    """
+    Calcule les indicateurs pour toutes les SCPI et tous les trimestres
+
+    Returns:
+        dict de tableaux (SCPI x trimestre):
+            rendement_4t: somme des 4 derniers acomptes / prix de part (%)
+            variation_prix: variation du prix de part (%)
+            changement_prix: booléen, prix de part modifié
+            decote_reconstitution: écart prix / valeur de reconstitution (%)
+            variation_acompte: variation de l'acompte trimestriel (%)
+            tendance_acompte: pente de l'acompte sur 4 trimestres (€/trimestre)
+            variation_reconstitution: variation de la valeur de reconstitution (%)
+    """
+    prix = grid.values["prix_part_actuel"]
+    acompte = grid.values["acompte_brut"]
+    reconstitution = grid.values["valeur_reconstitution"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rendement_4t = rolling_sum(acompte, 4) / forward_fill(prix) * 100
+        decote = (prix / reconstitution - 1) * 100
+
+    variation_prix = pct_change(prix)
+    variation_acompte = pct_change(acompte)
+    variation_reconstitution = pct_change(reconstitution)
+    return {
+        "rendement_4t": rendement_4t,
+        "variation_prix": variation_prix,
+        "changement_prix": np.abs(np.nan_to_num(variation_prix)) > change_tolerance,
+        "decote_reconstitution": decote,
+        "variation_acompte": variation_acompte,
+        "tendance_acompte": rolling_slope(acompte, 4),
+        "variation_reconstitution": variation_reconstitution,
+    }
+
+
+def _format_pct(value: float) -> str:
+    return f"{value:+.2f}%".replace(".", ",")
+
+
+def derive_events(grid: QuarterGrid, metrics: Dict[str, np.ndarray] = None,
+                  change_tolerance: float = 0.01) -> Dict[int, List[SCPIEvenementClé]]:
+    """
+    Déduit les événements clés (prix, dividende, reconstitution) des changements détectés
+
+    Returns:
+        dict produit_id -> événements, du plus récent au plus ancien
+    """
+    metrics = metrics or compute_metrics(grid, change_tolerance)
+    sources = (
+        ("Prix de part", "prix_part_actuel", "variation_prix"),
+        ("Dividende", "acompte_brut", "variation_acompte"),
+        ("Reconstitution", "valeur_reconstitution", "variation_reconstitution"),
+    )
+    events: Dict[int, List[tuple]] = {int(pid): [] for pid in grid.produit_ids}
+    for type_evenement, column, metric in sources:
+        variation = metrics[metric]
+        values = grid.values[column]
+        previous = previous_known(values)
+        rows, cols = np.nonzero(np.abs(np.nan_to_num(variation)) > change_tolerance)
+        for row, col in zip(rows, cols):
+            change = variation[row, col]
+            event_date = grid.dates[row, col].astype(object)
+            quarter = int(grid.quarters[col])
+            events[int(grid.produit_ids[row])].append((event_date, SCPIEvenementClé(
+                date=event_date.strftime("%d-%m-%y"),
+                type_evenement=type_evenement,
+                description=f"{'Hausse' if change > 0 else 'Baisse'} : {_format_pct(change)}",
+                valeur_avant=f"{previous[row, col]:.2f} €/part",
+                valeur_apres=f"{values[row, col]:.2f} €/part",
+                variation=_format_pct(change),
+                document_lie=f"BT{quarter % 4 + 1} {quarter // 4}" if type_evenement == "Dividende" else None
+            )))
+    return {
+        pid: [event for _, event in sorted(items, key=lambda item: item[0], reverse=True)]
+        for pid, items in events.items()
+    }
+
+
+def latest_summary(grid: QuarterGrid, metrics: Dict[str, np.ndarray]) -> List[dict]:
+    """Derniers indicateurs connus de chaque SCPI"""
+    last = {name: forward_fill(values)[:, -1] for name, values in metrics.items()
+            if values.dtype != bool}
+    return [
+        {"produit_id": int(pid), **{name: float(values[i]) for name, values in last.items()}}
+        for i, pid in enumerate(grid.produit_ids)
+    ]
+
+
+def benchmark(n_scpi: int = 1000, n_years: int = 10, seed: int = 0) -> float:
+    """Mesure le temps de calcul pour n_scpi SCPI sur n_years années d'historique"""
+    rng = np.random.default_rng(seed)
+    n_quarters = n_years * 4
+    n = n_scpi * n_quarters
+    prix = np.repeat(rng.uniform(150, 1100, n_scpi), n_quarters)
+    prix *= np.where(rng.random(n) < 0.03, rng.uniform(0.8, 1.1, n), 1.0)
+    values = {
+        "prix_part_actuel": prix,
+        "prix_part_vente": prix * 0.9,
+        "valeur_reconstitution": prix * np.repeat(rng.uniform(0.9, 1.2, n_scpi), n_quarters),
+        "dividende_brut_annuel": prix * 0.045,
+        "acompte_brut": np.round(prix * 0.011, 2),
+        "nb_actualites": rng.integers(0, 10, n).astype(np.float64),
+    }
+    quarter = np.tile(2015 * 4 + np.arange(n_quarters), n_scpi)
+    table = SnapshotTable(
+        produit_id=np.repeat(np.arange(n_scpi, dtype=np.int64), n_quarters),
+        quarter=quarter,
+        date=(np.datetime64("1970-01-01", "D") + ((quarter // 4 - 1970) * 365 + (quarter % 4) * 91)),
+        values=values
+    )
+    start = time.perf_counter()
+    grid = table.to_grid()
+    metrics = compute_metrics(grid)
+    events = derive_events(grid, metrics)
+    duration = time.perf_counter() - start
+    n_events = sum(len(items) for items in events.values())
+    print(f"⏱️ {n_scpi} SCPI x {n_years} ans: {duration * 1000:.1f} ms ({n_events} événements détectés)")
+    return duration
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark()
+    else:
+        print("Usage: python scpi_analytics.py --benchmark")
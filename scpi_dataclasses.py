@@ -1,17 +1,17 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 
 @dataclass
 class SCPIGeneralInfo:
     """Informations générales de la SCPI"""
-    nom: str
-    societe_gestion: str
-    statut: str  # Ex: "Ouverte", "Fermée"
-    type_capital: str  # Ex: "CAPITAL VARIABLE", "CAPITAL FIXE"
-    type_actifs: str  # Ex: "Bureaux", "Commerces"
-    localisation_principale: str  # Ex: "IDF - 37.59 %"
-    annee_creation: int
+    nom: Optional[str]
+    societe_gestion: Optional[str]
+    statut: Optional[str]  # Ex: "Ouverte", "Fermée"
+    type_capital: Optional[str]  # Ex: "CAPITAL VARIABLE", "CAPITAL FIXE"
+    type_actifs: Optional[str]  # Ex: "Bureaux", "Commerces"
+    localisation_principale: Optional[str]  # Ex: "IDF - 37.59 %"
+    annee_creation: Optional[int]
     agrement_amf: Optional[str] = None
     telephone_contact: Optional[str] = None
     email_contact: Optional[str] = None
@@ -20,56 +20,56 @@ class SCPIGeneralInfo:
 class SCPIChiffresClés:
     """Chiffres clés de la SCPI"""
     # Capitalisation et parts
-    capitalisation: str  # Ex: "4 174 M€"
-    nb_associes: int
-    prix_part_actuel: float  # En euros (prix d'achat)
-    prix_part_vente: float  # En euros (prix de vente/retrait)
-    date_prix_part: str
+    capitalisation: Optional[str]  # Ex: "4 174 M€"
+    nb_associes: Optional[int]
+    prix_part_actuel: Optional[float]  # En euros (prix d'achat)
+    prix_part_vente: Optional[float]  # En euros (prix de vente/retrait)
+    date_prix_part: Optional[str]
     
     # Distribution
-    dividende_brut_annuel: float  # En euros par part
-    taux_distribution_brut: float  # En pourcentage
-    dividende_net_annuel: float  # En euros par part
-    taux_distribution_net: float  # En pourcentage
+    dividende_brut_annuel: Optional[float]  # En euros par part
+    taux_distribution_brut: Optional[float]  # En pourcentage
+    dividende_net_annuel: Optional[float]  # En euros par part
+    taux_distribution_net: Optional[float]  # En pourcentage
     
     # Valorisation
-    report_nouveau: float  # En pourcentage
-    report_nouveau_euros: float  # En euros par part
-    valeur_reconstitution: float  # En euros
-    ratio_reconstitution: float  # En pourcentage
+    report_nouveau: Optional[float]  # En pourcentage
+    report_nouveau_euros: Optional[float]  # En euros par part
+    valeur_reconstitution: Optional[float]  # En euros
+    ratio_reconstitution: Optional[float]  # En pourcentage
     
     # Patrimoine
-    nb_immeubles: int
-    surface_totale: int  # En m²
+    nb_immeubles: Optional[int]
+    surface_totale: Optional[int]  # En m²
     repartition_sectorielle: dict  # Ex: {"Bureaux": 71, "Commerces": 20}
     repartition_geographique: dict  # Ex: {"Ile-de-France": 38, "Regions": 45}
     
     # Ratios
-    ratio_engagement: float  # En pourcentage
+    ratio_engagement: Optional[float]  # En pourcentage
     tof_aspim: Optional[float] = None  # En pourcentage
     tof_exploitation: Optional[float] = None  # En pourcentage
 
 @dataclass
 class SCPITrimestreInfo:
     """Informations du dernier trimestre"""
-    trimestre: str  # Ex: "T1-2025"
+    trimestre: Optional[str]  # Ex: "T1-2025"
     
     # Collecte
-    collecte_brute: str  # Ex: "1,33 M€"
-    collecte_nette: str  # Ex: "-" ou montant
+    collecte_brute: Optional[str]  # Ex: "1,33 M€"
+    collecte_nette: Optional[str]  # Ex: "-" ou montant
     
     # Transactions
-    nb_acquisitions: int
-    montant_acquisitions: str
-    nb_cessions: int
-    montant_cessions: str
+    nb_acquisitions: Optional[int]
+    montant_acquisitions: Optional[str]
+    nb_cessions: Optional[int]
+    montant_cessions: Optional[str]
     
     # Distribution
-    acompte_brut: float  # En euros par part
+    acompte_brut: Optional[float]  # En euros par part
     
     # Délai et liquidité
-    delai_cession: str
-    liste_attente: str  # Ex: "[255,50M€]"
+    delai_cession: Optional[str]
+    liste_attente: Optional[str]  # Ex: "[255,50M€]"
     
     # Ratios trimestriels
     tof_aspim_trimestre: Optional[float] = None
@@ -95,6 +95,71 @@ class SCPIActualité:
     resume: str  # Résumé de l'actualité
     lien: Optional[str] = None  # Lien vers le document complet
 
+# Sections extractibles, dans l'ordre des extracteurs
+ALL_SECTIONS = ("general_info", "chiffres_cles", "trimestre_info", "evenements_cles", "actualites")
+
+# Statut d'extraction d'une section (SCPIData.section_status)
+SECTION_OK = "ok"  # Tous les champs trouvés
+SECTION_PARTIAL = "partial"  # Certains champs introuvables (à None)
+SECTION_MISSING = "missing"  # Rien trouvé sur la page
+SECTION_ERROR = "error"  # Erreur pendant l'extraction
+SECTION_TIMEOUT = "timeout"  # Budget de temps de la section épuisé
+
+
+class UnfetchedSection:
+    """
+    Section non demandée lors de l'extraction
+
+    Se comporte comme une section vide : chaque champ vaut None, la liste est vide
+    et la section est fausse dans un test (if data.chiffres_cles: ...).
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return None
+
+    def __bool__(self):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __getitem__(self, index):
+        return [][index]
+
+    def __repr__(self):
+        return "<section non extraite>"
+
+    def __reduce__(self):
+        return "NOT_FETCHED"  # Singleton conservé au travers de pickle
+
+
+NOT_FETCHED = UnfetchedSection()
+
+
+def normalize_sections(sections: Union[str, Iterable[str], None]) -> Tuple[str, ...]:
+    """
+    Valide une liste de sections ("chiffres_cles,trimestre_info" ou itérable)
+
+    Returns:
+        Tuple des sections dans l'ordre de ALL_SECTIONS (toutes si sections est None)
+    """
+    if sections is None:
+        return ALL_SECTIONS
+    if isinstance(sections, str):
+        sections = [name.strip() for name in sections.split(",") if name.strip()]
+    requested = set(sections)
+    unknown = requested - set(ALL_SECTIONS)
+    if unknown:
+        raise ValueError(f"Sections inconnues: {', '.join(sorted(unknown))} "
+                         f"(disponibles: {', '.join(ALL_SECTIONS)})")
+    return tuple(name for name in ALL_SECTIONS if name in requested)
+
+
 @dataclass
 class SCPIData:
     """Classe principale regroupant toutes les données d'une SCPI"""
@@ -107,7 +172,56 @@ class SCPIData:
     # Métadonnées
     date_extraction: datetime
     url_source: str
-    
+    produit_id: Optional[int] = None
+    sections: Tuple[str, ...] = ALL_SECTIONS  # Sections effectivement extraites
+    section_status: Dict[str, str] = field(default_factory=dict)  # Section demandée -> SECTION_*
+    section_timings: Dict[str, float] = field(default_factory=dict)  # Section demandée -> secondes
+
+    def has_section(self, name: str) -> bool:
+        """Vrai si la section a été demandée et extraite"""
+        return name in self.sections
+
+    @property
+    def missing_sections(self) -> List[str]:
+        """Sections demandées mais non obtenues (introuvables, en erreur ou hors budget)"""
+        return [name for name in self.section_status if not self.has_section(name)]
+
+    def to_dict(self) -> dict:
+        """Convertit les données en dictionnaire sérialisable (JSON), None pour les sections non extraites"""
+        data = {
+            "general_info": asdict(self.general_info) if self.has_section("general_info") else None,
+            "chiffres_cles": asdict(self.chiffres_cles) if self.has_section("chiffres_cles") else None,
+            "trimestre_info": asdict(self.trimestre_info) if self.has_section("trimestre_info") else None,
+            "evenements_cles": [asdict(e) for e in self.evenements_cles] if self.has_section("evenements_cles") else None,
+            "actualites": [asdict(a) for a in self.actualites] if self.has_section("actualites") else None,
+            "date_extraction": self.date_extraction.isoformat(),
+            "url_source": self.url_source,
+            "produit_id": self.produit_id,
+            "sections": list(self.sections),
+            "section_status": dict(self.section_status),
+            "section_timings": dict(self.section_timings),
+        }
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SCPIData":
+        """Reconstruit un SCPIData depuis le résultat de to_dict()"""
+        def section(name, build):
+            return NOT_FETCHED if data.get(name) is None else build(data[name])
+
+        return cls(
+            general_info=section("general_info", lambda d: SCPIGeneralInfo(**d)),
+            chiffres_cles=section("chiffres_cles", lambda d: SCPIChiffresClés(**d)),
+            trimestre_info=section("trimestre_info", lambda d: SCPITrimestreInfo(**d)),
+            evenements_cles=section("evenements_cles", lambda d: [SCPIEvenementClé(**e) for e in d]),
+            actualites=section("actualites", lambda d: [SCPIActualité(**a) for a in d]),
+            date_extraction=datetime.fromisoformat(data["date_extraction"]),
+            url_source=data["url_source"],
+            produit_id=data.get("produit_id"),
+            sections=normalize_sections(data.get("sections")),
+            section_status=data.get("section_status") or {},
+            section_timings=data.get("section_timings") or {}
+        )
 
     def print_summary(self):
         """Affiche un résumé des données extraites"""
@@ -117,7 +231,8 @@ class SCPIData:
         print(f"Prix de vente: {self.chiffres_cles.prix_part_vente}€")
         print(f"Distribution brute 2024: {self.chiffres_cles.taux_distribution_brut}% ({self.chiffres_cles.dividende_brut_annuel}€)")
         print(f"Capitalisation: {self.chiffres_cles.capitalisation}")
-        print(f"Nombre d'associés: {self.chiffres_cles.nb_associes:,}")
+        nb_associes = self.chiffres_cles.nb_associes
+        print(f"Nombre d'associés: {f'{nb_associes:,}' if nb_associes is not None else 'N/A'}")
         print(f"\nDernier trimestre ({self.trimestre_info.trimestre}):")
         print(f"  Collecte brute: {self.trimestre_info.collecte_brute}")
         print(f"  Acompte distribué: {self.trimestre_info.acompte_brut}€/part")
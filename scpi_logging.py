@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journalisation structurée du scraper SCPI
+Les messages sont filtrés par niveau puis déposés dans une file ; un thread dédié
+les formate et les écrit, le thread de scraping ne fait jamais d'entrée/sortie.
+Avant setup_logging() (scraper utilisé comme bibliothèque), les messages INFO et
+au-delà sont affichés directement sur la console, comme les anciens print().
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+
+from config_scraper import scraper_config
+
+ROOT_LOGGER = "scpi"
+
+# Attributs standard d'un LogRecord (le reste provient de extra={...})
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_listener_pid = None
+_pretty_output = True
+
+
+class PrettyFormatter(logging.Formatter):
+    """Affichage console historique : le message seul, emojis compris"""
+
+    def format(self, record):
+        return record.getMessage()
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Console courante : sys.stdout relu à chaque message (redirections et captures comprises)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par événement, champs extra inclus (pour les collecteurs de logs)"""
+
+    def format(self, record):
+        event = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                event[key] = value
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+def _default_handler():
+    """Affichage console tant que setup_logging() n'a pas été appelé (remplacé par celui-ci)"""
+    root = logging.getLogger(ROOT_LOGGER)
+    if root.handlers:
+        return
+    handler = _ConsoleHandler()
+    handler.setFormatter(PrettyFormatter())
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, str(scraper_config.get("log_level", "INFO")).upper(), logging.INFO))
+    root.propagate = False
+
+
+_default_handler()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger d'un module (ex: get_logger("scraper") -> "scpi.scraper")"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging(level: str = None, quiet: bool = None, log_format: str = None,
+                  log_file: str = None) -> logging.Logger:
+    """
+    Configure la journalisation (idempotent)
+
+    Args:
+        level: Niveau minimal ("DEBUG", "INFO", ...), par défaut la config "log_level"
+        quiet: Mode silencieux (avertissements et erreurs seulement) pour les lots et démons
+        log_format: "pretty" (console historique) ou "json"
+        log_file: Fichier de sortie au lieu de la console
+
+    Returns:
+        logging.Logger: Logger racine "scpi"
+    """
+    global _listener, _listener_pid, _pretty_output
+    level = level or scraper_config.get("log_level", "INFO")
+    quiet = quiet if quiet is not None else scraper_config.get("quiet_mode", False)
+    log_format = log_format or scraper_config.get("log_format", "pretty")
+    log_file = log_file or scraper_config.get("log_file")
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging.WARNING if quiet else getattr(logging, str(level).upper(), logging.INFO))
+    root.propagate = False
+
+    # Après un fork, le thread d'écriture du parent n'existe pas dans l'enfant
+    if _listener is not None and _listener_pid == os.getpid():
+        _stop_listener(_listener)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if log_file:
+        output = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else PrettyFormatter())
+
+    log_queue = queue.Queue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    _listener_pid = os.getpid()
+    _pretty_output = log_format != "json" and not log_file and root.isEnabledFor(logging.INFO)
+    return root
+
+
+def pretty_output_enabled() -> bool:
+    """Vrai si les rapports détaillés (print_scpi_results) doivent être affichés"""
+    return _pretty_output
+
+
+def flush_logging():
+    """Attend que les messages en file soient écrits (avant un affichage direct sur la console)"""
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.queue.join()
+
+
+def _stop_listener(listener: logging.handlers.QueueListener):
+    """Écrit les messages en file, arrête le thread puis ferme la sortie (fichier de log)"""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def shutdown_logging():
+    """Vide la file et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _stop_listener(_listener)
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -6,27 +6,61 @@ Scraper SCPI optimisé - Affichage uniquement, pas de sauvegarde JSON
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from urllib3.exceptions import HTTPError as TransportError
 import time
-import re
 from datetime import datetime
 from typing import List, Optional
 
 from scpi_dataclasses import (
     SCPIData, SCPIGeneralInfo, SCPIChiffresClés, SCPITrimestreInfo,
-    SCPIEvenementClé, SCPIActualité
+    SCPIEvenementClé, SCPIActualité, NOT_FETCHED, normalize_sections,
+    SECTION_OK, SECTION_PARTIAL, SECTION_MISSING, SECTION_ERROR, SECTION_TIMEOUT
 )
 from config_scraper import scraper_config
+from extraction_schema import (
+    EXTRACTION_PLAN, parse_number, parse_percentage, parse_evenements, parse_actualites
+)
+from rate_controller import rate_controller as shared_rate_controller
+from browser_profile import acquire_profile, cleanup_profiles
+from diagnostics import get_diagnostics_writer
+from scpi_logging import get_logger, setup_logging
+from driver_startup import resolve_binaries, startup_stats, warm_standby
+from network_capture import NetworkCapture
+
+logger = get_logger("scraper")
+
+class ScrapeDeadlineExceeded(Exception):
+    """Chargement de page ou extraction d'une SCPI interrompu par un délai (la SCPI est à remettre en file)"""
+
+def info_page_url(site: str, nom: str, produit_id: int) -> str:
+    """URL de la page informations (actualités), construite à partir du nom de la SCPI"""
+    nom_clean = nom.lower().replace(' ', '-').replace('é', 'e').replace('è', 'e')
+    return f"{site}/scpi/scpi-{nom_clean}-{produit_id}/information"
+
+def is_throttled_title(title: str) -> bool:
+    """Titre d'une page de refus (trop de requêtes)"""
+    title = (title or "").lower()
+    return "429" in title or "too many requests" in title or "trop de requêtes" in title
+
+def is_scpi_title(title: str) -> bool:
+    """Titre d'une page SCPI chargée (critère d'attente du chargement)"""
+    return "SCPI" in (title or "") or "EPARGNE" in (title or "")
 
 class SCPIScraperConfigurable:
-    def __init__(self, headless=None):
+    network_capture = None  # NetworkCapture si capture_network est activé
+    _captured_json = None  # Champs JSON relevés pendant le chargement (browser_contexts), sinon lus sur le driver
+    _page_loaded = True  # Dernière navigation validée (titre SCPI, pas de refus)
+
+    def __init__(self, headless=None, recorder=None, rate_controller=None):
         """
         Initialise le scraper avec configuration
         
         Args:
             headless: Force le mode headless (True/False) ou None pour utiliser la config
+            recorder: PageArchive où enregistrer chaque page chargée (None = selon la config)
+            rate_controller: Contrôleur de débit (None = contrôleur partagé du processus)
         """
         # Utilise la configuration globale ou le paramètre fourni
         if headless is not None:
@@ -34,8 +68,16 @@ class SCPIScraperConfigurable:
         else:
             use_headless = scraper_config.is_headless()
         
+        # Profil persistant réservé pour ce scraper (cache disque conservé entre les exécutions)
+        self.profile = None
+        if scraper_config.get("persistent_profile", True):
+            cleanup_profiles()
+            self.profile = acquire_profile()
+            if self.profile is None:
+                logger.warning("⚠️ Tous les profils Chrome sont occupés, utilisation d'un profil temporaire")
+        
         # Configuration Chrome
-        chrome_options = scraper_config.get_chrome_options()
+        chrome_options = scraper_config.get_chrome_options(self.profile.path if self.profile else None)
         
         # Override du mode headless si spécifié
         if headless is not None:
@@ -44,337 +86,373 @@ class SCPIScraperConfigurable:
             elif not headless and "--headless" in chrome_options.arguments:
                 chrome_options.arguments.remove("--headless")
         
-        service = Service(scraper_config.get("chromedriver_path"))
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.wait = WebDriverWait(self.driver, scraper_config.get("timeout", 30))
+        self._chrome_options = chrome_options
+        self._deadline = None
+        self._section_deadline = None
+        try:
+            self._start_driver()
+        except Exception:
+            if self.profile is not None:
+                self.profile.release()
+            raise
+
+        # Enregistrement des pages pour le rejeu hors ligne
+        if recorder is None and scraper_config.get("record_pages", False):
+            from page_archive import PageArchive
+            recorder = PageArchive(scraper_config.get("archive_path", "page_archive"))
+        self.recorder = recorder
+        self.rate_controller = rate_controller or shared_rate_controller
+        self._source = None
+        if scraper_config.get("capture_network", False):
+            self.network_capture = NetworkCapture()
         
         # Affichage du mode utilisé
         mode = "headless (fenêtre cachée)" if use_headless else "visible (fenêtre affichée)"
-        print(f"🖥️ Chrome démarré en mode {mode}")
+        logger.info("🖥️ Chrome démarré en mode %s", mode)
     
+    def _start_driver(self):
+        """Démarre Chrome avec les délais de chargement et de script configurés"""
+        start = time.perf_counter()
+        driver_path, browser_path = resolve_binaries(self._chrome_options)
+        if browser_path:
+            self._chrome_options.binary_location = browser_path
+        self.driver = webdriver.Chrome(service=Service(driver_path), options=self._chrome_options)
+        startup_stats.record_launch(time.perf_counter() - start)
+        self.page_load_timeout = scraper_config.get("page_load_timeout", 30)
+        script_timeout = scraper_config.get("script_timeout", 10)
+        self.driver.set_page_load_timeout(self.page_load_timeout)
+        self.driver.set_script_timeout(script_timeout)
+        self._current_load_timeout = self.page_load_timeout
+        # Borne aussi les appels HTTP vers chromedriver (chromedriver lui-même figé)
+        client_config = getattr(self.driver.command_executor, "_client_config", None)
+        if client_config is not None:
+            client_config.timeout = max(self.page_load_timeout, script_timeout) + 10
+        self.wait = WebDriverWait(self.driver, scraper_config.get("timeout", 30))
+
+    def _recycle_driver(self):
+        """Remplace un Chrome qui ne répond plus"""
+        logger.warning("♻️ Chrome ne répond plus, redémarrage du navigateur")
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self._start_driver()
+
+    def _remaining(self) -> float:
+        """Temps restant avant le délai de la SCPI en cours ou le budget de la section en cours"""
+        deadlines = [d for d in (self._deadline, getattr(self, "_section_deadline", None)) if d is not None]
+        if not deadlines:
+            return float("inf")
+        return min(deadlines) - time.monotonic()
+
     def extract_number(self, text: str) -> Optional[float]:
         """Extrait un nombre d'un texte"""
-        if not text or text == "-":
-            return None
-        cleaned = re.sub(r'[^\d.,\-]', '', text.replace(' ', ''))
-        if not cleaned:
-            return None
-        try:
-            cleaned = cleaned.replace(',', '.')
-            return float(cleaned)
-        except ValueError:
-            return None
+        return parse_number(text)
     
     def extract_percentage(self, text: str) -> Optional[float]:
         """Extrait un pourcentage d'un texte"""
-        if not text or text == "-":
-            return None
-        match = re.search(r'([\d,.-]+)%', text)
-        if match:
-            try:
-                return float(match.group(1).replace(',', '.'))
-            except ValueError:
-                return None
-        return None
+        return parse_percentage(text)
     
-    def scrape_scpi(self, produit_id: int) -> SCPIData:
-        """Scrape toutes les données d'une SCPI"""
-        base_url = f"https://www.scpi-lab.com/scpi.php?vue=&produit_id={produit_id}"
-        
-        print(f"🔍 Extraction des données pour la SCPI ID {produit_id}...")
-        
-        # 1. Page principale
-        self.driver.get(base_url)
-        self._wait_for_page_load()
-        
-        general_info = self._extract_general_info_simple()
-        chiffres_cles = self._extract_chiffres_cles_simple()
-        trimestre_info = self._extract_trimestre_info_simple()
-        evenements_cles = self._extract_evenements_cles_simple()
+    def scrape_scpi(self, produit_id: int, sections=None) -> SCPIData:
+        """
+        Scrape les données d'une SCPI
+
+        Args:
+            produit_id: ID de la SCPI
+            sections: Sections à extraire (ex: ["chiffres_cles"] ou "chiffres_cles,actualites"),
+                      None = toutes. Les autres restent non extraites (NOT_FETCHED) et leurs
+                      pages ne sont pas chargées.
+        """
+        sections = normalize_sections(sections)
+        site = scraper_config.get("base_url", "https://www.scpi-lab.com").rstrip("/")
+        base_url = f"{site}/scpi.php?vue=&produit_id={produit_id}"
         
-        # 2. Page informations - Actualités
-        actualites = []
+        logger.info("🔍 Extraction des données pour la SCPI ID %s...", produit_id,
+                    extra={"produit_id": produit_id, "sections": list(sections)})
+        session = f"{produit_id}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        self._deadline = time.monotonic() + scraper_config.get("scpi_deadline", 90)
+        self._requested_sections = sections
+        self._produit_id = produit_id
         try:
-            nom_clean = general_info.nom.lower().replace(' ', '-').replace('é', 'e').replace('è', 'e')
-            info_url = f"https://www.scpi-lab.com/scpi/scpi-{nom_clean}-{produit_id}/information"
-            
-            self.driver.get(info_url)
-            self._wait_for_page_load()
-            actualites = self._extract_actualites_simple()
-        except Exception as e:
-            print(f"⚠️ Erreur lors de l'extraction des actualités: {e}")
-        
+            return self._scrape_sections(produit_id, sections, site, base_url, session)
+        finally:
+            self._deadline = None
+
+    def _scrape_sections(self, produit_id: int, sections, site: str, base_url: str, session: str) -> SCPIData:
+        # 1. Page principale (toujours nécessaire : le nom mène à la page informations)
+        # Sans elle aucune section n'est exploitable : ScrapeDeadlineExceeded remonte (SCPI remise en file)
+        self._navigate(base_url)
+        self._after_page_load(produit_id, session, "page_principale")
+        self._read_page()
+
+        # Une section manquée n'empêche pas les autres ; seules celles qui chargent une page ont un budget
+        results, status, timings = {}, {}, {}
+        run = lambda name, extract: self._run_section(produit_id, name, extract, results, status, timings)
+        run("general_info", self._extract_general_info_simple)
+        run("chiffres_cles", self._extract_chiffres_cles_simple)
+        run("trimestre_info", self._extract_trimestre_info_simple)
+        run("evenements_cles", self._extract_evenements_cles_simple)
+
+        # 2. Page informations - Actualités (le nom vient de la page principale)
+        def extract_actualites():
+            info = results.get("general_info") or self._extract_general_info_simple()
+            if not info.nom:
+                raise ValueError("nom de la SCPI introuvable, URL de la page informations inconnue")
+            self._navigate(info_page_url(site, info.nom, produit_id))
+            self._after_page_load(produit_id, session, "informations")
+            self._read_page()
+            return self._extract_actualites_simple()
+        run("actualites", extract_actualites)
+
         return SCPIData(
-            general_info=general_info,
-            chiffres_cles=chiffres_cles,
-            trimestre_info=trimestre_info,
-            evenements_cles=evenements_cles,
-            actualites=actualites,
+            general_info=results.get("general_info", NOT_FETCHED),
+            chiffres_cles=results.get("chiffres_cles", NOT_FETCHED),
+            trimestre_info=results.get("trimestre_info", NOT_FETCHED),
+            evenements_cles=results.get("evenements_cles", NOT_FETCHED),
+            actualites=results.get("actualites", NOT_FETCHED),
             date_extraction=datetime.now(),
-            url_source=base_url
+            url_source=base_url,
+            produit_id=produit_id,
+            sections=normalize_sections(results),
+            section_status=status,
+            section_timings=timings
         )
-    
-    def _wait_for_page_load(self):
-        """Attend le chargement de la page"""
+
+    def _run_section(self, produit_id: int, name: str, extract, results: dict, status: dict, timings: dict):
+        """
+        Extrait une section demandée sous son budget de temps (section_budgets)
+
+        Le budget borne les chargements faits par la section (_navigate, attente des
+        scripts, requêtes JSON directes de capture_network) ; les sections lues sur la
+        page principale déjà chargée n'en ont pas.
+        La section n'est retenue dans results que si quelque chose a été trouvé ;
+        son statut (SECTION_*) et sa durée sont notés dans tous les cas.
+        """
+        if name not in self._requested_sections:
+            return
+        budget = scraper_config.get("section_budgets", {}).get(name)
+        start = time.monotonic()
+        self._section_deadline = start + budget if budget else None
         try:
-            self.wait.until(lambda driver: "SCPI" in driver.title or "EPARGNE" in driver.title)
-            time.sleep(3)
-        except TimeoutException:
-            print("⚠️ Timeout lors du chargement de la page")
+            value = extract()
+            state = self._section_state(value)
+            if state != SECTION_MISSING:
+                results[name] = value
+        except ScrapeDeadlineExceeded as e:
+            state = SECTION_TIMEOUT
+            logger.warning("⏳ Section %s abandonnée: %s", name, e, extra={"produit_id": produit_id, "section": name})
+        except Exception as e:
+            state = SECTION_ERROR
+            logger.warning("⚠️ Erreur lors de l'extraction de la section %s: %s", name, e,
+                           extra={"produit_id": produit_id, "section": name})
+            self._capture(produit_id, f"erreur_{name}")
+        finally:
+            self._section_deadline = None
+        status[name] = state
+        timings[name] = round(time.monotonic() - start, 3)
+
+    def _section_state(self, value) -> str:
+        """Statut d'une section extraite de la page courante"""
+        if isinstance(value, list):
+            # Page bien chargée mais tableau vide : SCPI sans événement ni actualité
+            return SECTION_OK if value or self._page_loaded else SECTION_MISSING
+        missing = EXTRACTION_PLAN.missing_fields(type(value), self._page)
+        if len(missing) == len(EXTRACTION_PLAN.schema[type(value)]):
+            return SECTION_MISSING
+        return SECTION_PARTIAL if missing else SECTION_OK
     
-    def _extract_general_info_simple(self) -> SCPIGeneralInfo:
-        """Extrait les informations générales"""
+    def _page_source(self) -> str:
+        """HTML de la page courante, lu une seule fois par chargement"""
+        if self._source is None:
+            self._source = self.driver.page_source
+        return self._source
+
+    def _after_page_load(self, produit_id: int, session: str, stage: str):
+        """Enregistrement et captures de diagnostic après chaque chargement"""
+        self._record_page(produit_id, session)
+        self._capture(produit_id, stage)
+
+    def _capture(self, produit_id: int, stage: str):
+        """Dépose screenshot et DOM au thread d'écriture (save_screenshots / debug_mode)"""
+        save_screenshots = scraper_config.get("save_screenshots", False)
+        debug_mode = scraper_config.get("debug_mode", False)
+        if not (save_screenshots or debug_mode):
+            return
         try:
-            # Nom de la SCPI depuis le titre
-            nom = "EPARGNE FONCIERE"
-            try:
-                titre_element = self.driver.find_element(By.TAG_NAME, "h1")
-                if "SCPI" in titre_element.text:
-                    nom = titre_element.text.replace("SCPI ", "").strip()
-            except:
-                pass
-            
-            # Société de gestion
-            societe_gestion = "LA FRANCAISE"
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'LA FRANCAISE')]")
-                if elements:
-                    societe_gestion = "LA FRANCAISE"
-            except:
-                pass
-            
-            return SCPIGeneralInfo(
-                nom=nom,
-                societe_gestion=societe_gestion,
-                statut="Ouverte",
-                type_capital="CAPITAL VARIABLE",
-                type_actifs="Bureaux",
-                localisation_principale="IDF - 37.59 %",
-                annee_creation=1968
-            )
-            
+            screenshot = self.driver.get_screenshot_as_png() if save_screenshots else None
+            html = self._page_source() if debug_mode else None
+            get_diagnostics_writer().submit(produit_id, stage, screenshot=screenshot, html=html)
         except Exception as e:
-            print(f"Erreur lors de l'extraction des informations générales: {e}")
-            return SCPIGeneralInfo(
-                nom="EPARGNE FONCIERE",
-                societe_gestion="LA FRANCAISE",
-                statut="Ouverte",
-                type_capital="CAPITAL VARIABLE",
-                type_actifs="Bureaux",
-                localisation_principale="IDF",
-                annee_creation=1968
-            )
-    
-    def _extract_chiffres_cles_simple(self) -> SCPIChiffresClés:
-        """Extrait les chiffres clés"""
+            logger.warning("⚠️ Capture de diagnostic impossible (%s): %s", stage, e, extra={"produit_id": produit_id})
+
+    def _record_page(self, produit_id: int, session: str):
+        """Archive la page courante si l'enregistrement est actif"""
+        if self.recorder is None:
+            return
         try:
-            # Prix de part - cherche "670,00 €"
-            prix_part = 670.0
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '670,00')]")
-                if elements:
-                    prix_text = elements[0].text
-                    prix_part = self.extract_number(prix_text) or 670.0
-            except:
-                pass
-
-            # Prix de vente (retrait au) - cherche "619,75 €"
-            prix_vente = 619.75
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '619,75')]")
-                if elements:
-                    prix_text = elements[0].text
-                    prix_vente = self.extract_number(prix_text) or 619.75
-            except:
-                pass
-            
-            # Distribution - cherche "4,52%" et "37,71€"
-            taux_distribution = 4.52
-            dividende_brut = 37.71
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '4,52%')]")
-                if elements:
-                    taux_distribution = 4.52
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '37,71')]")
-                if elements:
-                    dividende_brut = 37.71
-            except:
-                pass
-            
-            # Capitalisation - cherche "4 174 M€"
-            capitalisation = "4 174 M€"
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '4 174')]")
-                if elements:
-                    capitalisation = "4 174 M€"
-            except:
-                pass
-            
-            # Nombre d'associés - cherche "57 895"
-            nb_associes = 57895
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '57 895')]")
-                if elements:
-                    nb_associes = 57895
-            except:
-                pass
-            
-            return SCPIChiffresClés(
-                capitalisation=capitalisation,
-                nb_associes=nb_associes,
-                prix_part_actuel=prix_part,
-                prix_part_vente=prix_vente,
-                date_prix_part="13-07-2025",
-                dividende_brut_annuel=dividende_brut,
-                taux_distribution_brut=taux_distribution,
-                dividende_net_annuel=36.72,
-                taux_distribution_net=4.40,
-                report_nouveau=2.37,
-                report_nouveau_euros=19.78,
-                valeur_reconstitution=743.07,
-                ratio_reconstitution=-9.83,
-                nb_immeubles=546,
-                surface_totale=1192964,
-                repartition_sectorielle={"Bureaux": 71.0},
-                repartition_geographique={"Ile-de-France": 38.0},
-                ratio_engagement=20.07
+            headers = self.driver.execute_script(
+                "return {'Content-Type': document.contentType, "
+                "'Last-Modified': document.lastModified, 'Charset': document.characterSet};"
             )
-            
-        except Exception as e:
-            print(f"Erreur lors de l'extraction des chiffres clés: {e}")
-            return SCPIChiffresClés(
-                capitalisation="4 174 M€",
-                nb_associes=57895,
-                prix_part_actuel=670.0,
-                prix_part_vente=619.75,
-                date_prix_part="13-07-2025",
-                dividende_brut_annuel=37.71,
-                taux_distribution_brut=4.52,
-                dividende_net_annuel=36.72,
-                taux_distribution_net=4.40,
-                report_nouveau=2.37,
-                report_nouveau_euros=19.78,
-                valeur_reconstitution=743.07,
-                ratio_reconstitution=-9.83,
-                nb_immeubles=546,
-                surface_totale=1192964,
-                repartition_sectorielle={"Bureaux": 71.0},
-                repartition_geographique={"Ile-de-France": 38.0},
-                ratio_engagement=20.07
+            self.recorder.record(
+                self.driver.current_url, self._page_source(), headers,
+                produit_id=produit_id, session=session
             )
+        except Exception as e:
+            logger.warning("⚠️ Erreur lors de l'enregistrement de la page: %s", e, extra={"produit_id": produit_id})
 
-    def _extract_trimestre_info_simple(self) -> SCPITrimestreInfo:
-        """Extrait les informations du dernier trimestre"""
-        try:
-            # Collecte brute - cherche "1,33 M€"
-            collecte_brute = "1,33 M€"
-            try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '1,33')]")
-                if elements:
-                    collecte_brute = "1,33 M€"
-            except:
-                pass
-            
-            # Acompte brut - cherche "7,50"
-            acompte_brut = 7.50
+    def _navigate(self, url: str):
+        """
+        Charge une page sous le contrôle du débit partagé
+
+        Le chargement est borné par page_load_timeout et par le temps restant de la SCPI ;
+        une page bloquée est interrompue (window.stop) ou Chrome est redémarré.
+
+        Raises:
+            ScrapeDeadlineExceeded: Délai atteint, la page n'est pas exploitable
+        """
+        self._source = None
+        self._page_loaded = False
+        remaining = self._remaining()
+        if remaining <= 0:
+            raise ScrapeDeadlineExceeded(f"délai dépassé avant le chargement de {url}")
+        load_timeout = max(1, int(min(self.page_load_timeout, remaining)))
+        if load_timeout != self._current_load_timeout:
+            self.driver.set_page_load_timeout(load_timeout)
+            self._current_load_timeout = load_timeout
+
+        hung = None
+        loaded = False
+        if self.network_capture is not None:
+            self.network_capture.drain(self.driver)
+            self.network_capture.block_direct(self.driver)
+        startup_stats.navigation_started()
+        # Le créneau du contrôleur ne couvre que la navigation : c'est la latence du site qu'il mesure
+        with self.rate_controller.request() as request:
             try:
-                elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), '7,50')]")
-                if elements:
-                    acompte_brut = 7.50
-            except:
-                pass
-            
-            return SCPITrimestreInfo(
-                trimestre="T1-2025",
-                collecte_brute=collecte_brute,
-                collecte_nette="-",
-                nb_acquisitions=0,
-                montant_acquisitions="0 M€",
-                nb_cessions=7,
-                montant_cessions="37,60 M€",
-                acompte_brut=acompte_brut,
-                delai_cession="Liste d'attente",
-                liste_attente="[255,50M€]",
-                tof_aspim_trimestre=91.40,
-                tof_exploitation_trimestre=86.80
-            )
-            
+                self.driver.get(url)
+            except TimeoutException:
+                hung = f"chargement de {url} interrompu après {load_timeout}s"
+                request.fail("timeout")
+                self._abort_load()
+            except TransportError as e:
+                hung = f"chromedriver ne répond plus ({e})"
+                request.fail("timeout")
+                self._recycle_driver()
+            else:
+                if not self._wait_for_page_load():
+                    request.fail("timeout")
+                elif self._is_throttled():
+                    request.fail(429)
+                else:
+                    loaded = True
+        if hung:
+            logger.warning("⏳ %s", hung, extra={"url": url})
+            raise ScrapeDeadlineExceeded(hung)
+        if loaded:
+            self._settle_page()
+            self._page_loaded = True
+        if scraper_config.get("debug_mode", False):
+            self._print_navigation_stats()
+
+    def _print_navigation_stats(self):
+        """Affiche first paint et octets transférés (effet du cache disque du profil)"""
+        try:
+            stats = self.driver.execute_script("""
+                const nav = performance.getEntriesByType('navigation')[0] || {};
+                const paint = performance.getEntriesByName('first-contentful-paint')[0];
+                const resources = performance.getEntriesByType('resource');
+                let transfer = nav.transferSize || 0, cached = 0;
+                for (const r of resources) {
+                    transfer += r.transferSize || 0;
+                    if (r.transferSize === 0 && r.decodedBodySize > 0) cached++;
+                }
+                return {first_paint: paint ? paint.startTime : null, transfer: transfer,
+                        cached: cached, resources: resources.length};
+            """)
+            first_paint = f"{stats['first_paint']:.0f} ms" if stats.get("first_paint") is not None else "N/A"
+            logger.info("📶 First paint: %s, transféré: %.0f Ko, ressources en cache: %s/%s",
+                        first_paint, stats["transfer"] / 1024, stats["cached"], stats["resources"],
+                        extra={"first_paint_ms": stats.get("first_paint"), "transfer_bytes": stats["transfer"]})
         except Exception as e:
-            print(f"Erreur lors de l'extraction des informations trimestrielles: {e}")
-            return SCPITrimestreInfo(
-                trimestre="T1-2025",
-                collecte_brute="1,33 M€",
-                collecte_nette="-",
-                nb_acquisitions=0,
-                montant_acquisitions="0 M€",
-                nb_cessions=7,
-                montant_cessions="37,60 M€",
-                acompte_brut=7.50,
-                delai_cession="Liste d'attente",
-                liste_attente="[255,50M€]"
+            logger.warning("⚠️ Statistiques de navigation indisponibles: %s", e)
+
+    def _abort_load(self):
+        """Interrompt le chargement en cours, redémarre Chrome s'il ne répond plus"""
+        try:
+            self.driver.execute_script("window.stop();")
+        except Exception:
+            self._recycle_driver()
+
+    def _is_throttled(self) -> bool:
+        """Détecte une page de refus (trop de requêtes)"""
+        return is_throttled_title(self.driver.title)
+
+    def _wait_for_page_load(self) -> bool:
+        """Attend le titre de la page, retourne False en cas de timeout"""
+        timeout = min(scraper_config.get("timeout", 30), self._remaining())
+        try:
+            WebDriverWait(self.driver, max(0.1, timeout)).until(
+                lambda driver: is_scpi_title(driver.title)
             )
+            return True
+        except TimeoutException:
+            logger.warning("⚠️ Timeout lors du chargement de la page")
+            return False
+
+    def _settle_page(self):
+        """Laisse les scripts de la page remplir les tableaux (hors créneau du contrôleur de débit)"""
+        time.sleep(max(0.0, min(3, self._remaining())))
+    
+    def _read_page(self):
+        """Lit la page courante en une seule traversée (un seul aller-retour WebDriver)"""
+        self._page = EXTRACTION_PLAN.read(self._page_source())
+        return self._page
+
+    def _build_section(self, cls, label: str):
+        """Construit une section depuis la page lue, champs absents à None"""
+        section = EXTRACTION_PLAN.build(cls, self._page)
+        missing = EXTRACTION_PLAN.missing_fields(cls, self._page)
+        if missing:
+            logger.warning("⚠️ %s: champs introuvables sur la page: %s", label, ", ".join(missing),
+                           extra={"section": cls.__name__, "champs_manquants": missing})
+        return section
+
+    def _extract_general_info_simple(self) -> SCPIGeneralInfo:
+        """Extrait les informations générales"""
+        return self._build_section(SCPIGeneralInfo, "informations générales")
+
+    def _extract_chiffres_cles_simple(self) -> SCPIChiffresClés:
+        """Extrait les chiffres clés (répartitions prises dans les réponses JSON si capture_network)"""
+        chiffres = self._build_section(SCPIChiffresClés, "chiffres clés")
+        if self.network_capture is not None:
+            fields = self.network_capture.fields(self.driver, self._produit_id, self._remaining,
+                                                 captured=self._captured_json)
+            for name, value in fields.items():
+                setattr(chiffres, name, value)
+        return chiffres
+
+    def _extract_trimestre_info_simple(self) -> SCPITrimestreInfo:
+        """Extrait les informations du dernier trimestre"""
+        return self._build_section(SCPITrimestreInfo, "informations trimestrielles")
 
     def _extract_evenements_cles_simple(self) -> List[SCPIEvenementClé]:
-        """Extrait les événements clés"""
-        evenements = [
-            SCPIEvenementClé(
-                date="29-04-25",
-                type_evenement="Dividende",
-                description="Baisse : -18,30%",
-                valeur_avant="9.18 €/part",
-                valeur_apres="7.50 €/part",
-                variation="-18,30%",
-                document_lie="BT1 2025"
-            ),
-            SCPIEvenementClé(
-                date="01-01-25",
-                type_evenement="Prix de part",
-                description="Baisse : -19,76%",
-                valeur_avant="835.00 €/part",
-                valeur_apres="670.00 €/part",
-                variation="-19,76%",
-                document_lie=None
-            ),
-            SCPIEvenementClé(
-                date="02-09-24",
-                type_evenement="Reconstitution",
-                description="Baisse : -6,91%",
-                valeur_avant="846.32 €/part",
-                valeur_apres="787.82 €/part",
-                variation="-6,91%",
-                document_lie=None
-            )
-        ]
-        return evenements
+        """Extrait les événements clés (tableau de la page principale)"""
+        return parse_evenements(self._page)
 
     def _extract_actualites_simple(self) -> List[SCPIActualité]:
-        """Extrait les actualités"""
-        actualites = [
-            SCPIActualité(
-                date="23-05-25",
-                titre="EPARGNE FONCIERE - Bilan annuel 2024",
-                type_info="BILAN",
-                resume="Bilan annuel 2024 de la SCPI EPARGNE FONCIERE"
-            ),
-            SCPIActualité(
-                date="26-04-25",
-                titre="EPARGNE FONCIERE - Bulletin d'information trimestriel du T1 2025",
-                type_info="DISTRIBUTION",
-                resume="Au titre du 1er trimestre 2025, Epargne Foncière distribue un acompte de dividende brut de 7,50 €/part le 29-04-2025, en baisse de -18,30 % par rapport aux 9,18 €/part du 4ème trimestre 2024."
-            ),
-            SCPIActualité(
-                date="04-02-25",
-                titre="EPARGNE FONCIERE - Bulletin d'information trimestriel du T4 2024",
-                type_info="VALORISATION",
-                resume="Au 31 décembre 2024, la valeur de réalisation d'Épargne Foncière continue de baisser de -6,6 % par rapport à celle au 30 juin 2024 pour s'établir à 617,45 €/part."
-            )
-        ]
-        return actualites
+        """Extrait les actualités (tableau de la page informations)"""
+        return parse_actualites(self._page)
 
     def close(self):
         """Ferme le navigateur"""
         if self.driver:
             self.driver.quit()
+        if getattr(self, "profile", None) is not None:
+            self.profile.release()
+            self.profile = None
+        if self.recorder is not None:
+            self.recorder.close()
     
     def __enter__(self):
         return self
@@ -383,22 +461,26 @@ class SCPIScraperConfigurable:
         self.close()
 
 # Fonction utilitaire pour scraper une SCPI (affichage uniquement)
-def scrape_scpi_data(produit_id: int, headless: bool = None) -> SCPIData:
+def scrape_scpi_data(produit_id: int, headless: bool = None, sections=None) -> SCPIData:
     """
     Scrape les données d'une SCPI et les affiche (pas de sauvegarde JSON)
 
     Args:
         produit_id: ID de la SCPI
         headless: Mode headless (None = utilise la config globale)
+        sections: Sections à extraire (None = toutes)
 
     Returns:
         SCPIData: Données extraites de la SCPI
     """
-    with SCPIScraperConfigurable(headless=headless) as scraper:
-        data = scraper.scrape_scpi(produit_id)
+    # Chrome déjà lancé en arrière-plan (warm_standby.prewarm) s'il y en a un
+    scraper = warm_standby.take(headless) or SCPIScraperConfigurable(headless=headless)
+    with scraper:
+        data = scraper.scrape_scpi(produit_id, sections=sections)
         return data
 
 if __name__ == "__main__":
+    setup_logging()
     # Test avec EPARGNE FONCIERE (ID 39)
     scpi_data = scrape_scpi_data(39)
     scpi_data.print_summary()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des contextes isolés et du pipeline d'onglets dans un seul Chrome
+Aucun navigateur n'est lancé : chaque onglet simulé charge sa page sur le serveur
+synthétique dans un thread, comme Chrome pendant que le pilote passe à l'onglet suivant
+"""
+
+import time
+
+from browser_contexts import BrowserContextPool, pipeline
+from config_scraper import scraper_config
+from mock_scpi_server import information_page, main_page, scpi_nom, start_server
+from page_archive import _make_replay_scraper
+from scpi_scraper import info_page_url
+from test_helpers import ContextDriver, fake_scraper
+
+
+def test_scpi_load_in_parallel_contexts():
+    """Les pages de plusieurs SCPI se chargent en même temps, résultats identiques à un Chrome par SCPI"""
+    server = start_server(latency=0.2)
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config["base_url"] = server.base_url
+        driver = ContextDriver()
+        closed = []
+        pool = BrowserContextPool(contexts=3, scraper=fake_scraper(driver, closed), poll_interval=0.01)
+
+        ids = [42, 7, 13, 5]
+        futures = {produit_id: pool.submit(produit_id) for produit_id in ids}
+        results = {produit_id: future.result(timeout=30) for produit_id, future in futures.items()}
+        pool.close()
+
+        assert driver.max_in_flight > 1
+        assert len(driver.contexts) == 3 and driver.disposed == driver.contexts and closed
+        assert server.requests == 2 * len(ids)  # Page principale et page informations
+        for produit_id, data in results.items():
+            pages = {f"{server.base_url}/scpi.php?vue=&produit_id={produit_id}": main_page(produit_id),
+                     info_page_url(server.base_url, scpi_nom(produit_id), produit_id): information_page(produit_id)}
+            expected = _make_replay_scraper(pages).scrape_scpi(produit_id)
+            assert data.general_info == expected.general_info
+            assert data.chiffres_cles == expected.chiffres_cles
+            assert data.actualites == expected.actualites and data.actualites
+            assert set(data.section_status.values()) == {"ok"}
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+def test_pipeline_preloads_next_scpi_in_background_tabs():
+    """Pipeline du mode multiple : onglets du contexte par défaut, SCPI suivante déjà en chargement"""
+    server = start_server(latency=0.2)
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config.update(base_url=server.base_url, pipeline_depth=2)
+        driver = ContextDriver()
+        closed = []
+        pool = pipeline(scraper=fake_scraper(driver, closed))
+        futures = [pool.submit(produit_id, ["chiffres_cles"]) for produit_id in (42, 7, 13)]
+        results, waits = [], []
+        for future in futures:
+            start = time.monotonic()
+            results.append(future.result(timeout=30))
+            waits.append(time.monotonic() - start)
+            time.sleep(0.5)  # Affichage de la SCPI : la suivante finit de charger entre-temps
+        durations = [pool.duration(future) for future in futures]
+        pool.close()
+
+        # Durée propre de chaque SCPI (chargement compris), pas l'attente de l'appelant
+        assert waits[1] < 0.1 and waits[2] < 0.1
+        assert all(0.2 <= duration < 0.5 for duration in durations)
+        assert pool.duration(futures[0]) is None  # Lue une seule fois
+
+        assert not driver.contexts and len(driver.closed_tabs) == 2 and closed
+        assert driver.max_in_flight == 2
+        assert server.requests == 3  # Page principale seulement
+        for produit_id, data in zip((42, 7, 13), results):
+            pages = {f"{server.base_url}/scpi.php?vue=&produit_id={produit_id}": main_page(produit_id)}
+            expected = _make_replay_scraper(pages).scrape_scpi(produit_id, ["chiffres_cles"])
+            assert data.chiffres_cles == expected.chiffres_cles and data.chiffres_cles.prix_part_actuel
+            assert data.section_status == {"chiffres_cles": "ok"}
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+class StalledInfoDriver(ContextDriver):
+    """Les pages informations ne finissent jamais de charger"""
+
+    def _load(self, tab, url):
+        if url.endswith("/information"):
+            return
+        super()._load(tab, url)
+
+
+def test_info_page_budget_keeps_other_sections():
+    """Page informations trop lente : actualites notée timeout sous son budget, le reste est gardé"""
+    server = start_server()
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config.update(base_url=server.base_url, section_budgets={"actualites": 0.3})
+        pool = BrowserContextPool(contexts=2, scraper=fake_scraper(StalledInfoDriver(), []), poll_interval=0.01)
+        start = time.monotonic()
+        data = pool.submit(42, ["chiffres_cles", "actualites"]).result(timeout=30)
+        pool.close()
+
+        assert time.monotonic() - start < scraper_config.get("page_load_timeout", 30)
+        assert data.section_status == {"chiffres_cles": "ok", "actualites": "timeout"}
+        assert data.chiffres_cles.prix_part_actuel
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+def test_loop_failure_resolves_every_future():
+    """Erreur du thread pilote hors d'une SCPI : les SCPI en cours et en attente la reçoivent"""
+    server = start_server(latency=0.2)
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config["base_url"] = server.base_url
+        scraper = fake_scraper(ContextDriver(), [])
+
+        def release(duration, ok, status=None):
+            raise RuntimeError("contrôleur de débit hors service")
+
+        scraper.rate_controller.release = release
+        pool = BrowserContextPool(contexts=2, scraper=scraper, poll_interval=0.01)
+        futures = [pool.submit(produit_id) for produit_id in (42, 7, 13, 5)]
+        for future in futures:
+            try:
+                future.result(timeout=10)
+                assert False, "erreur attendue"
+            except RuntimeError as e:
+                assert "hors service" in str(e)
+        pool.close()
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DES CONTEXTES ISOLÉS")
+    print("=" * 50)
+    test_scpi_load_in_parallel_contexts()
+    test_pipeline_preloads_next_scpi_in_background_tabs()
+    test_info_page_budget_keeps_other_sections()
+    test_loop_failure_resolves_every_future()
+    print("✅ Contextes isolés validés!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des profils Chrome persistants (verrou par worker et nettoyage)
+Aucun navigateur n'est lancé : seuls les dossiers et verrous sont manipulés
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from browser_profile import LAST_USED_FILE, acquire_profile, cleanup_profiles
+
+HOLD_PROFILE = (
+    "import os, sys; from browser_profile import acquire_profile; "
+    "lease = acquire_profile(sys.argv[1], 2); print(os.path.basename(lease.path), flush=True); "
+    "sys.stdin.readline()"
+)
+
+
+def test_each_worker_gets_its_own_profile(tmp_path):
+    """Un profil verrouillé par un autre processus est sauté ; tous occupés : None"""
+    holder = subprocess.Popen([sys.executable, "-c", HOLD_PROFILE, str(tmp_path)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        assert holder.stdout.readline().strip() == "profile-0"
+        lease = acquire_profile(str(tmp_path), max_profiles=2)
+        assert os.path.basename(lease.path) == "profile-1"
+        assert acquire_profile(str(tmp_path), max_profiles=2) is None
+
+        lease.release()
+        assert os.path.exists(os.path.join(lease.path, LAST_USED_FILE))
+        again = acquire_profile(str(tmp_path), max_profiles=2)
+        assert os.path.basename(again.path) == "profile-1"
+        again.release()
+    finally:
+        holder.stdin.close()
+        holder.wait(timeout=10)
+
+    # Processus terminé : son verrou est libéré avec lui
+    lease = acquire_profile(str(tmp_path), max_profiles=2)
+    assert os.path.basename(lease.path) == "profile-0"
+    lease.release()
+
+
+def test_cleanup_removes_only_old_free_profiles(tmp_path):
+    """Profil ancien et libre supprimé ; profil récent ou en cours d'utilisation conservé"""
+    old, recent, busy = (acquire_profile(str(tmp_path), max_profiles=3) for _ in range(3))
+    for lease in (old, recent):
+        lease.release()
+    long_ago = time.time() - 40 * 86400
+    os.utime(os.path.join(old.path, LAST_USED_FILE), (long_ago, long_ago))
+    os.utime(busy.path, (long_ago, long_ago))
+
+    assert cleanup_profiles(str(tmp_path), max_age_days=30) == 1
+    assert not os.path.exists(old.path)
+    assert os.path.isdir(recent.path) and os.path.isdir(busy.path)
+    busy.release()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DES PROFILS CHROME PERSISTANTS")
+    print("=" * 50)
+    for test in (test_each_worker_gets_its_own_profile, test_cleanup_removes_only_old_free_profiles):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Profils Chrome validés!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des captures de diagnostic écrites en arrière-plan
+Aucun navigateur n'est lancé : les captures sont des octets synthétiques
+"""
+
+import gzip
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from diagnostics import DiagnosticsWriter
+from mock_scpi_server import main_page
+
+
+def test_close_drains_pending_captures(tmp_path):
+    """close() écrit toutes les captures déjà déposées ; au-delà de max_pending, elles sont ignorées"""
+    writer = DiagnosticsWriter(str(tmp_path), quota_mb=50, max_pending=2)
+    gate = threading.Event()
+    write = writer._write
+    writer._write = lambda *item: (gate.wait(), write(*item))
+
+    assert writer.submit(85, "page_principale", html=main_page(85))
+    while writer._queue.qsize():  # Première capture prise par le thread, bloquée à l'écriture
+        time.sleep(0.001)
+    assert writer.submit(85, "informations", screenshot=b"\x89PNG" + b"0" * 1000)
+    assert writer.submit(39, "page_principale", html=main_page(39))
+    assert not writer.submit(39, "informations", html="<html></html>")
+    assert writer.dropped == 1 and writer.written == 0
+
+    gate.set()
+    writer.close()
+    assert writer.written == 3 and not writer._thread.is_alive()
+    names = sorted(os.listdir(tmp_path))
+    assert [name.split("_", 1)[1] for name in names] == [
+        "85_page_principale.html.gz", "85_informations.png", "39_page_principale.html.gz"]
+    with gzip.open(os.path.join(tmp_path, names[0]), "rt", encoding="utf-8") as f:
+        assert f.read() == main_page(85)
+
+
+def test_quota_removes_oldest_captures(tmp_path):
+    """Le dossier reste sous le quota : les captures les plus anciennes sont supprimées"""
+    (tmp_path / "ancienne.png").write_bytes(b"0" * 40_000)
+    writer = DiagnosticsWriter(str(tmp_path), quota_mb=0.1, max_pending=32)
+    for i in range(5):
+        writer.submit(i, "erreur_chiffres_cles", screenshot=bytes(30_000))
+    writer.flush()
+    writer.close()
+    files = os.listdir(tmp_path)
+    assert "ancienne.png" not in files and len(files) == 3
+    assert sum(os.path.getsize(os.path.join(tmp_path, name)) for name in files) <= 0.1 * 1024 * 1024
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DES CAPTURES DE DIAGNOSTIC")
+    print("=" * 50)
+    for test in (test_close_drains_pending_captures, test_quota_removes_oldest_captures):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Captures de diagnostic validées!")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du démarrage anticipé de Chrome et du cache des binaires
+Aucun navigateur n'est lancé : la résolution et la création du scraper sont simulées
+"""
+
+import os
+import tempfile
+import time
+
+from config_scraper import scraper_config
+from driver_startup import WarmStandby, forget_binaries, resolve_binaries, startup_stats
+from test_helpers import make_scpi_data
+
+
+class FakeOptions:
+    binary_location = "./chrome-win64/chrome.exe"
+
+
+def test_binaries_are_resolved_once_and_cached():
+    """Selenium Manager n'est appelé qu'une fois, le résultat est relu du fichier de cache"""
+    saved = dict(scraper_config.config)
+    with tempfile.TemporaryDirectory() as directory:
+        driver = os.path.join(directory, "chromedriver")
+        browser = os.path.join(directory, "chrome")
+        for path in (driver, browser):
+            open(path, "w").close()
+        calls = []
+
+        def resolver(options):
+            calls.append(options.binary_location)
+            return driver, browser
+
+        try:
+            scraper_config.config.update({
+                "chromedriver_path": os.path.join(directory, "absent", "chromedriver"),
+                "chrome_path": os.path.join(directory, "absent", "chrome"),
+                "binary_cache_file": os.path.join(directory, "chrome_binaries.json"),
+            })
+            forget_binaries()
+            assert resolve_binaries(FakeOptions(), resolver) == (driver, browser)
+            assert calls == [""]
+
+            # Nouvelle exécution : le fichier de cache évite la recherche
+            forget_binaries()
+            assert resolve_binaries(FakeOptions(), resolver) == (driver, browser)
+            assert len(calls) == 1
+
+            # Chemins configurés existants : pris tels quels
+            scraper_config.config.update({"chromedriver_path": driver, "chrome_path": browser})
+            forget_binaries()
+            assert resolve_binaries(FakeOptions(), resolver) == (driver, browser)
+            assert len(calls) == 1
+
+            # Aucun Chrome trouvé (chromedriver seul) : le chrome_path absent n'est jamais
+            # transmis, que la recherche soit faite, relue du fichier ou déjà en mémoire
+            scraper_config.config.update({
+                "chromedriver_path": os.path.join(directory, "absent", "chromedriver"),
+                "chrome_path": os.path.join(directory, "absent", "chrome"),
+                "binary_cache_file": os.path.join(directory, "chrome_binaries_sans_chrome.json"),
+            })
+            resolver = lambda options: (driver, None)
+            for forget in (True, True, False):
+                if forget:
+                    forget_binaries()
+                options = FakeOptions()
+                assert resolve_binaries(options, resolver) == (driver, None)
+                assert options.binary_location == ""
+        finally:
+            scraper_config.config.clear()
+            scraper_config.config.update(saved)
+            forget_binaries()
+
+
+class FakeScraper:
+    def __init__(self, headless=None):
+        time.sleep(0.2)  # Lancement de Chrome
+        self.headless = headless
+        self.closed = False
+        self.scraped = []
+
+    def scrape_scpi(self, produit_id, sections=None):
+        self.scraped.append(produit_id)
+        if produit_id == 10:
+            raise RuntimeError("Chrome planté")
+        return make_scpi_data(produit_id)
+
+    def close(self):
+        self.closed = True
+
+
+def test_standby_scraper_launches_in_background():
+    """Le scraper lancé en arrière-plan est prêt sans attente, pour le même mode d'affichage"""
+    created = []
+    standby = WarmStandby(factory=lambda headless: created.append(FakeScraper(headless)) or created[-1])
+    assert standby.prewarm(headless=True)
+    assert not standby.prewarm(headless=True)
+
+    time.sleep(0.3)  # Travail de la CLI pendant le lancement
+    hidden_before = startup_stats.hidden
+    start = time.perf_counter()
+    scraper = standby.take(headless=True)
+    assert scraper.headless is True
+    assert time.perf_counter() - start < 0.1
+    assert startup_stats.hidden - hidden_before > 0.15
+    assert standby.take(headless=True) is None
+
+    # Scraper préchauffé mais jamais utilisé : fermé en fin de programme
+    standby.prewarm()
+    standby.discard()
+    assert standby.take() is None
+    assert [s.closed for s in created] == [False, True]
+
+
+def test_standby_for_other_mode_is_closed():
+    """Demande dans l'autre mode d'affichage : le Chrome préchauffé ne reste pas ouvert"""
+    created = []
+    standby = WarmStandby(factory=lambda headless: created.append(FakeScraper(headless)) or created[-1])
+    standby.prewarm(headless=True)
+    assert standby.take(headless=False) is None
+    assert standby.prewarm(headless=False)  # La place est libre pour le bon mode
+    standby.discard()
+    assert sorted((s.headless, s.closed) for s in created) == [(False, True), (True, True)]
+
+
+def test_multiple_mode_reuses_standby_chrome():
+    """--multiple : le Chrome préchauffé sert à toute la liste, relancé en arrière-plan après une erreur"""
+    import main
+
+    created, warmed = [], []
+
+    def factory(headless):
+        warmed.append(FakeScraper(headless))
+        created.append(warmed[-1])
+        return warmed[-1]
+
+    saved = main.warm_standby, main.SCPIScraperConfigurable
+    main.warm_standby = WarmStandby(factory=factory)
+    main.SCPIScraperConfigurable = lambda: created.append(FakeScraper()) or created[-1]
+    try:
+        results = main.extract_multiple_scpi(["chiffres_cles"], main.parse_scpi_ids("85,39,10,66"))
+        assert len(results) == 3
+        assert [s.scraped for s in created] == [[85, 39, 10], [66]]
+        assert created == warmed  # Le remplaçant vient du préchauffage, pas d'un lancement bloquant
+
+        # Erreur sur la dernière SCPI : aucun Chrome lancé pour rien
+        created.clear()
+        warmed.clear()
+        main.extract_multiple_scpi(["chiffres_cles"], main.parse_scpi_ids("85,10"))
+        assert [s.scraped for s in created] == [[85, 10]]
+        assert main.warm_standby.take() is None
+    finally:
+        main.warm_standby.discard()
+        main.warm_standby, main.SCPIScraperConfigurable = saved
+    assert all(s.closed for s in created)
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DU DÉMARRAGE ANTICIPÉ DE CHROME")
+    print("=" * 50)
+    test_binaries_are_resolved_once_and_cached()
+    test_standby_scraper_launches_in_background()
+    test_standby_for_other_mode_is_closed()
+    test_multiple_mode_reuses_standby_chrome()
+    print("✅ Démarrage anticipé validé!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du rapport des changements entre deux extractions
+"""
+
+import json
+import tempfile
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import extraction_diff
+from extraction_diff import compare_runs, fingerprint, latest_run
+from scpi_dataclasses import NOT_FETCHED, SCPIActualité
+from test_helpers import make_queue, make_scpi_data
+
+
+def make_runs():
+    """SCPI 39 : prix, répartition imbriquée et actualité modifiés ; 85 inchangée ; 10 remplacée par 7"""
+    before = [make_scpi_data(i) for i in (39, 85, 10)]
+    before[0].chiffres_cles = replace(before[0].chiffres_cles,
+                                      repartition_geographique={"France": {"Paris": 40.0, "Lyon": 60.0}})
+    after = [make_scpi_data(i) for i in (39, 85, 7)]
+    after[0].chiffres_cles = replace(after[0].chiffres_cles, prix_part_actuel=190.0, tof_aspim=92.5,
+                                     repartition_geographique={"France": {"Paris": 45.0, "Lyon": 55.0}})
+    after[0].actualites = [SCPIActualité("29-04-25", "Bulletin T1 2025", "DISTRIBUTION", "Acompte versé")]
+    for data in after:
+        data.date_extraction = datetime(2025, 7, 1)  # Métadonnée : jamais un changement
+        data.section_timings = {"chiffres_cles": 1.5}
+    return before, after
+
+
+def test_changes_by_field_and_category():
+    """Prix, TOF, clés imbriquées et actualités apparues ; SCPI nouvelles et disparues"""
+    before, after = make_runs()
+    report = compare_runs(before, after)
+    assert report.unchanged == 1 and report.added == [7] and report.removed == [10]
+    (scpi,) = report.changed
+    assert scpi.produit_id == 39 and scpi.categories == ["actualites", "autre", "prix", "tof"]
+    changes = {change.field: change for change in scpi.changes}
+    assert changes["chiffres_cles.prix_part_actuel"].variation == -5.0
+    assert changes["chiffres_cles.repartition_geographique"].details == {
+        "France/Paris": [40.0, 45.0], "France/Lyon": [60.0, 55.0]}
+    assert changes["actualites"].added == ["29-04-25 Bulletin T1 2025"]
+    assert "prix_part_actuel: 200.0 → 190.0 (-5,00 %)" in report.format()
+
+    only_prices = report.filter(["prix"])
+    assert [c.field for c in only_prices.changed[0].changes] == ["chiffres_cles.prix_part_actuel"]
+    exported = json.loads(json.dumps(report.to_dict(), ensure_ascii=False))
+    assert exported["modifiees"][0]["changements"][0]["before"] == 200.0
+
+
+def test_unchanged_scpi_is_skipped_on_global_digest():
+    """Empreinte globale identique : aucun champ comparé ; section non extraite d'un côté ignorée"""
+    before, after = make_runs()
+    previous = {data.produit_id: fingerprint(data) for data in before}
+    partial = make_scpi_data(85)
+    partial.general_info = NOT_FETCHED
+    partial.sections = ("chiffres_cles", "trimestre_info", "evenements_cles", "actualites")
+
+    compared = []
+    field_change = extraction_diff.FieldChange
+    original = field_change.__dict__["between"]
+
+    def counting(name, old, new):
+        compared.append(name)
+        return original.__func__(field_change, name, old, new)
+
+    field_change.between = counting
+    try:
+        report = compare_runs([], [after[1], partial], previous)
+    finally:
+        field_change.between = original
+    assert report.unchanged == 2 and not report.changed and not compared
+
+
+def test_previous_generation_from_queue(tmp_path):
+    """La file fournit l'avant-dernière génération de chaque SCPI"""
+    queue = make_queue(tmp_path)
+    before, after = make_runs()
+    for run in (before[:2], after[:2]):
+        queue.enqueue([data.produit_id for data in run])
+        for data in run:
+            queue.complete(queue.claim("worker-a", 60), data)
+    report = compare_runs(queue.results(previous=1), queue.results())
+    assert [scpi.produit_id for scpi in report.changed] == [39] and report.unchanged == 1
+
+
+def test_latest_run_skips_scpi_not_extracted_again(tmp_path):
+    """Seules les SCPI de la dernière exécution sont comparées, chacune à son extraction précédente"""
+    queue = make_queue(tmp_path)
+    before, after = make_runs()
+    rerun = replace(after[1], date_extraction=datetime(2025, 10, 1, 9))  # Seule la SCPI 85 est relancée
+    for run in (before[:2], after[:2], [rerun]):
+        queue.enqueue([data.produit_id for data in run])
+        for data in run:
+            queue.complete(queue.claim("worker-a", 60), data)
+
+    # La SCPI 39 n'a pas été ré-extraite : ses deux générations datent d'exécutions antérieures
+    report = compare_runs(*latest_run(queue))
+    assert report.changed == [] and report.unchanged == 1 and not report.added and not report.removed
+
+    report = compare_runs(*latest_run(queue, since=datetime(2025, 7, 1)))
+    assert [scpi.produit_id for scpi in report.changed] == [39] and report.unchanged == 1
+    (tmp_path / "vide").mkdir()
+    assert latest_run(make_queue(tmp_path / "vide")) == ([], [])
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DU RAPPORT DES CHANGEMENTS")
+    print("=" * 50)
+    test_changes_by_field_and_category()
+    test_unchanged_scpi_is_skipped_on_global_digest()
+    for test in (test_previous_generation_from_queue, test_latest_run_skips_scpi_not_extracted_again):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Rapport des changements validé!")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du schéma d'extraction déclaratif
+Vérifie que chaque SCPI obtient ses propres chiffres à partir des libellés
+"""
+
+from extraction_schema import (
+    EXTRACTION_PLAN, parse_euros, parse_percentage, parse_repartition, normalize_label
+)
+from mock_scpi_server import main_page, information_page
+from page_archive import _make_replay_scraper
+from scpi_dataclasses import SCPIData, SCPIGeneralInfo, SCPIChiffresClés, SCPITrimestreInfo, NOT_FETCHED
+
+
+def make_page(nom, prix, retrait, taux, associes, acompte, trimestre):
+    """Page au format des tableaux de chiffres clés de scpi-lab"""
+    return f"""
+    <html><head><title>SCPI {nom} - scpi-lab</title><script>var prix = "999,00 €";</script></head>
+    <body>
+      <h1>SCPI {nom}</h1>
+      <table class="chiffres-cles">
+        <tr><td>Société de gestion</td><td>GESTION {nom}</td></tr>
+        <tr><td>Capitalisation</td><td>1 234 M€</td></tr>
+        <tr><td>Nombre d'associés</td><td>{associes}</td></tr>
+        <tr><th>Prix de part</th><td>{prix} €</td></tr>
+        <tr><td>Retrait au</td><td>{retrait} €</td></tr>
+        <tr><td>Taux de distribution</td><td>{taux} %</td></tr>
+        <tr><td>Taux de distribution net</td><td>4,10 %</td></tr>
+        <tr><td>Report à nouveau</td><td>19,78 € (2,37 %)</td></tr>
+        <tr><td>Répartition sectorielle</td><td>Bureaux 71 % Commerces 20,5 %</td></tr>
+      </table>
+      <dl><dt>Année de création</dt><dd>Créée en 1968</dd></dl>
+      <h2>Dernier trimestre : {trimestre}</h2>
+      <ul>
+        <li>Acompte brut : {acompte} €/part</li>
+        <li>Cessions : 7 (37,60 M€)</li>
+      </ul>
+    </body></html>
+    """
+
+
+def test_each_scpi_gets_its_own_figures():
+    """Deux pages différentes donnent deux jeux de chiffres différents"""
+    page_a = EXTRACTION_PLAN.read(make_page("EPARGNE FONCIERE", "670,00", "619,75", "4,52", "57 895", "7,50", "T1-2025"))
+    page_b = EXTRACTION_PLAN.read(make_page("PFO2", "1 000,00", "950,00", "4,80", "12 001", "12,00", "T4 2024"))
+
+    chiffres_a = EXTRACTION_PLAN.build(SCPIChiffresClés, page_a)
+    chiffres_b = EXTRACTION_PLAN.build(SCPIChiffresClés, page_b)
+    assert chiffres_a.prix_part_actuel == 670.0
+    assert chiffres_b.prix_part_actuel == 1000.0
+    assert chiffres_a.prix_part_vente == 619.75
+    assert chiffres_b.nb_associes == 12001
+    assert chiffres_a.taux_distribution_brut == 4.52
+    assert chiffres_a.taux_distribution_net == 4.10
+    assert chiffres_a.report_nouveau == 2.37
+    assert chiffres_a.report_nouveau_euros == 19.78
+    assert chiffres_a.repartition_sectorielle == {"Bureaux": 71.0, "Commerces": 20.5}
+
+    general_b = EXTRACTION_PLAN.build(SCPIGeneralInfo, page_b)
+    assert general_b.nom == "PFO2"
+    assert general_b.societe_gestion == "GESTION PFO2"
+    assert general_b.annee_creation == 1968
+
+    trimestre_b = EXTRACTION_PLAN.build(SCPITrimestreInfo, page_b)
+    assert trimestre_b.trimestre == "T4-2024"
+    assert trimestre_b.acompte_brut == 12.0
+    assert trimestre_b.nb_cessions == 7
+    assert trimestre_b.montant_cessions == "37,60 M€"
+
+
+def test_missing_fields_are_none():
+    """Un champ absent de la page n'est plus rempli avec les chiffres d'une autre SCPI"""
+    page = EXTRACTION_PLAN.read("<html><h1>SCPI VIDE</h1></html>")
+    chiffres = EXTRACTION_PLAN.build(SCPIChiffresClés, page)
+    assert chiffres.prix_part_actuel is None
+    assert chiffres.nb_associes is None
+    assert chiffres.repartition_sectorielle == {}
+    assert "prix_part_actuel" in EXTRACTION_PLAN.missing_fields(SCPIChiffresClés, page)
+
+
+def test_parsers():
+    """Parseurs typés sur les formats français"""
+    assert parse_euros("1 192,50 €") == 1192.5
+    assert parse_percentage("-9,83 %") == -9.83
+    assert parse_percentage("4,52%") == 4.52
+    assert parse_repartition("Ile-de-France : 38 % Régions : 45 %") == {"Ile-de-France": 38.0, "Régions": 45.0}
+    assert normalize_label("Nombre d'associés :") == "nombre d associes"
+
+
+
+def test_selected_sections_skip_pages_and_extractors():
+    """Seules les sections demandées sont extraites, la page informations n'est chargée que pour les actualités"""
+    url = "https://www.scpi-lab.com/scpi.php?vue=&produit_id=39"
+    scraper = _make_replay_scraper({url: make_page("EPARGNE FONCIERE", "670,00", "619,75", "4,52",
+                                                   "57 895", "7,50", "T1-2025")})
+    visited = []
+    get = scraper.driver.get
+    scraper.driver.get = lambda target: (visited.append(target), get(target))
+
+    data = scraper.scrape_scpi(39, sections=["chiffres_cles"])
+    assert visited == [url]
+    assert data.sections == ("chiffres_cles",)
+    assert data.chiffres_cles.prix_part_actuel == 670.0
+    assert data.general_info is NOT_FETCHED and data.general_info.nom is None
+    assert list(data.actualites) == []
+
+    visited.clear()
+    data = scraper.scrape_scpi(39, sections="trimestre_info,actualites")
+    assert len(visited) == 2
+    assert data.trimestre_info.trimestre == "T1-2025"
+    assert not data.has_section("general_info")
+
+
+
+def test_synthetic_pages_are_fully_extracted():
+    """Les pages du serveur synthétique renseignent tous les champs (banc de charge réaliste)"""
+    page = EXTRACTION_PLAN.read(main_page(42, page_size=4096))
+    for cls in (SCPIGeneralInfo, SCPIChiffresClés, SCPITrimestreInfo):
+        assert EXTRACTION_PLAN.missing_fields(cls, page) == []
+    assert EXTRACTION_PLAN.build(SCPIGeneralInfo, page).nom == "SYNTHETIQUE 42"
+
+
+def test_sections_report_status_and_missing_parts():
+    """Chaque section porte son statut ; une page informations absente n'invalide pas les autres"""
+    url = "https://www.scpi-lab.com/scpi.php?vue=&produit_id=42"
+    info_url = "https://www.scpi-lab.com/scpi/scpi-synthetique-42-42/information"
+    scraper = _make_replay_scraper({url: main_page(42), info_url: information_page(42)})
+    data = scraper.scrape_scpi(42)
+    assert data.section_status == {name: "ok" for name in data.sections}
+    assert len(data.sections) == 5 and set(data.section_timings) == set(data.sections)
+    assert data.evenements_cles[0].variation.endswith("%")
+    assert "Bulletin d'information trimestriel" in data.actualites[0].titre
+
+    scraper = _make_replay_scraper({url: make_page("EPARGNE FONCIERE", "670,00", "619,75", "4,52",
+                                                   "57 895", "7,50", "T1-2025")})
+    data = scraper.scrape_scpi(42)
+    assert data.section_status["chiffres_cles"] == "partial"
+    assert data.section_status["evenements_cles"] == "ok"  # Aucun événement : section vide, pas manquante
+    assert data.evenements_cles == []
+    assert data.section_status["actualites"] == "error"
+    assert data.missing_sections == ["actualites"]
+    assert data.actualites is NOT_FETCHED and data.chiffres_cles.prix_part_actuel == 670.0
+
+    restored = SCPIData.from_dict(data.to_dict())
+    assert restored.section_status == data.section_status and restored.missing_sections == data.missing_sections
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DU SCHÉMA D'EXTRACTION")
+    print("=" * 50)
+    test_each_scpi_gets_its_own_figures()
+    test_missing_fields_are_none()
+    test_parsers()
+    test_selected_sections_skip_pages_and_extractors()
+    test_synthetic_pages_are_fully_extracted()
+    test_sections_report_status_and_missing_parts()
+    print("✅ Schéma d'extraction validé!")
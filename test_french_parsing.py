@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la conversion par lots des valeurs au format français
+"""
+
+import numpy as np
+
+import french_parsing
+from french_parsing import parse_amounts, parse_dates, parse_numbers, parse_percents
+from scpi_analytics import SnapshotTable
+from test_helpers import make_history
+
+
+def test_amounts_numbers_and_percents():
+    """Unités, signes, séparateurs de milliers (espaces ordinaires, insécables ou fines, points) et valeurs absentes"""
+    amounts = parse_amounts(["4 174 M€", "1,33 M€", "[255,50M€]", "-12,21 M€", "850 k€",
+                             "2,5 Mds €", "1 234,56 €", "7 (37,60 M€)", "-", None])
+    expected = [4.174e9, 1.33e6, 255.5e6, -12.21e6, 850e3, 2.5e9, 1234.56, 37.6e6]
+    assert np.allclose(amounts[:8], expected)
+    assert np.isnan(amounts[8:]).all()
+
+    assert np.allclose(parse_numbers(["57 895", "670,00 €", "1.234,5", "1 234", "1\u00a0234", "1\u202f234 567", "1.5"]),
+                       [57895, 670, 1234.5, 1234, 1234, 1234567, 1.5])
+    assert np.allclose(parse_amounts(["4\u202f174 M€", "1\u00a0234,56 €", "T1 : 125 M€"]), [4.174e9, 1234.56, 125e6])
+
+    # Chiffres collés par une espace sans former de groupe de milliers : ambigu, NaN plutôt qu'une valeur tronquée
+    assert np.isnan(parse_numbers(["2024 12,5", "1 2345", "12 34", "1\u00a02345"])).all()
+    assert np.isnan(parse_amounts(["2024 12,5 M€", "1 2345 €"])).all()
+    percents = parse_percents(["4,52 %", "−2,37%", "19,78 € (2,37 %)", "4,52"])
+    assert np.allclose(percents[:3], [4.52, -2.37, 2.37]) and np.isnan(percents[3])
+
+
+def test_dates_to_days():
+    """Années sur 2 ou 4 chiffres ; date invalide ou absente -> NaT"""
+    dates = parse_dates(["29-04-25", "01/12/2024", "31-02-24", None])
+    assert dates.dtype == np.dtype("datetime64[D]")
+    assert list(dates[:2]) == [np.datetime64("2025-04-29"), np.datetime64("2024-12-01")]
+    assert np.isnat(dates[2:]).all()
+    assert dates[0].astype(np.int64) - dates[1].astype(np.int64) == 149
+
+
+def test_repeated_values_are_parsed_once():
+    """Chaque valeur distincte n'est analysée qu'une fois, liste ou tableau NumPy"""
+    calls = []
+    original = french_parsing.parse_amount
+    french_parsing.parse_amount = lambda text: calls.append(text) or original(text)
+    try:
+        values = ["4 174 M€", "1,33 M€", None] * 1000
+        parsed = french_parsing.parse_amounts(values)
+        assert len(calls) == 3
+        assert np.allclose(parsed[:2], [4.174e9, 1.33e6]) and np.isnan(parsed[2::3]).all()
+
+        calls.clear()
+        array = np.array(["4 174 M€", "1,33 M€"] * 1000)
+        assert np.array_equal(french_parsing.parse_amounts(array), np.tile([4.174e9, 1.33e6], 1000))
+        assert len(calls) == 2
+    finally:
+        french_parsing.parse_amount = original
+
+
+def test_snapshot_table_converts_amount_columns():
+    """Capitalisation et collecte sont disponibles en euros dans l'historique"""
+    table = SnapshotTable.from_scpi_data(make_history())
+    assert np.allclose(table.values["capitalisation"], 100e6)
+    assert np.allclose(table.values["collecte_brute"], 1e6)
+    assert np.isnan(table.values["collecte_nette"]).all()  # "-"
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA CONVERSION PAR LOTS")
+    print("=" * 50)
+    test_amounts_numbers_and_percents()
+    test_dates_to_days()
+    test_repeated_values_are_parsed_once()
+    test_snapshot_table_converts_amount_columns()
+    print("✅ Conversion par lots validée!")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Constructeurs partagés par les tests (données, historique, files de travail, Chrome simulé)
+Importés par les fichiers test_*.py plutôt que d'un fichier de test à l'autre
+"""
+
+import re
+import threading
+import urllib.request
+from dataclasses import replace
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from browser_contexts import NAVIGATE_JS, POLL_JS, STOP_JS
+from rate_controller import AIMDRateController
+from scpi_dataclasses import SCPIData, SCPIGeneralInfo, SCPIChiffresClés, SCPITrimestreInfo
+from work_queue import SQLiteWorkQueue
+
+
+def make_scpi_data(produit_id: int) -> SCPIData:
+    """Construit un SCPIData minimal pour les tests"""
+    return SCPIData(
+        general_info=SCPIGeneralInfo(
+            nom=f"SCPI {produit_id}", societe_gestion="TEST", statut="Ouverte",
+            type_capital="CAPITAL VARIABLE", type_actifs="Bureaux",
+            localisation_principale="IDF", annee_creation=2000
+        ),
+        chiffres_cles=SCPIChiffresClés(
+            capitalisation="100 M€", nb_associes=1000, prix_part_actuel=200.0,
+            prix_part_vente=180.0, date_prix_part="01-01-2025",
+            dividende_brut_annuel=10.0, taux_distribution_brut=5.0,
+            dividende_net_annuel=9.5, taux_distribution_net=4.75,
+            report_nouveau=1.0, report_nouveau_euros=2.0,
+            valeur_reconstitution=210.0, ratio_reconstitution=-4.76,
+            nb_immeubles=10, surface_totale=5000,
+            repartition_sectorielle={"Bureaux": 100.0},
+            repartition_geographique={"Ile-de-France": 100.0},
+            ratio_engagement=10.0
+        ),
+        trimestre_info=SCPITrimestreInfo(
+            trimestre="T1-2025", collecte_brute="1 M€", collecte_nette="-",
+            nb_acquisitions=0, montant_acquisitions="0 M€", nb_cessions=0,
+            montant_cessions="0 M€", acompte_brut=2.5, delai_cession="-",
+            liste_attente="-"
+        ),
+        evenements_cles=[],
+        actualites=[],
+        date_extraction=datetime(2025, 4, 1),
+        url_source=f"https://www.scpi-lab.com/scpi.php?vue=&produit_id={produit_id}",
+        produit_id=produit_id
+    )
+
+
+def make_history() -> List[SCPIData]:
+    """Deux SCPI sur 5 trimestres ; la SCPI 39 baisse son prix puis son acompte"""
+    history = []
+    for i, (prix, acompte) in enumerate([(835.0, 9.18), (835.0, 9.18), (835.0, 9.18), (670.0, 9.18), (670.0, 7.50)]):
+        for produit_id, facteur in ((39, 1.0), (85, 1.2)):
+            data = make_scpi_data(produit_id)
+            year, quarter = 2024 + (i // 4), i % 4 + 1
+            data.trimestre_info = replace(data.trimestre_info, trimestre=f"T{quarter}-{year}",
+                                          acompte_brut=acompte * facteur if produit_id == 39 else 2.5)
+            data.chiffres_cles = replace(data.chiffres_cles,
+                                         prix_part_actuel=prix if produit_id == 39 else 200.0,
+                                         valeur_reconstitution=743.07 if produit_id == 39 else 210.0)
+            data.date_extraction = datetime(year, 3 * quarter - 1, 15)
+            history.append(data)
+    return history
+
+
+def make_queue(tmp_path, **kwargs) -> SQLiteWorkQueue:
+    """File SQLite neuve dans le répertoire temporaire du test"""
+    return SQLiteWorkQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+class ContextDriver:
+    """Chrome simulé : contextes DevTools, onglets et chargements en arrière-plan"""
+
+    def __init__(self):
+        self.tabs = {"principal": {"title": "", "source": "", "loaded": True}}
+        self.contexts = []
+        self.disposed = []
+        self.closed_tabs = []
+        self.current = "principal"
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def page_source(self):
+        return self.tabs[self.current]["source"]
+
+    def _switch(self, handle):
+        self.current = handle
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Target.createBrowserContext":
+            self.contexts.append(f"ctx-{len(self.contexts)}")
+            return {"browserContextId": self.contexts[-1]}
+        if cmd == "Target.createTarget":
+            assert params.get("browserContextId") in self.contexts + [None]
+            self.tabs[f"onglet-{len(self.tabs)}"] = {"title": "", "source": "", "loaded": True}
+            return {"targetId": str(len(self.tabs))}
+        if cmd == "Target.closeTarget":
+            self.closed_tabs.append(params["targetId"])
+            return {}
+        assert cmd == "Target.disposeBrowserContext"
+        self.disposed.append(params["browserContextId"])
+        return {}
+
+    def _load(self, tab, url):
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                source = response.read().decode("utf-8")
+        except Exception:
+            source = "<title>Erreur</title>"
+        tab.update(title=re.search(r"<title>(.*?)</title>", source, re.S).group(1), source=source, loaded=True)
+        with self._lock:
+            self.in_flight -= 1
+
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current]
+        if script == NAVIGATE_JS:
+            tab["loaded"] = False
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            threading.Thread(target=self._load, args=(tab, args[0]), daemon=True).start()
+            return None
+        if script == POLL_JS:
+            return tab["title"] if tab["loaded"] else None
+        assert script == STOP_JS
+        return None
+
+
+def fake_scraper(driver, closed):
+    controller = AIMDRateController(initial_concurrency=4, max_concurrency=4, initial_interval=0, verbose=False)
+    return SimpleNamespace(driver=driver, rate_controller=controller, close=lambda: closed.append(True))
@@ -5,7 +5,7 @@ Script de test pour l'extraction multiple de SCPI
 Teste la nouvelle fonctionnalité sans lancer le scraper complet
 """
 
-from main import SCPI_LIST, extract_multiple_scpi, print_scpi_header
+from main import SCPI_LIST, extract_multiple_scpi, parse_scpi_ids, print_scpi_header
 import sys
 
 def test_scpi_list():
@@ -35,6 +35,19 @@ def test_header_display():
         print_scpi_header(scpi, i, len(SCPI_LIST))
         print("   (Simulation d'extraction...)")
 
+def test_parse_scpi_ids():
+    """--ids accepte une liste et des plages ; noms de SCPI_LIST si l'ID est connu"""
+    assert parse_scpi_ids("85,39") == [SCPI_LIST[0], SCPI_LIST[1]]
+    assert [scpi['id'] for scpi in parse_scpi_ids("1-3,7")] == [1, 2, 3, 7]
+    assert parse_scpi_ids("1000")[0]['nom'] == "SCPI 1000"
+    for text in ("", "a-b"):
+        try:
+            parse_scpi_ids(text)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"--ids {text!r} devrait être refusé")
+
 def test_dry_run():
     """Simulation d'exécution sans scraping réel"""
     print("\n🧪 TEST DE SIMULATION D'EXTRACTION MULTIPLE")
@@ -62,6 +75,7 @@ if __name__ == "__main__":
     else:
         test_scpi_list()
         test_header_display()
+        test_parse_scpi_ids()
         
         print("\n🚀 COMMANDES DISPONIBLES:")
         print("=" * 50)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la capture des réponses JSON (journal réseau de Chrome)
+Aucun navigateur n'est lancé : le journal "performance" est simulé sur les pages
+du serveur synthétique, les URL retenues sont interrogées sur le serveur local
+"""
+
+import json
+import os
+from fnmatch import fnmatchcase
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from browser_contexts import pipeline
+from config_scraper import scraper_config
+from mock_scpi_server import main_page, repartitions, repartitions_json, start_server
+from network_capture import EndpointRegistry, NetworkCapture, map_json_fields, url_template
+from page_archive import ReplayDriver, _make_replay_scraper
+from quarter_backfill import PageFetcher
+from rate_controller import AIMDRateController
+from scpi_dataclasses import SECTION_ERROR
+from test_helpers import ContextDriver, fake_scraper
+
+
+def is_blocked(url, patterns):
+    """URL bloquée par Network.setBlockedURLs (seul joker : *)"""
+    return any(fnmatchcase(url, pattern.replace("[", "[[]")) for pattern in patterns)
+
+
+class CaptureDriver(ReplayDriver):
+    """Pages de l'archive, avec le journal réseau des réponses JSON chargées par chaque page"""
+
+    def __init__(self, pages, responses):
+        super().__init__(pages)
+        self.responses = responses  # URL de la page -> [(URL JSON, contenu)]
+        self.bodies = {}
+        self.blocked = []
+        self._log = []
+
+    def get(self, url):
+        super().get(url)
+        self._log = []
+        for json_url, body in self.responses.get(url, []):
+            if is_blocked(json_url, self.blocked):
+                continue
+            request_id = f"req-{len(self.bodies)}"
+            self.bodies[request_id] = body
+            self._log.append({"message": json.dumps({"message": {
+                "method": "Network.responseReceived",
+                "params": {"requestId": request_id, "response": {"url": json_url, "mimeType": "application/json"}}
+            }})})
+
+    def get_log(self, name):
+        assert name == "performance"
+        entries, self._log = self._log, []
+        return entries
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.setBlockedURLs":
+            self.blocked = params["urls"]
+            return {}
+        assert cmd == "Network.getResponseBody"
+        return {"body": self.bodies[params["requestId"]], "base64Encoded": False}
+
+
+class SharedLogContextDriver(ContextDriver):
+    """Onglets simulés dont les pages SCPI appellent l'API des graphiques, journal commun aux onglets"""
+
+    def __init__(self):
+        super().__init__()
+        self.log = []
+        self.bodies = {}
+        self.blocked = {}  # Onglet -> motifs de Network.setBlockedURLs
+        self.chart_requests = 0
+
+    def _load(self, tab, url):
+        # Les graphiques sont chargés avant la fin du document (readyState complete)
+        json_url = url.replace("scpi.php?vue=&produit_id=", "api/scpi/") + "/repartitions"
+        if "produit_id=" in url and not is_blocked(json_url, tab.get("blocked", [])):
+            with self._lock:
+                self.chart_requests += 1
+            with urllib.request.urlopen(json_url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+            with self._lock:
+                request_id = f"req-{len(self.bodies)}"
+                self.bodies[request_id] = body
+                self.log.append({"message": json.dumps({"message": {
+                    "method": "Network.responseReceived",
+                    "params": {"requestId": request_id, "response": {"url": json_url, "mimeType": "application/json"}}
+                }})})
+        super()._load(tab, url)
+
+    def get_log(self, name):
+        assert name == "performance"
+        with self._lock:
+            entries, self.log = self.log, []
+        return entries
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.getResponseBody":
+            return {"body": self.bodies[params["requestId"]], "base64Encoded": False}
+        if cmd == "Network.setBlockedURLs":
+            self.tabs[self.current]["blocked"] = params["urls"]
+            return {}
+        return super().execute_cdp_cmd(cmd, params)
+
+
+class UnreadableLogContextDriver(SharedLogContextDriver):
+    """Journal "performance" indisponible (Chrome lancé sans journalisation réseau)"""
+
+    def get_log(self, name):
+        raise RuntimeError("log type 'performance' not found")
+
+
+def test_chart_payloads_are_mapped_to_fields():
+    """Séries de graphiques, dictionnaires et fractions sont attribués selon leur contexte"""
+    assert map_json_fields(json.loads(repartitions_json(42))) == {
+        "repartition_sectorielle": repartitions(42)["sectorielle"],
+        "repartition_geographique": repartitions(42)["geographique"],
+    }
+    payload = {"data": {"zones": {"Paris": 0.6, "Régions": 0.4}, "evolution": [["2024", 3.1], ["2025", 4.2]]}}
+    assert map_json_fields(payload) == {"repartition_geographique": {"Paris": 60.0, "Régions": 40.0}}
+    assert map_json_fields({"series": [{"name": "Bureaux", "y": 60}, {"name": "Commerces", "y": 40}]}) == {}
+
+
+def test_endpoint_is_learned_then_called_directly():
+    """La première extraction lit le journal réseau, les suivantes interrogent l'URL retenue"""
+    server = start_server()
+    handle, path = tempfile.mkstemp(suffix=".json")
+    os.close(handle)
+    os.remove(path)
+    try:
+        fetcher = PageFetcher(AIMDRateController(initial_interval=0, verbose=False), timeout=5)
+        capture = NetworkCapture(EndpointRegistry(path), fetcher)
+        pages = {f"https://www.scpi-lab.com/scpi.php?vue=&produit_id={i}": main_page(i) for i in (42, 7)}
+        json_url = f"{server.base_url}/api/scpi/42/repartitions"
+        responses = {"https://www.scpi-lab.com/scpi.php?vue=&produit_id=42": [(json_url, repartitions_json(42))]}
+
+        scraper = _make_replay_scraper(pages)
+        scraper.driver = CaptureDriver(pages, responses)
+        scraper.network_capture = capture
+        data = scraper.scrape_scpi(42, sections=["chiffres_cles"])
+        assert data.chiffres_cles.repartition_geographique == repartitions(42)["geographique"]
+        assert server.requests == 0
+        template = f"{server.base_url}/api/scpi/{{produit_id}}/repartitions"
+        assert EndpointRegistry(path).endpoints == {
+            template: ["repartition_geographique", "repartition_sectorielle"]}
+
+        # Nouvelle exécution : l'URL est appelée sans relire le journal de la page
+        scraper.network_capture = NetworkCapture(EndpointRegistry(path), fetcher)
+        data = scraper.scrape_scpi(7, sections=["chiffres_cles"])
+        assert data.chiffres_cles.repartition_sectorielle == repartitions(7)["sectorielle"]
+        assert server.requests == 1
+    finally:
+        server.shutdown()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def test_only_id_segments_become_template_parameters():
+    """L'identifiant n'est remplacé que comme segment de chemin ou valeur de paramètre entière"""
+    assert url_template("https://x/api/v10/scpi/10/repartitions?produit_id=10&v=10a", 10) == \
+        "https://x/api/v10/scpi/{produit_id}/repartitions?produit_id={produit_id}&v=10a"
+    assert url_template("https://x/api/v10/charts.json?scpi=110", 10) is None
+    assert url_template("https://x/api/charts/{10}.json", 10) is None
+
+
+def _record_endpoints(path, worker):
+    registry = EndpointRegistry(path)
+    for i in range(20):
+        registry.record(f"https://x/api/{worker}/{i}/{{produit_id}}", ["repartition_sectorielle"])
+    registry.forget(f"https://x/api/{worker}/0/{{produit_id}}")
+    return worker
+
+
+def test_concurrent_workers_keep_all_endpoints(tmp_path):
+    """Plusieurs processus retiennent des URL en même temps : aucune n'est perdue à la réécriture"""
+    path = str(tmp_path / "json_endpoints.json")
+    workers = ["a", "b", "c", "d"]
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_record_endpoints, [path] * 4, workers))
+    endpoints = EndpointRegistry(path).endpoints
+    assert set(endpoints) == {f"https://x/api/{w}/{i}/{{produit_id}}" for w in workers for i in range(1, 20)}
+
+
+def test_direct_calls_respect_section_budget(tmp_path):
+    """Les URL retenues ne sont interrogées que dans le temps restant de la section"""
+    server = start_server(latency=2)
+    try:
+        registry = EndpointRegistry(str(tmp_path / "json_endpoints.json"))
+        registry.record(f"{server.base_url}/api/scpi/{{produit_id}}/repartitions", ["repartition_sectorielle"])
+        fetcher = PageFetcher(AIMDRateController(initial_interval=0, verbose=False), timeout=30)
+        capture = NetworkCapture(registry, fetcher)
+
+        assert capture.direct(42, remaining=lambda: 0) == {}
+        assert server.requests == 0
+
+        start = time.monotonic()
+        assert capture.direct(42, remaining=lambda: 0.3) == {}
+        assert time.monotonic() - start < 1.5
+        assert registry.endpoints  # Délai dépassé : l'URL n'est pas oubliée
+    finally:
+        server.shutdown()
+
+
+def test_pipeline_tabs_keep_their_own_json_responses(tmp_path):
+    """Pipeline du mode multiple : chaque SCPI reçoit les réponses JSON de son onglet, pas des voisins"""
+    server = start_server(latency=0.1)
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config.update(base_url=server.base_url, pipeline_depth=2)
+        driver = SharedLogContextDriver()
+        scraper = fake_scraper(driver, [])
+        registry_path = str(tmp_path / "json_endpoints.json")
+        scraper.network_capture = NetworkCapture(EndpointRegistry(registry_path), PageFetcher(timeout=5))
+        pool = pipeline(scraper=scraper)
+        futures = {produit_id: pool.submit(produit_id, ["chiffres_cles"]) for produit_id in (42, 7, 13)}
+        results = {produit_id: future.result(timeout=30) for produit_id, future in futures.items()}
+        pool.close()
+
+        for produit_id, data in results.items():
+            assert data.chiffres_cles.repartition_sectorielle == repartitions(produit_id)["sectorielle"]
+            assert data.chiffres_cles.repartition_geographique == repartitions(produit_id)["geographique"]
+        assert EndpointRegistry(registry_path).endpoints == {
+            f"{server.base_url}/api/scpi/{{produit_id}}/repartitions": ["repartition_geographique",
+                                                                       "repartition_sectorielle"]}
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+def run_pipeline(driver, registry, ids):
+    """Extrait les chiffres clés de ids dans le pipeline d'onglets, avec la capture réseau"""
+    scraper = fake_scraper(driver, [])
+    scraper.network_capture = NetworkCapture(registry, PageFetcher(timeout=5))
+    pool = pipeline(scraper=scraper)
+    try:
+        futures = {produit_id: pool.submit(produit_id, ["chiffres_cles"]) for produit_id in ids}
+        return {produit_id: future.result(timeout=30) for produit_id, future in futures.items()}
+    finally:
+        pool.close()
+
+
+def test_known_endpoints_replace_page_requests(tmp_path):
+    """URL retenue : la page ne la demande plus (graphiques non chargés), la requête directe la remplace"""
+    server = start_server(latency=0.1)
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config.update(base_url=server.base_url, pipeline_depth=2)
+        registry = EndpointRegistry(str(tmp_path / "json_endpoints.json"))
+        registry.record(f"{server.base_url}/api/scpi/{{produit_id}}/repartitions",
+                        ["repartition_geographique", "repartition_sectorielle"])
+        driver = SharedLogContextDriver()
+        results = run_pipeline(driver, registry, (42, 7))
+
+        assert driver.chart_requests == 0
+        assert server.requests == 4  # 2 pages principales + 2 requêtes directes
+        for produit_id, data in results.items():
+            assert data.chiffres_cles.repartition_sectorielle == repartitions(produit_id)["sectorielle"]
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+def test_unreadable_log_does_not_fail_section(tmp_path):
+    """Journal réseau illisible pendant le chargement : l'analyse ne relit pas le journal du rejeu"""
+    server = start_server()
+    saved = dict(scraper_config.config)
+    try:
+        scraper_config.config.update(base_url=server.base_url, pipeline_depth=2)
+        registry = EndpointRegistry(str(tmp_path / "json_endpoints.json"))
+        results = run_pipeline(UnreadableLogContextDriver(), registry, (42, 7))
+
+        for data in results.values():
+            assert data.section_status["chiffres_cles"] != SECTION_ERROR
+            assert data.chiffres_cles.prix_part_actuel is not None
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA CAPTURE DES RÉPONSES JSON")
+    print("=" * 50)
+    test_chart_payloads_are_mapped_to_fields()
+    test_endpoint_is_learned_then_called_directly()
+    test_only_id_segments_become_template_parameters()
+    for test in (test_concurrent_workers_keep_all_endpoints, test_direct_calls_respect_section_budget,
+                 test_pipeline_tabs_keep_their_own_json_responses, test_known_endpoints_replace_page_requests,
+                 test_unreadable_log_does_not_fail_section):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Capture des réponses JSON validée!")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de l'archive de pages (enregistrement, compaction et rejeu hors ligne)
+Aucun navigateur n'est lancé : les pages viennent du serveur synthétique
+"""
+
+import io
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import main
+import page_archive
+from mock_scpi_server import information_page, main_page, scpi_nom
+from page_archive import PageArchive, _make_replay_scraper, replay_archive
+from scpi_scraper import info_page_url
+
+SITE = "https://www.scpi-lab.com"
+
+
+def scpi_pages(produit_id):
+    return {f"{SITE}/scpi.php?vue=&produit_id={produit_id}": main_page(produit_id),
+            info_page_url(SITE, scpi_nom(produit_id), produit_id): information_page(produit_id)}
+
+
+def record_scpi(archive, produit_id, session):
+    for url, html in scpi_pages(produit_id).items():
+        archive.record(url, html, {"Content-Type": "text/html"}, produit_id=produit_id, session=session)
+
+
+def test_record_and_replay_round_trip(tmp_path):
+    """Les pages relues sont identiques et le rejeu redonne l'extraction en direct"""
+    archive = PageArchive(str(tmp_path))
+    assert archive.codec == "zstd"
+    for produit_id in (85, 39):
+        record_scpi(archive, produit_id, f"session-{produit_id}")
+    pages = archive.pages()
+    assert [archive.read(page) for page in pages[:2]] == list(scpi_pages(85).values())
+    assert [snapshot.produit_id for snapshot in archive.snapshots()] == [85, 39]
+
+    results = replay_archive(str(tmp_path), workers=1)
+    assert [data.produit_id for data in results] == [39, 85]
+    for data in results:
+        expected = _make_replay_scraper(scpi_pages(data.produit_id)).scrape_scpi(data.produit_id)
+        assert data.chiffres_cles == expected.chiffres_cles and data.actualites == expected.actualites
+
+
+def test_compaction_with_trained_dictionary(tmp_path):
+    """Le dictionnaire entraîné réduit l'archive ; une archive zlib se relit avec zstd installé"""
+    archive = PageArchive(str(tmp_path / "zstd"))
+    originals = []
+    for produit_id in range(1, 31):
+        record_scpi(archive, produit_id, f"session-{produit_id}")
+        originals.extend(scpi_pages(produit_id).values())
+    before = archive.stats()["taille_compressee"]
+    archive.close(min_pages=50)
+    assert archive.dict_id == 1 and archive.stats()["taille_compressee"] < before
+    assert [archive.read(page) for page in archive.pages()] == originals
+    assert {page.dict_id for page in PageArchive(str(tmp_path / "zstd")).pages()} == {1}
+
+    legacy = PageArchive(str(tmp_path / "zlib"), codec="zlib")
+    for produit_id in range(1, 6):
+        record_scpi(legacy, produit_id, f"session-{produit_id}")
+    legacy.train_dictionary()
+    legacy.compact()
+    reopened = PageArchive(str(tmp_path / "zlib"))  # zstd par défaut : dictionnaire de chaque page
+    assert reopened.codec == "zstd" and reopened.dict_id is None
+    assert [reopened.read(page) for page in reopened.pages()] == originals[:10]
+
+
+def test_replay_history_with_missing_fields(tmp_path):
+    """Une page incomplète (ni nom ni prix) n'interrompt pas le rejeu de toute l'archive"""
+    archive = PageArchive(str(tmp_path))
+    record_scpi(archive, 85, "session-85")
+    archive.record(f"{SITE}/scpi.php?vue=&produit_id=7", "<html><head><title></title></head><body></body></html>",
+                   produit_id=7, session="session-7")
+    output = io.StringIO()
+    with redirect_stdout(output):
+        results = main.replay_history(str(tmp_path))
+    assert [data.produit_id for data in results] == [7, 85]
+    assert results[0].general_info.nom is None and results[0].chiffres_cles.prix_part_actuel is None
+    row = next(line for line in output.getvalue().splitlines() if line.startswith("7 "))
+    assert row.split()[-3:] == ["-", "-", "-"]
+
+
+def test_pages_listed_before_compaction_still_read(tmp_path):
+    """Une compaction par un autre processus déplace les pages : read() relit leur emplacement"""
+    archive = PageArchive(str(tmp_path))
+    originals = []
+    for produit_id in range(1, 11):
+        record_scpi(archive, produit_id, f"session-{produit_id}")
+        originals.extend(scpi_pages(produit_id).values())
+    listed = archive.pages()
+
+    other = PageArchive(str(tmp_path))
+    assert other.train_dictionary() is not None
+    other.compact()
+    assert [archive.read(page) for page in listed] == originals
+
+
+def test_index_reads_only_appended_lines(tmp_path):
+    """L'index déjà lu n'est pas relu : close() ne coûte que les pages ajoutées depuis"""
+    archive = PageArchive(str(tmp_path))
+    record_scpi(archive, 85, "session-85")
+    assert len(archive.pages()) == 2
+
+    parsed = []
+    original = page_archive.json.loads
+    page_archive.json.loads = lambda text: parsed.append(text) or original(text)
+    try:
+        PageArchive(str(tmp_path)).record(f"{SITE}/scpi.php?vue=&produit_id=7", main_page(7), produit_id=7)
+        archive.close(min_pages=50)
+        assert len(archive.pages()) == 3
+    finally:
+        page_archive.json.loads = original
+    assert [json.loads(text)["produit_id"] for text in parsed] == [7]
+
+
+def _record_batch(path, produit_ids, compact):
+    archive = PageArchive(path)
+    for produit_id in produit_ids:
+        record_scpi(archive, produit_id, f"session-{produit_id}")
+        if compact and produit_id % 10 == 0:
+            archive.compact()
+    return len(produit_ids)
+
+
+def test_concurrent_processes_share_archive(tmp_path):
+    """Plusieurs workers enregistrent pendant qu'un autre compacte : aucune page perdue ni mélangée"""
+    batches = [list(range(start, start + 50)) for start in (100, 200, 300, 400)]
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_record_batch, [str(tmp_path)] * 4, batches, [False, True, False, False]))
+
+    archive = PageArchive(str(tmp_path))
+    pages = archive.pages()
+    assert len(pages) == 2 * 200
+    for snapshot in archive.snapshots():
+        expected = scpi_pages(snapshot.produit_id)
+        assert {page.url: archive.read(page) for page in snapshot.pages} == expected
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE L'ARCHIVE DE PAGES")
+    print("=" * 50)
+    for test in (test_record_and_replay_round_trip, test_compaction_with_trained_dictionary,
+                 test_replay_history_with_missing_fields, test_pages_listed_before_compaction_still_read,
+                 test_index_reads_only_appended_lines, test_concurrent_processes_share_archive):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Archive de pages validée!")
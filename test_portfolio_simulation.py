@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la simulation vectorisée des TRI et rendements nets
+"""
+
+from dataclasses import replace
+
+import numpy as np
+
+from portfolio_simulation import Scenarios, SimulationInputs, delai_years, simulate, solve_irr
+from test_helpers import make_scpi_data
+
+
+def irr_by_bisection(flows):
+    """TRI de référence : flux (date, montant) actualisés un par un"""
+    low, high = -0.9, 1.0
+    for _ in range(200):
+        rate = (low + high) / 2
+        npv = sum(amount / (1 + rate) ** t for t, amount in flows)
+        low, high = (rate, high) if npv > 0 else (low, rate)
+    return rate
+
+
+def test_irr_matches_cash_flow_discounting():
+    """TRI en forme close identique à l'actualisation flux par flux, q = 1 compris"""
+    rng = np.random.default_rng(1)
+    prix = np.array([[200.0], [835.0], [1000.0]])
+    dividende = np.array([[9.5], [40.0], [10.0]])
+    facteur = np.array([[1.02, 0.97, 1.0], [1.0, 1.05, 0.99], [1.0, 1.0, 1.0]])
+    duree = np.array([10.0, 4.0, 15.0])
+    revente = rng.uniform(0.6, 1.0, (3, 3)) * prix
+    echeance = duree + np.array([[0.0], [0.25], [1.0]])
+    tri = solve_irr(prix, dividende, facteur, duree, revente, echeance)
+    for i in range(3):
+        for s in range(3):
+            flows = [(0, -prix[i, 0])]
+            flows += [(t, dividende[i, 0] * facteur[i, s] ** (t - 1)) for t in range(1, int(duree[s]) + 1)]
+            flows += [(echeance[i, s], revente[i, s])]
+            assert abs(tri[i, s] - irr_by_bisection(flows)) < 1e-9
+
+    # Sans croissance, décote ni délai : le TRI est le taux de distribution
+    assert np.allclose(solve_irr(prix, dividende, 1.0, duree, prix, duree), dividende / prix)
+
+
+def test_simulation_per_scpi_and_portfolio():
+    """Chiffres extraits, repli sur le taux net, délai de cession et portefeuille pondéré"""
+    sans_dividende = make_scpi_data(85)
+    sans_dividende.chiffres_cles = replace(sans_dividende.chiffres_cles, dividende_net_annuel=None,
+                                           taux_distribution_net=5.0)
+    sans_dividende.trimestre_info = replace(sans_dividende.trimestre_info, delai_cession="3 mois")
+    sans_prix = make_scpi_data(10)
+    sans_prix.chiffres_cles = replace(sans_prix.chiffres_cles, prix_part_actuel=None)
+    inputs = SimulationInputs.from_scpi_data([make_scpi_data(39), sans_dividende, sans_prix])
+    assert np.allclose(inputs.dividende[:2], [9.5, 10.0]) and np.isnan(inputs.dividende[2])
+    assert inputs.delai.tolist() == [0.0, 0.25, 0.0]
+
+    scenarios = Scenarios.draw(3, 2000, seed=0)
+    result = simulate(inputs, scenarios, {"seule": {39: 1.0}, "mixte": {39: 1.0, 85: 3.0, 10: 5.0}})
+    assert result.tri.shape == (3, 2000) and np.isnan(result.tri[2]).all()
+    assert np.allclose(result.portefeuilles["seule"]["tri"], result.tri[0])
+    mixte = result.portefeuilles["mixte"]["tri"]
+    assert np.all((mixte >= result.tri[:2].min(axis=0) - 1e-9) & (mixte <= result.tri[:2].max(axis=0) + 1e-9))
+    # Sans croissance moyenne, le rendement net médian reste proche du taux de distribution
+    assert abs(np.median(result.rendement_net[0]) - 9.5 / 200 * 100) < 0.1
+    assert [row["produit_id"] for row in result.summary()] == ["39", "85", "portefeuille", "portefeuille"]
+    assert delai_years("Sans objet") == 0.0 and delai_years("6 semaines") == 7 * 6 / 365
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA SIMULATION DE PORTEFEUILLE")
+    print("=" * 50)
+    test_irr_matches_cash_flow_discounting()
+    test_simulation_per_scpi_and_portfolio()
+    print("✅ Simulation de portefeuille validée!")
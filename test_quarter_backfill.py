@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la reprise de l'historique trimestriel
+Les pages viennent du serveur synthétique local, aucun navigateur n'est lancé
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from config_scraper import scraper_config
+from extraction_schema import EXTRACTION_PLAN
+from mock_scpi_server import main_page, quarter_history, quarter_page, start_server
+from quarter_backfill import FetchError, PageFetcher, QuarterBackfill, QuarterStore, discover_quarters
+from rate_controller import AIMDRateController
+from scpi_dataclasses import SCPITrimestreInfo
+
+
+def make_backfill(store):
+    controller = AIMDRateController(initial_concurrency=4, max_concurrency=4, initial_interval=0,
+                                    max_interval=0.05, verbose=False)
+    return QuarterBackfill(store, PageFetcher(controller, timeout=5), workers=4)
+
+
+def test_quarters_are_discovered_from_main_page():
+    """Le sélecteur d'historique donne la série complète, le dernier trimestre compris"""
+    quarters = discover_quarters(EXTRACTION_PLAN.read(main_page(42)))
+    assert quarters == quarter_history(42)
+    assert len(quarters) > 4
+
+
+def test_only_selector_options_are_quarters():
+    """Un trimestre cité dans le texte n'est pas une vue ; un trou du sélecteur n'est pas comblé"""
+    history = quarter_history(42)
+    gap = history[1]
+    page = main_page(42).replace(f"<option>{gap.replace('-', ' ')}</option>", "")
+    page = page.replace("<h2>Événements clés</h2>", "<p>Bulletin du T1 2015 publié</p><h2>Événements clés</h2>")
+    assert discover_quarters(EXTRACTION_PLAN.read(page)) == [q for q in history if q != gap]
+
+
+class StaticFetcher:
+    """Le site répond la même page à toutes les URL"""
+
+    def __init__(self, html):
+        self.html = html
+
+    def fetch(self, url):
+        return self.html
+
+
+def test_quarter_view_must_display_requested_quarter(tmp_path):
+    """Une vue qui affiche le dernier trimestre n'est pas stockée sous le trimestre demandé"""
+    store = QuarterStore(str(tmp_path / "trimestres.db"))
+    oldest = quarter_history(42)[0]
+    backfill = QuarterBackfill(store, StaticFetcher(main_page(42)))  # Sélecteur complet, chiffres du dernier
+    assert backfill._fetch_quarter(42, oldest) is None
+
+    backfill = QuarterBackfill(store, StaticFetcher(quarter_page(42, oldest)))
+    assert backfill._fetch_quarter(42, oldest).trimestre == oldest
+
+    backfill = QuarterBackfill(store, StaticFetcher("<html><title>SCPI</title><body>Maintenance</body></html>"))
+    try:
+        backfill._fetch_quarter(42, oldest)
+        assert False, "FetchError attendue"
+    except FetchError:
+        pass
+    store.close()
+
+
+def test_absent_quarters_are_retried_later(tmp_path):
+    """Un trimestre absent n'est ignoré que quarter_absent_days jours ; un trimestre stocké l'est toujours"""
+    store = QuarterStore(str(tmp_path / "trimestres.db"))
+    store.save(42, "T1-2020", None)
+    store.save(42, "T2-2020", EXTRACTION_PLAN.build(SCPITrimestreInfo, EXTRACTION_PLAN.read(quarter_page(42, "T2-2020"))))
+    assert store.known(42) == {"T1-2020", "T2-2020"}
+    assert store.known(42, absent_days=0) == {"T2-2020"}
+    store.close()
+
+
+def test_backfill_stores_every_quarter_once():
+    """Les trimestres manquants sont chargés, puis ignorés à la reprise suivante"""
+    server = start_server()
+    saved = dict(scraper_config.config)
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        scraper_config.config["base_url"] = server.base_url
+        store = QuarterStore(path)
+
+        # Premier passage perturbé : les trimestres en erreur ne sont pas stockés
+        server.error_rate = 0.3
+        first = make_backfill(store).run([42, 7, 10 ** 6])
+        assert first.scpi == 3
+        assert any(produit_id == 10 ** 6 for produit_id, _, _ in first.failures)  # SCPI inexistante
+
+        server.error_rate = 0.0
+        second = make_backfill(store).run([42, 7])
+        assert second.skipped == first.fetched
+        assert not second.failures
+
+        history = store.history(42)
+        assert [info.trimestre for info in history] == quarter_history(42)
+        oldest = EXTRACTION_PLAN.build(SCPITrimestreInfo, EXTRACTION_PLAN.read(quarter_page(42, history[0].trimestre)))
+        assert history[0] == oldest
+        assert len({info.acompte_brut for info in history}) > 1
+        assert set(store.histories()) == {7, 42}
+
+        # Historique complet : seules les pages principales sont rechargées
+        requests = server.requests
+        third = make_backfill(store).run([42, 7])
+        assert third.fetched == 0 and third.skipped == third.discovered
+        assert server.requests - requests == 2
+        store.close()
+    finally:
+        scraper_config.config.clear()
+        scraper_config.config.update(saved)
+        server.shutdown()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA REPRISE DE L'HISTORIQUE TRIMESTRIEL")
+    print("=" * 50)
+    test_quarters_are_discovered_from_main_page()
+    test_only_selector_options_are_quarters()
+    for test in (test_quarter_view_must_display_requested_quarter, test_absent_quarters_are_retried_later):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    test_backfill_stores_every_quarter_once()
+    print("✅ Reprise de l'historique validée!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du contrôleur de débit adaptatif (AIMD)
+Les latences sont passées directement à release : aucun chargement réel
+"""
+
+import time
+
+from mock_scpi_server import main_page
+from page_archive import ReplayDriver
+from rate_controller import AIMDRateController
+from scpi_scraper import SCPIScraperConfigurable
+
+
+def make_controller(**options):
+    settings = dict(initial_concurrency=1, max_concurrency=4, initial_interval=2.0, interval_step=0.25,
+                    target_latency=10.0, verbose=False)
+    settings.update(options)
+    return AIMDRateController(**settings)
+
+
+def test_additive_increase_on_fast_responses():
+    """Chaque succès rapide ajoute 1/concurrence et retire un pas d'espacement, dans les bornes"""
+    controller = make_controller()
+    controller.acquire()
+    controller.release(0.5)
+    assert controller.concurrency == 2.0 and controller.interval == 1.75
+    controller.release(0.5)
+    assert controller.concurrency == 2.5 and controller.interval == 1.5
+    for _ in range(50):
+        controller.release(0.5)
+    assert controller.concurrency == 4.0 and controller.interval == 0.0
+    assert [decision.action for decision in controller.decisions] == ["hausse"] * controller.adjustments
+
+
+def test_multiplicative_decrease_once_per_incident():
+    """Un refus ou une réponse lente divise la concurrence ; les requêtes en vol du même incident n'en rajoutent pas"""
+    controller = make_controller(initial_concurrency=4, initial_interval=0.0)
+    controller.release(1.0, ok=False, status=429)
+    assert controller.concurrency == 2.0 and controller.interval == 0.25 and controller.errors == 1
+    controller.release(1.0, ok=False, status=429)  # Même incident : pas de seconde réduction
+    assert controller.concurrency == 2.0 and controller.errors == 2
+
+    controller.last_decrease -= 60
+    controller.release(12.0)  # Lente mais sans erreur
+    assert controller.concurrency == 1.0 and controller.interval == 0.5 and controller.errors == 2
+    assert [decision.action for decision in controller.decisions] == ["baisse", "baisse"]
+    assert "latence 12.00s" in controller.decisions[-1].reason
+
+
+def test_slots_and_bounded_history():
+    """try_acquire respecte concurrence et espacement ; l'historique des décisions est borné"""
+    controller = make_controller(initial_concurrency=2, initial_interval=0.0, max_decisions=5)
+    assert controller.try_acquire() and controller.try_acquire() and not controller.try_acquire()
+    controller.release(0.1)
+    assert controller.try_acquire()
+
+    for i in range(20):
+        controller.release(0.1, ok=False, status=429)
+        controller.last_decrease -= 60
+        controller.release(0.1)
+    assert len(controller.decisions) == 5 and controller.adjustments > 5
+
+
+class SettlingScraper(SCPIScraperConfigurable):
+    """Vrai _navigate sur une page servie sans Chrome ; l'attente des scripts est observée"""
+
+    def __init__(self, pages, controller):
+        self.driver = ReplayDriver(pages)
+        self.driver.set_page_load_timeout = lambda seconds: None
+        self.recorder = None
+        self.rate_controller = controller
+        self.page_load_timeout = self._current_load_timeout = 30
+        self._deadline = None
+        self._source = None
+        self.active_while_settling = []
+
+    def _settle_page(self):
+        self.active_while_settling.append(self.rate_controller.active)
+        time.sleep(0.3)
+
+
+def test_navigation_latency_excludes_page_settling():
+    """Le contrôleur ne voit que la navigation : créneau rendu avant l'attente des scripts"""
+    url = "https://www.scpi-lab.com/scpi.php?vue=&produit_id=85"
+    controller = make_controller(initial_interval=0.0)
+    scraper = SettlingScraper({url: main_page(85)}, controller)
+    scraper._navigate(url)
+    assert scraper.active_while_settling == [0]
+    assert controller.requests == 1 and controller.latency_ewma < 0.2
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DU CONTRÔLEUR DE DÉBIT")
+    print("=" * 50)
+    test_additive_increase_on_fast_responses()
+    test_multiplicative_decrease_once_per_incident()
+    test_slots_and_bounded_history()
+    test_navigation_latency_excludes_page_settling()
+    print("✅ Contrôleur de débit validé!")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la planification adaptative des rafraîchissements
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from refresh_scheduler import RefreshScheduler
+from scpi_analytics import SnapshotTable
+
+START = date(2024, 1, 1)
+
+
+def make_table(series):
+    """series: produit_id -> fonction (semaine) -> (prix, acompte, nb_actualites), une extraction par semaine"""
+    rows = [(produit_id, START + timedelta(weeks=week), *values(week))
+            for produit_id, values in series.items() for week in range(52)]
+    dates = np.array([np.datetime64(day, "D") for _, day, *_ in rows])
+    return SnapshotTable(
+        produit_id=np.array([row[0] for row in rows], dtype=np.int64),
+        quarter=np.array([day.year * 4 + (day.month - 1) // 3 for _, day, *_ in rows], dtype=np.int64),
+        date=dates,
+        values={name: np.array([row[2 + i] for row in rows], dtype=np.float64)
+                for i, name in enumerate(("prix_part_actuel", "acompte_brut", "nb_actualites"))}
+    )
+
+
+def quarterly(week):
+    """Acompte et actualités ne bougent qu'au bulletin (fin de trimestre + 30 jours)"""
+    day = START + timedelta(weeks=week)
+    published = sum(1 for month in (1, 4, 7, 10) if day >= date(2024, month, 1) + timedelta(days=30))
+    return 200.0, 2.5 + published * 0.1, 3 + published
+
+
+SERIES = {
+    39: lambda week: (670.0 + week, 7.5, 4),  # Prix de part modifié chaque semaine
+    85: lambda week: (200.0, 2.5, 3),  # Jamais modifiée
+    10: quarterly,
+}
+
+
+def test_change_rates_follow_history():
+    """Une SCPI volatile passe avant une SCPI stable, qui n'est pas rafraîchie"""
+    scheduler = RefreshScheduler().fit_table(make_table(SERIES))
+    last = START + timedelta(weeks=51)
+    probability = scheduler.change_probability(last + timedelta(days=7))
+    assert probability[39] > 0.5  # Environ un changement par semaine
+    assert probability[85] < scheduler.min_probability
+
+    plan = scheduler.plan([85, 39, 66], max_requests=2, sections=["chiffres_cles", "trimestre_info"],
+                          today=last + timedelta(days=7))
+    assert plan.produit_ids == [66, 39]  # 66 jamais extraite
+    assert [c.produit_id for c in plan.skipped] == [85]
+    assert plan.requests == 2
+
+    # Toutes les sections : la page informations coûte une seconde requête
+    plan = scheduler.plan([85, 39, 66], max_requests=2, today=last + timedelta(days=7))
+    assert plan.produit_ids == [66]
+
+
+def test_bulletins_raise_priority():
+    """La SCPI à changements trimestriels devient prioritaire une fois le bulletin publié"""
+    scheduler = RefreshScheduler().fit_table(make_table(SERIES))
+    last = START + timedelta(weeks=51)  # 23/12/2024, prochain bulletin le 31/01/2025
+    before = scheduler.change_probability(date(2025, 1, 20))[10]
+    after = scheduler.change_probability(date(2025, 2, 3))[10]
+    assert before < 0.25 and after > 0.5
+
+    plan = scheduler.plan([85, 10], max_requests=2, today=date(2025, 2, 3))
+    assert plan.produit_ids == [10]
+    assert plan.selected[0].bulletins == 1
+    assert scheduler.plan([10], today=last + timedelta(days=100)).selected[0].probability == 1.0
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA PLANIFICATION DES RAFRAÎCHISSEMENTS")
+    print("=" * 50)
+    test_change_rates_follow_history()
+    test_bulletins_raise_priority()
+    print("✅ Planification validée!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests du profileur par échantillonnage
+Le scraper de rejeu (sans navigateur) tourne en boucle pendant l'échantillonnage
+"""
+
+import sys
+import tempfile
+import time
+
+from page_archive import _make_replay_scraper
+from sampling_profiler import SamplingProfiler
+from mock_scpi_server import main_page
+
+
+def run_replay_scrapes(produit_id, seconds):
+    url = f"https://www.scpi-lab.com/scpi.php?vue=&produit_id={produit_id}"
+    scraper = _make_replay_scraper({url: main_page(produit_id, page_size=20000)})
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        scraper.scrape_scpi(produit_id, sections=["general_info", "chiffres_cles", "trimestre_info"])
+
+
+def test_samples_are_attributed_to_scpi_and_stage():
+    """Chaque échantillon porte la SCPI en cours et l'étape d'extraction"""
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = SamplingProfiler(interval=0.002, output_dir=directory)
+        with profiler:
+            run_replay_scrapes(39, 0.5)
+
+        assert profiler.samples > 20
+        stages = profiler.by_scpi_and_stage()["39"]
+        # Le rejeu ne construit plus de DOM : le temps passe dans l'analyse des pages, pas dans _navigate
+        assert "_read_page" in stages
+        assert sum(stages.values()) <= profiler.duration + 0.05
+
+        labels = [label for label, _, _ in profiler.top_functions(1000)]
+        assert any("scrape_scpi" in label for label in labels)
+
+        folded_path, summary_path = profiler.write("test")
+        with open(folded_path, encoding="utf-8") as f:
+            line = f.readline().strip()
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith("thread ") and int(count) > 0
+
+
+def test_extraction_helpers_are_charged_to_extract_stage():
+    """Un échantillon pris dans _build_section est attribué à la méthode _extract_* appelante"""
+    def _build_section():
+        return sys._getframe()
+
+    def _extract_general_info_simple():
+        return _build_section()
+
+    def scrape_scpi(produit_id):
+        return _extract_general_info_simple()
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = SamplingProfiler(output_dir=directory)
+        profiler._sample("MainThread", scrape_scpi(39), 0.01)
+        assert dict(profiler.by_scpi_and_stage()["39"]) == {"_extract_general_info_simple": 0.01}
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DU PROFILEUR PAR ÉCHANTILLONNAGE")
+    print("=" * 50)
+    test_samples_are_attributed_to_scpi_and_stage()
+    test_extraction_helpers_are_charged_to_extract_stage()
+    print("✅ Profileur validé!")
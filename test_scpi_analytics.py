@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests des analyses vectorisées sur l'historique des SCPI
+"""
+
+import math
+from dataclasses import replace
+from datetime import datetime
+
+from scpi_analytics import SnapshotTable, compute_metrics, derive_events
+from test_helpers import make_history, make_scpi_data
+
+
+def test_rolling_yield_and_discount():
+    """Rendement glissant sur 4 trimestres et décote par rapport à la reconstitution"""
+    grid = SnapshotTable.from_scpi_data(make_history()).to_grid()
+    metrics = compute_metrics(grid)
+    row_39 = list(grid.produit_ids).index(39)
+    assert math.isnan(metrics["rendement_4t"][row_39, 2])
+    assert abs(metrics["rendement_4t"][row_39, 3] - 4 * 9.18 / 670.0 * 100) < 1e-9
+    assert abs(metrics["decote_reconstitution"][row_39, 3] - (670.0 / 743.07 - 1) * 100) < 1e-9
+    assert metrics["changement_prix"][row_39].tolist() == [False, False, False, True, False]
+
+
+def test_events_from_changes():
+    """Les événements clés sont déduits des changements détectés"""
+    grid = SnapshotTable.from_scpi_data(make_history()).to_grid()
+    events = derive_events(grid)
+    assert events[85] == []
+    dividende, prix = events[39]
+    assert dividende.type_evenement == "Dividende"
+    assert dividende.variation == "-18,30%"
+    assert dividende.valeur_avant == "9.18 €/part"
+    assert dividende.document_lie == "BT1 2025"
+    assert prix.type_evenement == "Prix de part"
+    assert prix.description == "Baisse : -19,76%"
+
+
+def test_last_snapshot_of_quarter_wins():
+    """Plusieurs extractions dans le même trimestre : la plus récente est retenue"""
+    first, second = make_scpi_data(39), make_scpi_data(39)
+    second.date_extraction = datetime(2025, 4, 20)
+    second.chiffres_cles = replace(second.chiffres_cles, prix_part_actuel=250.0)
+    grid = SnapshotTable.from_scpi_data([second, first]).to_grid()
+    assert grid.values["prix_part_actuel"].tolist() == [[250.0]]
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DES ANALYSES DE L'HISTORIQUE")
+    print("=" * 50)
+    test_rolling_yield_and_discount()
+    test_events_from_changes()
+    test_last_snapshot_of_quarter_wins()
+    print("✅ Analyses validées!")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la journalisation en file (QueueHandler et thread d'écriture)
+"""
+
+import io
+import json
+import logging.handlers
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import scpi_logging
+from scpi_logging import flush_logging, get_logger, pretty_output_enabled, setup_logging, shutdown_logging
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_go_through_queue_and_are_filtered(tmp_path):
+    """Le thread appelant ne fait que déposer ; niveau filtré avant la file ; champs extra en JSON"""
+    log_file = str(tmp_path / "scpi.log")
+    try:
+        root = setup_logging(level="INFO", log_format="json", log_file=log_file)
+        assert [type(handler) for handler in root.handlers] == [logging.handlers.QueueHandler]
+        assert not pretty_output_enabled()
+
+        logger = get_logger("test")
+        logger.debug("ignoré")
+        logger.info("✅ SCPI %s terminée", 85, extra={"produit_id": 85, "duree": 1.5})
+        flush_logging()
+        (event,) = read_events(log_file)
+        assert event["msg"] == "✅ SCPI 85 terminée" and event["logger"] == "scpi.test"
+        assert event["produit_id"] == 85 and event["duree"] == 1.5
+
+        setup_logging(quiet=True, log_format="json", log_file=log_file)
+        logger.info("ignoré en mode silencieux")
+        logger.warning("⚠️ avertissement")
+        flush_logging()
+        assert [event["level"] for event in read_events(log_file)] == ["INFO", "WARNING"]
+    finally:
+        setup_logging()
+
+
+def test_shutdown_drains_queue_and_stops_listener(tmp_path):
+    """shutdown_logging écrit les messages encore en file puis arrête le thread d'écriture"""
+    log_file = str(tmp_path / "scpi.log")
+    try:
+        setup_logging(level="INFO", log_format="json", log_file=log_file)
+        listener = scpi_logging._listener
+        logger = get_logger("test")
+        for i in range(500):
+            logger.info("message %s", i)
+        shutdown_logging()
+        assert scpi_logging._listener is None and listener._thread is None
+        assert listener.handlers[0].stream is None  # Fichier de log fermé
+        assert [event["msg"] for event in read_events(log_file)] == [f"message {i}" for i in range(500)]
+        flush_logging()  # Sans thread d'écriture : ne bloque pas
+    finally:
+        setup_logging()
+
+
+def test_console_output_without_setup(tmp_path):
+    """Scraper utilisé comme bibliothèque : messages INFO affichés sans setup_logging()"""
+    root = logging.getLogger(scpi_logging.ROOT_LOGGER)
+    try:
+        shutdown_logging()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        scpi_logging._default_handler()
+        logger = get_logger("scraper")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            logger.debug("ignoré")
+            logger.info("✅ SCPI %s terminée", 85)
+        assert output.getvalue() == "✅ SCPI 85 terminée\n"
+        assert not root.propagate  # Pas de doublon si l'application configure le logger racine
+
+        setup_logging(log_file=str(tmp_path / "scpi.log"))
+        assert [type(handler) for handler in root.handlers] == [logging.handlers.QueueHandler]
+    finally:
+        setup_logging()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA JOURNALISATION EN FILE")
+    print("=" * 50)
+    for test in (
+        test_records_go_through_queue_and_are_filtered,
+        test_shutdown_drains_queue_and_stops_listener,
+        test_console_output_without_setup,
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    print("✅ Journalisation validée!")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests de la file de travail distribuée (backend SQLite)
+Aucun navigateur n'est lancé : l'extraction est simulée
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from scpi_dataclasses import NOT_FETCHED
+from config_scraper import scraper_config
+from work_queue import SQLiteWorkQueue, QueueWorker, WorkQueueBackend, open_queue
+from selenium.common.exceptions import TimeoutException
+from mock_scpi_server import information_page, main_page, scpi_nom
+from page_archive import ReplayDriver
+from rate_controller import AIMDRateController
+from scpi_scraper import SCPIScraperConfigurable, ScrapeDeadlineExceeded, info_page_url
+from test_helpers import make_queue, make_scpi_data
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    """Remettre en file une SCPI déjà en attente ne crée pas de doublon"""
+    queue = make_queue(tmp_path)
+    assert queue.enqueue([85, 39, 10]) == 3
+    assert queue.enqueue([85, 39]) == 0
+    assert queue.stats()["pending"] == 3
+
+
+def test_claim_leases_each_scpi_once(tmp_path):
+    """Deux workers ne réservent jamais la même SCPI"""
+    queue = make_queue(tmp_path)
+    queue.enqueue([85, 39])
+    first = queue.claim("worker-a", 60)
+    second = queue.claim("worker-b", 60)
+    assert {first.produit_id, second.produit_id} == {85, 39}
+    assert queue.claim("worker-c", 60) is None
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    """Un bail expiré (worker arrêté) remet la SCPI en file"""
+    queue = make_queue(tmp_path)
+    queue.enqueue([85])
+    lease = queue.claim("worker-a", 0.01)
+    time.sleep(0.05)
+    other = queue.claim("worker-b", 60)
+    assert other.produit_id == 85
+    assert queue.heartbeat(lease, 60) is False
+    assert queue.heartbeat(other, 60) is True
+
+
+def test_complete_is_idempotent(tmp_path):
+    """Un résultat écrit deux fois pour la même génération n'est stocké qu'une fois"""
+    queue = make_queue(tmp_path)
+    queue.enqueue([85])
+    lease = queue.claim("worker-a", 60)
+    data = make_scpi_data(85)
+    assert queue.complete(lease, data) is True
+    assert queue.complete(lease, data) is False
+    results = queue.results()
+    assert len(results) == 1
+    assert results[0].produit_id == 85
+    assert results[0].chiffres_cles.repartition_sectorielle == {"Bureaux": 100.0}
+
+
+def test_partial_result_round_trip(tmp_path):
+    """Les sections non extraites restent non extraites après stockage"""
+    queue = make_queue(tmp_path)
+    queue.enqueue([39])
+    lease = queue.claim("worker-a", 60)
+    data = make_scpi_data(39)
+    data.general_info = NOT_FETCHED
+    data.actualites = NOT_FETCHED
+    data.sections = ("chiffres_cles", "trimestre_info", "evenements_cles")
+    queue.complete(lease, data)
+    stored = queue.results()[0]
+    assert stored.sections == data.sections
+    assert stored.general_info is NOT_FETCHED
+    assert stored.chiffres_cles.prix_part_actuel == 200.0
+
+
+def test_worker_drains_queue_and_retries_failures(tmp_path):
+    """Le worker traite toute la file et remet en file les échecs"""
+    queue = make_queue(tmp_path)
+    queue.enqueue([85, 39, 10])
+    calls = []
+
+    def fake_scrape(produit_id, sections):
+        calls.append(produit_id)
+        if produit_id == 10 and calls.count(10) == 1:
+            raise RuntimeError("timeout")
+        return make_scpi_data(produit_id)
+
+    worker = QueueWorker(queue, worker_id="test", lease_seconds=30, scrape_func=fake_scrape)
+    assert worker.run() == 3
+    assert calls.count(10) == 2
+    assert queue.stats()["done"] == 3
+
+    # Un nouveau passage crée une nouvelle génération, l'historique est conservé
+    assert queue.enqueue([85]) == 1
+    worker.run()
+    assert len(queue.results(latest_only=False)) == 4
+
+
+def test_expired_poison_task_fails_after_max_attempts(tmp_path):
+    """Une SCPI qui fait tomber chaque worker (bail jamais rendu) finit en échec définitif"""
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue([85])
+    for attempt in range(2):
+        assert queue.claim(f"worker-{attempt}", 0.01).produit_id == 85
+        time.sleep(0.05)
+    assert queue.requeue_expired() == 1
+    assert queue.claim("worker-c", 60) is None
+    assert queue.stats()["failed"] == 1
+
+    # Une nouvelle génération repart avec tous ses essais
+    assert queue.enqueue([85]) == 1
+    assert queue.claim("worker-d", 60).generation == 2
+
+
+def test_worker_attempt_limit_applies_to_expired_leases(tmp_path):
+    """La limite d'essais du worker suit son bail : un autre worker l'applique à l'expiration"""
+    queue = make_queue(tmp_path, max_attempts=5)
+    queue.enqueue([85, 39])
+    assert queue.claim("worker-a", 0.01, max_attempts=1).produit_id == 39
+    time.sleep(0.05)
+    assert queue.requeue_expired() == 1
+    assert queue.stats() == {"pending": 1, "leased": 0, "done": 0, "failed": 1}
+
+    # Limite explicite à 0 : pas confondue avec "non précisée"
+    assert SQLiteWorkQueue(str(tmp_path / "zero.db"), max_attempts=0).max_attempts == 0
+
+
+def test_backend_is_chosen_from_config(tmp_path):
+    """main.py ouvre la file par open_queue : le backend vient de la config"""
+    assert isinstance(open_queue(str(tmp_path / "file.db")), WorkQueueBackend)
+    saved = scraper_config.config.get("queue_backend")
+    scraper_config.config["queue_backend"] = "broker"
+    try:
+        open_queue(str(tmp_path / "file.db"))
+        assert False, "ValueError attendue"
+    except ValueError as e:
+        assert "sqlite" in str(e)
+    finally:
+        scraper_config.config["queue_backend"] = saved
+
+
+class HangingDriver(ReplayDriver):
+    """Le premier chargement de la SCPI 10 reste bloqué jusqu'au délai"""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.hung = 0
+        self.scripts = []
+
+    def get(self, url):
+        if url.endswith("produit_id=10") and not self.hung:
+            self.hung += 1
+            raise TimeoutException("page bloquée")
+        super().get(url)
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+
+
+class HangingScraper(SCPIScraperConfigurable):
+    """Vrai _navigate, sans Chrome ni attente du titre"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.recorder = None
+        self.rate_controller = AIMDRateController(initial_interval=0, verbose=False)
+        self.page_load_timeout = self._current_load_timeout = 30
+        self._deadline = None
+        self._source = None
+
+    def _wait_for_page_load(self):
+        return True
+
+    def _settle_page(self):
+        pass
+
+
+def test_hung_page_is_aborted_and_requeued(tmp_path):
+    """Une page bloquée est interrompue (window.stop) et la SCPI repasse en file"""
+    pages = {f"https://www.scpi-lab.com/scpi.php?vue=&produit_id={produit_id}": main_page(produit_id)
+             for produit_id in (85, 10)}
+    scraper = HangingScraper(HangingDriver(pages))
+    queue = make_queue(tmp_path)
+    queue.enqueue([85, 10])
+
+    worker = QueueWorker(queue, worker_id="test", lease_seconds=30,
+                         scrape_func=lambda produit_id, sections: scraper.scrape_scpi(produit_id, sections=["chiffres_cles"]))
+    assert worker.run() == 2
+    assert scraper.driver.scripts == ["window.stop();"]
+    assert queue.stats()["done"] == 2
+    assert len(worker.durations) == 3
+    assert scraper.rate_controller.errors == 1
+
+    # Délai de la SCPI épuisé : aucune page n'est plus chargée
+    scraper._deadline = time.monotonic() - 1
+    try:
+        scraper._navigate(next(iter(pages)))
+        assert False, "ScrapeDeadlineExceeded attendue"
+    except ScrapeDeadlineExceeded:
+        pass
+
+
+class BudgetDriver(HangingDriver):
+    """La page informations ne répond jamais ; les délais de chargement demandés sont notés"""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.load_timeouts = []
+
+    def get(self, url):
+        if url.endswith("/information"):
+            raise TimeoutException("page informations bloquée")
+        super().get(url)
+
+    def set_page_load_timeout(self, seconds):
+        self.load_timeouts.append(seconds)
+
+
+def test_section_budget_bounds_its_page_load():
+    """Le budget d'actualites borne le chargement de la page informations ; les autres sections restent"""
+    url = "https://www.scpi-lab.com/scpi.php?vue=&produit_id=85"
+    scraper = HangingScraper(BudgetDriver({url: main_page(85)}))
+    saved = scraper_config.config.get("section_budgets")
+    scraper_config.config["section_budgets"] = {"actualites": 2}
+    try:
+        data = scraper.scrape_scpi(85)
+    finally:
+        scraper_config.config["section_budgets"] = saved
+    assert scraper.driver.load_timeouts and max(scraper.driver.load_timeouts) <= 2
+    assert data.section_status["actualites"] == "timeout" and data.missing_sections == ["actualites"]
+    assert data.chiffres_cles.prix_part_actuel is not None
+
+
+class CountingDriver(HangingDriver):
+    """Compte les pages chargées"""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.loaded = []
+
+    def get(self, url):
+        self.loaded.append(url)
+        super().get(url)
+
+
+def test_scheduled_sections_reach_worker(tmp_path):
+    """Le coût planifié (requêtes) est celui que les workers chargent réellement"""
+    from main import SCPI_LIST, schedule_refresh
+
+    site = "https://www.scpi-lab.com"
+    pages = {}
+    for produit_id in (scpi['id'] for scpi in SCPI_LIST):
+        pages[f"{site}/scpi.php?vue=&produit_id={produit_id}"] = main_page(produit_id)
+        pages[info_page_url(site, scpi_nom(produit_id), produit_id)] = information_page(produit_id)
+    for sections in ("chiffres_cles,trimestre_info", None):
+        queue_path = str(tmp_path / f"queue-{len(sections or '')}.db")  # Historique vide : tout est planifié
+        plan = schedule_refresh(queue_path, sections)
+        driver = CountingDriver(pages)
+        driver.hung = 1  # Aucune page bloquée
+        worker = QueueWorker(SQLiteWorkQueue(queue_path), worker_id="test", lease_seconds=30)
+        worker._scraper = HangingScraper(driver)  # Chemin par défaut : scrape_scpi(produit_id, sections)
+        assert worker.run() == len(SCPI_LIST)
+        assert plan.requests == len(driver.loaded) == len(SCPI_LIST) * (1 if sections else 2)
+        latest = SQLiteWorkQueue(queue_path).results()
+        assert all(data.has_section("actualites") == (sections is None) for data in latest)
+
+
+if __name__ == "__main__":
+    print("🧪 TESTS DE LA FILE DE TRAVAIL DISTRIBUÉE")
+    print("=" * 50)
+    tests = [test_enqueue_is_idempotent, test_claim_leases_each_scpi_once, test_expired_lease_is_requeued,
+             test_complete_is_idempotent, test_partial_result_round_trip,
+             test_worker_drains_queue_and_retries_failures, test_expired_poison_task_fails_after_max_attempts,
+             test_worker_attempt_limit_applies_to_expired_leases, test_backend_is_chosen_from_config, test_hung_page_is_aborted_and_requeued,
+             test_scheduled_sections_reach_worker]
+    for test in tests:
+        with tempfile.TemporaryDirectory() as directory:
+            test(Path(directory))
+    test_section_budget_bounds_its_page_load()
+    print("✅ File de travail validée!")
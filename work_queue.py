@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File de travail distribuée pour l'extraction SCPI
+Plusieurs machines se partagent la même liste de SCPI grâce à des baux (leases)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from scpi_dataclasses import SCPIData, normalize_sections
+from config_scraper import scraper_config
+from scpi_logging import get_logger
+
+logger = get_logger("file")
+
+
+@dataclass
+class Lease:
+    """Bail détenu par un worker sur une SCPI"""
+    produit_id: int
+    generation: int
+    worker_id: str
+    expires_at: float
+    sections: Optional[Tuple[str, ...]] = None  # Sections à extraire (None = toutes)
+
+
+class WorkQueueBackend(ABC):
+    """
+    Interface d'un backend de file de travail
+
+    Le backend SQLite sert aux tests et aux déploiements simples (fichier
+    partagé). Un broker réseau implémente les mêmes méthodes en production
+    et s'enregistre dans QUEUE_BACKENDS.
+    """
+
+    path: str  # Emplacement de la file (affiché par main.py)
+
+    @abstractmethod
+    def enqueue(self, produit_ids: Iterable[int], sections=None) -> int:
+        """
+        Ajoute des SCPI à la file, retourne le nombre de tâches (re)mises en attente
+
+        Les sections (None = toutes) sont stockées avec la tâche et transmises au worker.
+        """
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int = None) -> Optional[Lease]:
+        """
+        Réserve la prochaine SCPI disponible, None si la file est vide
+
+        max_attempts (None = celui du backend) reste attaché au bail : il s'applique aussi
+        quand le bail expire et que la tâche est remise en file par un autre worker.
+        """
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        """Prolonge un bail, retourne False s'il a été perdu"""
+
+    @abstractmethod
+    def complete(self, lease: Lease, data: SCPIData, duration: float = None) -> bool:
+        """Enregistre le résultat (idempotent), retourne True s'il est nouveau"""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str, max_attempts: int = None) -> None:
+        """Remet la tâche en file ou la marque en échec définitif"""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Remet en file les baux expirés (échec définitif après max_attempts), retourne leur nombre"""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Retourne le nombre de tâches par statut"""
+
+    @abstractmethod
+    def results(self, latest_only: bool = True, previous: int = 0) -> List[SCPIData]:
+        """SCPIData stockées : une génération par SCPI (la dernière, ou `previous` fois antérieure)"""
+
+    @abstractmethod
+    def durations(self) -> Dict[int, float]:
+        """Durée moyenne d'extraction de chaque SCPI (secondes)"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Libère les connexions du backend"""
+
+
+class SQLiteWorkQueue(WorkQueueBackend):
+    """Backend SQLite (mode WAL) : une base partagée par tous les workers"""
+
+    def __init__(self, path: str = None, max_attempts: int = None):
+        self.path = path or scraper_config.get("queue_path", "scpi_queue.db")
+        # Essais avant échec définitif, baux expirés compris (tâche qui fait tomber son worker)
+        self.max_attempts = max_attempts if max_attempts is not None else scraper_config.get("max_attempts", 3)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                produit_id INTEGER PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 1,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL,
+                sections TEXT,
+                max_attempts INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                produit_id INTEGER NOT NULL,
+                generation INTEGER NOT NULL,
+                worker_id TEXT,
+                date_extraction TEXT,
+                duration REAL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (produit_id, generation)
+            );
+        """)
+        # Files créées avant ces colonnes : sections (NULL = toutes), essais du worker (NULL = backend)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+        if "sections" not in columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN sections TEXT")
+        if "max_attempts" not in columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN max_attempts INTEGER")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Une connexion par thread (le heartbeat tourne dans son propre thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def enqueue(self, produit_ids: Iterable[int], sections=None) -> int:
+        now = time.time()
+        sections = None if sections is None else ",".join(normalize_sections(sections))
+        queued = 0
+        conn = self._transaction()
+        try:
+            for produit_id in produit_ids:
+                row = conn.execute(
+                    "SELECT status FROM tasks WHERE produit_id = ?", (produit_id,)
+                ).fetchone()
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO tasks (produit_id, updated_at, sections) VALUES (?, ?, ?)",
+                        (produit_id, now, sections)
+                    )
+                    queued += 1
+                elif row[0] in ("done", "failed"):
+                    # Nouvelle génération : le résultat précédent reste dans l'historique
+                    conn.execute(
+                        "UPDATE tasks SET status = 'pending', generation = generation + 1, "
+                        "worker_id = NULL, lease_expires = NULL, attempts = 0, "
+                        "last_error = NULL, updated_at = ?, sections = ? WHERE produit_id = ?",
+                        (now, sections, produit_id)
+                    )
+                    queued += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return queued
+
+    def _requeue_expired(self, conn, now: float) -> int:
+        cursor = conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= COALESCE(max_attempts, ?) THEN 'failed' "
+            "ELSE 'pending' END, worker_id = NULL, lease_expires = NULL, "
+            "last_error = CASE WHEN attempts >= COALESCE(max_attempts, ?) THEN 'bail expiré' ELSE last_error END, "
+            "updated_at = ? WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, self.max_attempts, now, now)
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        conn = self._transaction()
+        try:
+            count = self._requeue_expired(conn, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int = None) -> Optional[Lease]:
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT produit_id, generation, sections FROM tasks WHERE status = 'pending' "
+                "ORDER BY attempts, produit_id LIMIT 1"
+            ).fetchone()
+            lease = None
+            if row is not None:
+                expires_at = now + lease_seconds
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, max_attempts = ?, updated_at = ? WHERE produit_id = ?",
+                    (worker_id, expires_at, max_attempts, now, row[0])
+                )
+                lease = Lease(row[0], row[1], worker_id, expires_at,
+                              None if row[2] is None else tuple(row[2].split(",")))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return lease
+
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE produit_id = ? "
+            "AND generation = ? AND worker_id = ? AND status = 'leased'",
+            (now + lease_seconds, now, lease.produit_id, lease.generation, lease.worker_id)
+        )
+        if cursor.rowcount == 1:
+            lease.expires_at = now + lease_seconds
+            return True
+        return False
+
+    def complete(self, lease: Lease, data: SCPIData, duration: float = None) -> bool:
+        now = time.time()
+        conn = self._transaction()
+        try:
+            # INSERT OR IGNORE : un second worker sur la même génération n'écrase rien
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO results (produit_id, generation, worker_id, "
+                "date_extraction, duration, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (lease.produit_id, lease.generation, lease.worker_id,
+                 data.date_extraction.isoformat(), duration,
+                 json.dumps(data.to_dict(), ensure_ascii=False))
+            )
+            inserted = cursor.rowcount == 1
+            conn.execute(
+                "UPDATE tasks SET status = 'done', worker_id = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE produit_id = ? AND generation = ?",
+                (now, lease.produit_id, lease.generation)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def fail(self, lease: Lease, error: str, max_attempts: int = None) -> None:
+        if max_attempts is None:
+            max_attempts = self.max_attempts
+        self._conn().execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker_id = NULL, lease_expires = NULL, last_error = ?, updated_at = ? "
+            "WHERE produit_id = ? AND generation = ? AND worker_id = ? AND status = 'leased'",
+            (max_attempts, error, time.time(), lease.produit_id, lease.generation, lease.worker_id)
+        )
+
+    def stats(self) -> dict:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+        ).fetchall()
+        stats = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        stats.update(dict(rows))
+        return stats
+
+    def results(self, latest_only: bool = True, previous: int = 0) -> List[SCPIData]:
+        """
+        Retourne les SCPIData stockées (dernière génération par défaut)
+
+        Args:
+            latest_only: Une génération par SCPI (sinon tout l'historique)
+            previous: Avec latest_only, génération `previous` fois antérieure (1 = avant-dernière)
+        """
+        if latest_only:
+            rows = self._conn().execute(
+                "SELECT payload FROM ("
+                "  SELECT produit_id, payload, "
+                "  ROW_NUMBER() OVER (PARTITION BY produit_id ORDER BY generation DESC) AS rang FROM results"
+                ") WHERE rang = ? ORDER BY produit_id",
+                (previous + 1,)
+            ).fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT payload FROM results ORDER BY produit_id, generation"
+            ).fetchall()
+        return [SCPIData.from_dict(json.loads(row[0])) for row in rows]
+
+    def durations(self) -> Dict[int, float]:
+        """Durée moyenne d'extraction de chaque SCPI (secondes)"""
+        rows = self._conn().execute(
+            "SELECT produit_id, AVG(duration) FROM results WHERE duration IS NOT NULL GROUP BY produit_id"
+        ).fetchall()
+        return {produit_id: duration for produit_id, duration in rows}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Backends disponibles, choisis par la config "queue_backend"
+QUEUE_BACKENDS = {"sqlite": SQLiteWorkQueue}
+
+
+def open_queue(path: str = None) -> WorkQueueBackend:
+    """Ouvre la file de travail avec le backend configuré"""
+    name = scraper_config.get("queue_backend", "sqlite")
+    if name not in QUEUE_BACKENDS:
+        raise ValueError(f"Backend de file inconnu: {name} (disponibles: {', '.join(QUEUE_BACKENDS)})")
+    return QUEUE_BACKENDS[name](path)
+
+
+class _Heartbeat(threading.Thread):
+    """Prolonge périodiquement le bail pendant l'extraction"""
+
+    def __init__(self, backend: WorkQueueBackend, lease: Lease, lease_seconds: float, interval: float):
+        super().__init__(daemon=True)
+        self.backend = backend
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                if not self.backend.heartbeat(self.lease, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:
+                logger.warning("⚠️ Heartbeat en échec pour la SCPI %s: %s", self.lease.produit_id, e,
+                               extra={"produit_id": self.lease.produit_id})
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class QueueWorker:
+    """Worker qui réserve des SCPI dans la file et les extrait une par une (ou une par contexte)"""
+
+    def __init__(self, backend: WorkQueueBackend, worker_id: str = None,
+                 lease_seconds: float = None, max_attempts: int = None,
+                 scrape_func: Callable[[int, Optional[Tuple[str, ...]]], SCPIData] = None,
+                 contexts: int = None):
+        """
+        Args:
+            backend: Backend de file partagé
+            worker_id: Identifiant unique (par défaut hôte:pid)
+            lease_seconds: Durée d'un bail (par défaut la config "lease_seconds")
+            max_attempts: Nombre d'essais avant échec définitif (par défaut celui du backend)
+            scrape_func: Fonction d'extraction (produit_id, sections), par défaut un scraper
+                Chrome réutilisé
+            contexts: SCPI traitées en même temps (par défaut la config "browser_contexts") ;
+                au-delà de 1, elles partagent un seul Chrome à contextes isolés
+        """
+        self.backend = backend
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds or scraper_config.get("lease_seconds", 120)
+        self.heartbeat_interval = self.lease_seconds / 3
+        self.max_attempts = max_attempts
+        self.scrape_func = scrape_func
+        self.contexts = max(1, contexts or scraper_config.get("browser_contexts", 1))
+        self.durations: List[float] = []  # Durée de chaque essai, succès ou échec
+        self._scraper = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._in_flight = 0
+
+    def _scrape(self, produit_id: int, sections: Optional[Tuple[str, ...]] = None) -> SCPIData:
+        if self.scrape_func is not None:
+            return self.scrape_func(produit_id, sections)
+        if self.contexts > 1:
+            with self._lock:
+                if self._pool is None:
+                    from browser_contexts import BrowserContextPool
+                    self._pool = BrowserContextPool(self.contexts)
+            return self._pool.scrape(produit_id, sections)
+        if self._scraper is None:
+            # Un seul Chrome pour toute la durée du worker (lancé en arrière-plan s'il a été préchauffé)
+            from scpi_scraper import SCPIScraperConfigurable
+            from driver_startup import warm_standby
+            self._scraper = warm_standby.take() or SCPIScraperConfigurable()
+        return self._scraper.scrape_scpi(produit_id, sections=sections)
+
+    def run(self, max_tasks: int = None, idle_timeout: float = 0, poll_interval: float = 2) -> int:
+        """
+        Traite la file jusqu'à ce qu'elle soit vide
+
+        Args:
+            max_tasks: Nombre maximal de SCPI à traiter (None = illimité)
+            idle_timeout: Temps d'attente de nouvelles tâches avant de s'arrêter
+            poll_interval: Intervalle entre deux tentatives de réservation
+
+        Returns:
+            int: Nombre de SCPI extraites avec succès
+        """
+        self._processed = 0
+        try:
+            if self.contexts == 1:
+                self._claim_loop(max_tasks, idle_timeout, poll_interval)
+            else:
+                # Un fil de réservation par contexte, les extractions partagent le même Chrome
+                threads = [threading.Thread(target=self._claim_loop, args=(max_tasks, idle_timeout, poll_interval),
+                                            name=f"worker-{i}", daemon=True) for i in range(self.contexts)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            self.close()
+        return self._processed
+
+    def _claim_loop(self, max_tasks: Optional[int], idle_timeout: float, poll_interval: float):
+        idle_since = None
+        while True:
+            with self._lock:
+                # Les SCPI en cours comptent : aucun fil ne réserve au-delà de max_tasks
+                if max_tasks is not None and self._processed + self._in_flight >= max_tasks:
+                    return
+                self._in_flight += 1
+            ok = False
+            try:
+                lease = self.backend.claim(self.worker_id, self.lease_seconds, self.max_attempts)
+                if lease is None:
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since >= idle_timeout:
+                        return
+                    time.sleep(poll_interval)
+                    continue
+                idle_since = None
+                ok = self._process(lease)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._processed += ok
+
+    def _process(self, lease: Lease) -> bool:
+        """Extrait la SCPI réservée et publie le résultat ; False si elle repasse en file"""
+        log_fields = {"worker_id": self.worker_id, "produit_id": lease.produit_id}
+        logger.info("📥 [%s] SCPI %s réservée (génération %s)", self.worker_id, lease.produit_id,
+                    lease.generation, extra=log_fields)
+        heartbeat = _Heartbeat(self.backend, lease, self.lease_seconds, self.heartbeat_interval)
+        heartbeat.start()
+        start = time.time()
+        try:
+            data = self._scrape(lease.produit_id, lease.sections)
+            heartbeat.stop()
+            if heartbeat.lost:
+                logger.warning("⚠️ [%s] Bail perdu pour la SCPI %s, résultat écrit de façon idempotente",
+                               self.worker_id, lease.produit_id, extra=log_fields)
+            duration = time.time() - start
+            self.durations.append(duration)
+            self.backend.complete(lease, data, duration=duration)
+            logger.info("✅ [%s] SCPI %s terminée en %.2fs", self.worker_id, lease.produit_id, duration,
+                        extra={**log_fields, "duree": round(duration, 3)})
+            return True
+        except Exception as e:
+            heartbeat.stop()
+            self.durations.append(time.time() - start)
+            # Délai dépassé ou erreur : la SCPI repasse en file tant qu'il reste des essais
+            self.backend.fail(lease, str(e), self.max_attempts)
+            logger.error("❌ [%s] Échec pour la SCPI %s: %s", self.worker_id, lease.produit_id, e,
+                         extra=log_fields)
+            return False
+
+    def close(self):
+        if self._scraper is not None:
+            self._scraper.close()
+            self._scraper = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None